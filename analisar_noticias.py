@@ -2,18 +2,13 @@
 Pipeline de classificação de sentimento em notícias financeiras com FinBERT-PT-BR.
 Carrega notícias brutas, normaliza datas, aplica o modelo e salva resultado com sentimento.
 """
-import io
 import logging
 import os
-import re
-from datetime import datetime
 from typing import Optional, Tuple
 
-import dateparser
 import numpy as np
 import pandas as pd
 import torch
-from transformers import AutoTokenizer, BertForSequenceClassification
 
 from config import (
     ARQUIVO_JSON_NOTICIAS,
@@ -21,6 +16,11 @@ from config import (
     FINBERT_MODEL_NAME,
     RANDOM_SEED,
 )
+from armazenamento import anexar_noticias, ler_noticias
+from cache_sentimento import CacheSentimento
+from datas import estatisticas_datas, normalizar_data as normalizar_data_iso, normalizar_datas
+from inferencia_sentimento import MotorInferenciaFinBERT
+from leitor_noticias import LeitorNoticiasBrutas
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -93,54 +93,15 @@ def normalizar_data(data_str: Optional[str]) -> Optional[str]:
         return None
 '''
     
-# NOVA FUNÇÃO PARA TRATAR DATA 
 def normalizar_data(data_str: Optional[str], source: Optional[str] = "") -> Optional[str]:
     """
-    Converte string para ISO 8601 aplicando regras específicas por site (source).
-    """
-    if not data_str:
-        return None
-
-    data_como_str = str(data_str).strip()
-    source_lower = str(source).lower() if source else ""
-
-    try:
-        # REGRA 1: Valor Econômico e InfoMoney (Formato ISO exato com fuso horário)
-        # Ex: "2026-04-01T05:03:35.388-03:00"
-        if "valor" in source_lower or "infomoney" in source_lower:
-            return datetime.fromisoformat(data_como_str).isoformat()
-        
-        # REGRA 2: Bloomberg Linea (Tem o caractere "|" e usa AM/PM)
-        # Ex: "02 de Março, 2026 | 06:53 AM"
-        elif "bloomberg" in source_lower:
-            iso_limpo = data_como_str.replace("Z", "+00:00")
-            return datetime.fromisoformat(iso_limpo).isoformat()
-            """texto_limpo = data_como_str.replace("|", " ").strip()
-            data_obj = dateparser.parse(texto_limpo, languages=['pt', 'en'])
-            return data_obj.isoformat() if data_obj else None"""
+    Converte a data de uma notícia para ISO 8601 (ver datas.py).
 
-            
-        # REGRA 3: Exame (Texto simples em português ou Timestamp numérico)
-        # Ex: "21 de outubro de 2025" ou "1712750000"
-        elif "exame" in source_lower:
-            if data_como_str.isdigit() and len(data_como_str) == 13:
-                return datetime.fromtimestamp(int(data_como_str) / 1000.0).isoformat()
-            
-            data_obj = dateparser.parse(data_como_str, languages=['pt'])
-            return data_obj.isoformat() if data_obj else None
-
-        # FALLBACK: Se for um site novo não mapeado
-        else:
-            try:
-                return datetime.fromisoformat(data_como_str).isoformat()
-            except ValueError:
-                data_obj = dateparser.parse(data_como_str, languages=['pt'])
-                return data_obj.isoformat() if data_obj else None
+    `source` fica por compatibilidade: os formatos de todos os sites são reconhecidos pelo próprio
+    texto da data.
+    """
+    return normalizar_data_iso(data_str)
 
-    except Exception as e:
-        logger.warning(f"Falha na data '{data_str}' do site '{source}': {e}")
-        return None
-    
 def carregar_noticias_existentes(arquivo_saida: str) -> Tuple[pd.DataFrame, set]:
     """
     Carrega notícias já processadas para deduplicação.
@@ -162,33 +123,37 @@ def carregar_noticias_existentes(arquivo_saida: str) -> Tuple[pd.DataFrame, set]
         logger.warning("Não foi possível ler '%s'. Começando do zero. Erro: %s", arquivo_saida, e)
         return pd.DataFrame(), set()
 
-def ler_novas_noticias(arquivo_entrada: str) -> Optional[pd.DataFrame]:
-    """Lê o arquivo de entrada bruto, extraindo blocos JSON (suporta múltiplos arrays)."""
-    logger.info("Lendo e extraindo blocos do arquivo '%s'...", arquivo_entrada)
-    try:
-        with open(arquivo_entrada, 'r', encoding='utf-8') as f:
-            conteudo_bruto = f.read()
+def ler_novas_noticias(
+    arquivo_entrada: str, leitor: Optional[LeitorNoticiasBrutas] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Lê as notícias brutas (JSON Lines) em streaming.
 
-        if not conteudo_bruto.strip():
-            logger.info("Arquivo de entrada está vazio. Nada a processar.")
-            return None
-        blocos_json_encontrados = re.findall(r"(\[.*?\])", conteudo_bruto, re.DOTALL)
-        if not blocos_json_encontrados:
-            logger.warning("Nenhum bloco JSON válido encontrado no arquivo de entrada.")
+    Args:
+        arquivo_entrada: Arquivo gerado pelo Scrapy.
+        leitor: Leitor com checkpoint (lê só as linhas novas). Se None, lê o arquivo inteiro.
+    """
+    logger.info("Lendo notícias do arquivo '%s'...", arquivo_entrada)
+    if not os.path.exists(arquivo_entrada):
+        logger.error("Arquivo '%s' não encontrado.", arquivo_entrada)
+        return None
+    try:
+        leitor = leitor if leitor is not None else LeitorNoticiasBrutas(arquivo_entrada)
+        df_novas = pd.DataFrame.from_records(iter(leitor))
+        if df_novas.empty:
+            logger.info("Nenhuma notícia nova no arquivo de entrada. Nada a processar.")
             return None
-        lista_de_dfs = [pd.read_json(io.StringIO(bloco)) for bloco in blocos_json_encontrados]
-        df_novas = pd.concat(lista_de_dfs, ignore_index=True)
         logger.info("Arquivo de entrada consolidado: %d notícias brutas.", len(df_novas))
         return df_novas
-    except FileNotFoundError:
-        logger.error("Arquivo '%s' não encontrado.", arquivo_entrada)
-        return None
     except Exception as e:
         logger.exception("Erro ao processar JSON de entrada: %s", e)
         return None
 
 def limpar_arquivo_entrada(arquivo_entrada: str) -> None:
-    """Limpa o arquivo de entrada (escreve []) após processamento bem-sucedido."""
+    """
+    Limpa o arquivo de entrada (escreve []).
+    O pipeline usa checkpoint (o arquivo é só de acréscimo); mantida para limpeza manual.
+    """
     try:
         with open(arquivo_entrada, "w", encoding="utf-8") as f:
             f.write("[]")
@@ -197,8 +162,20 @@ def limpar_arquivo_entrada(arquivo_entrada: str) -> None:
         logger.error("Erro ao limpar '%s': %s", arquivo_entrada, e)
 
 
-def run_pipeline() -> None:
-    """Executa o pipeline completo: carrega notícias, classifica sentimento e salva."""
+def classificar_noticias_novas(
+    motor: Optional[MotorInferenciaFinBERT] = None,
+) -> Tuple[Optional[pd.DataFrame], LeitorNoticiasBrutas]:
+    """
+    Lê as notícias brutas novas e classifica o sentimento, sem gravar a base.
+
+    Args:
+        motor: Motor FinBERT já carregado (ex.: pelo servico_recomendacao.py); se None, o modelo
+            só é carregado se houver notícias fora do cache.
+
+    Returns:
+        (notícias classificadas, ou None se não houver nada novo; leitor das brutas). Depois de
+        gravar as notícias, chame leitor.confirmar() para avançar o checkpoint.
+    """
     '''df_existente, titulos_existentes = carregar_noticias_existentes(arquivo_json_saida)
     df_novas_noticias = ler_novas_noticias(arquivo_json_entrada)
 
@@ -209,18 +186,22 @@ def run_pipeline() -> None:
     
     df_para_processar = df_novas_noticias[~df_novas_noticias["title"].isin(titulos_existentes)].reset_index(drop=True)
     if df_para_processar.empty:'''
-    df_existente, urls_existentes = carregar_noticias_existentes(arquivo_json_saida)
-    df_novas_noticias = ler_novas_noticias(arquivo_json_entrada)
+    # Só a coluna url é lida do Parquet (o histórico não é carregado nem reescrito)
+    df_urls = ler_noticias(arquivo_json_saida, ["url"])
+    urls_existentes = set(df_urls["url"].dropna()) if "url" in df_urls.columns else set()
+    logger.info("Encontradas %d notícias já processadas.", len(df_urls))
+    leitor = LeitorNoticiasBrutas(arquivo_json_entrada, usar_checkpoint=True)
+    df_novas_noticias = ler_novas_noticias(arquivo_json_entrada, leitor)
 
     if df_novas_noticias is None or df_novas_noticias.empty:
         logger.info("Nenhuma notícia nova para processar. Encerrando.")
-        return
+        return None, leitor
 
     df_para_processar = df_novas_noticias[~df_novas_noticias["url"].isin(urls_existentes)].reset_index(drop=True)
     if df_para_processar.empty:
-        logger.info("Todas as notícias já foram processadas. Limpando entrada e encerrando.")
-        limpar_arquivo_entrada(arquivo_json_entrada)
-        return
+        logger.info("Todas as notícias já foram processadas. Encerrando.")
+        leitor.confirmar()
+        return None, leitor
 
     logger.info("Notícias novas para processar: %d.", len(df_para_processar))
     logger.info("Limpando e preparando os textos...")
@@ -233,36 +214,52 @@ def run_pipeline() -> None:
 
     if "date" in df_para_processar.columns:
         logger.info("Normalizando datas...")
-        ##df_para_processar["data_normalizada"] = df_para_processar["date"].apply(normalizar_data)
-        df_para_processar["data_normalizada"] = df_para_processar.apply(lambda row: normalizar_data(row.get("date"), row.get("source")), axis=1)
+        df_para_processar["data_normalizada"] = normalizar_datas(df_para_processar["date"])
+        logger.info(
+            "Datas sem data_normalizada: %d | enviadas ao dateparser (no processo): %d.",
+            df_para_processar["data_normalizada"].isna().sum(), estatisticas_datas()["dateparser"],
+        )
     else:
         logger.warning("Coluna 'date' não encontrada. Pulando normalização de data.")
 
-    pred_mapper = {0: "POSITIVE", 1: "NEGATIVE", 2: "NEUTRAL"}
-    logger.info("Carregando o modelo %s (pode demorar na primeira vez)...", FINBERT_MODEL_NAME)
-    tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL_NAME)
-    model = BertForSequenceClassification.from_pretrained(FINBERT_MODEL_NAME)
-    model.eval()
+    df_processado = df_para_processar.copy()
+    textos = df_processado["texto_completo"].tolist()
+    with CacheSentimento(model_name=FINBERT_MODEL_NAME) as cache:
+        resultados_cache = cache.buscar(textos)
+        faltantes = [i for i in range(len(textos)) if i not in resultados_cache]
+        resultados = [resultados_cache.get(i) for i in range(len(textos))]
+        if faltantes:
+            logger.info("Classificando sentimento em %d notícias (%d vindas do cache)...", len(faltantes), len(resultados_cache))
+            if motor is None:
+                motor = MotorInferenciaFinBERT(FINBERT_MODEL_NAME)
+            textos_faltantes = [textos[i] for i in faltantes]
+            novos = motor.classificar(textos_faltantes)
+            cache.salvar(textos_faltantes, novos)
+            for i, r in zip(faltantes, novos):
+                resultados[i] = r
+        else:
+            logger.info("Todas as %d notícias vieram do cache de sentimento. Modelo não carregado.", len(textos))
+        cache.registrar_estatisticas()
+    df_processado["sentimento_previsto"] = [r["sentimento"] for r in resultados]
+    df_processado["probabilidades_sentimento"] = [r["probabilidades"] for r in resultados]
+    return df_processado, leitor
 
-    def prever_sentimento(texto: str) -> str:
-        if not isinstance(texto, str) or not texto:
-            return "TEXTO_INVALIDO"
-        inputs = tokenizer(texto, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = model(**inputs)
-        prediction = int(np.argmax(outputs.logits.numpy()))
-        return pred_mapper.get(prediction, "NEUTRAL")
 
-    logger.info("Classificando sentimento em %d notícias...", len(df_para_processar))
-    df_processado = df_para_processar.copy()
-    df_processado["sentimento_previsto"] = df_processado["texto_completo"].apply(prever_sentimento)
+def run_pipeline(motor: Optional[MotorInferenciaFinBERT] = None) -> None:
+    """
+    Executa o pipeline completo: carrega notícias, classifica sentimento e salva.
 
-    logger.info("Combinando notícias existentes com as novas processadas...")
-    df_final_completo = pd.concat([df_existente, df_processado], ignore_index=True)
-    logger.info("Salvando %d notícias em '%s'...", len(df_final_completo), arquivo_json_saida)
-    df_final_completo.to_json(arquivo_json_saida, orient="records", indent=4, force_ascii=False)
+    Args:
+        motor: Motor FinBERT já carregado (ex.: pelo servico_recomendacao.py); se None, o modelo
+            só é carregado se houver notícias fora do cache.
+    """
+    df_processado, leitor = classificar_noticias_novas(motor)
+    if df_processado is None:
+        return
+    logger.info("Acrescentando %d notícias processadas em '%s'...", len(df_processado), arquivo_json_saida)
+    anexar_noticias(df_processado, arquivo_json_saida)
     logger.info("Processo concluído. Arquivo atualizado: %s", arquivo_json_saida)
-    limpar_arquivo_entrada(arquivo_json_entrada)
+    leitor.confirmar()
 
 
 if __name__ == "__main__":
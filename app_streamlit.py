@@ -18,6 +18,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from config import (
+    ARQUIVO_HISTORICO_RECOMENDACOES,
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_JSON_NOTICIAS,
     ARQUIVO_JSON_SENTIMENTO,
@@ -26,6 +27,8 @@ from config import (
     ARQUIVO_ULTIMO_BACKTEST_JSON,
     ARQUIVO_RESULTADOS_BACKTEST,
 )
+from armazenamento import contar_noticias, existe_base, ler_noticias
+from leitor_noticias import contar_noticias_brutas
 
 st.set_page_config(
     page_title="Análise de Sentimento — Mercado Financeiro",
@@ -78,7 +81,7 @@ tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
 with tab1:
     st.header("O que o projeto faz")
     st.markdown("""
-    1. **Scrapy** — Puxa notícias dos portais (Infomoney, Valor, Exame, Bloomberg) e salva em `financial_news.json`.
+    1. **Scrapy** — Puxa notícias dos portais (Infomoney, Valor, Exame, Bloomberg) e salva em `financial_news.jsonl`.
     2. **IA (FinBERT-PT-BR)** — Classifica cada notícia em **positivo**, **negativo** ou **neutro** (análise de sentimento).
     3. **Associar tickers** — Identifica quais ativos (PETR4, VALE3, etc.) são citados em cada notícia → `noticias_mapeadas.json`.
     4. **Recomendação** — Gera sinais compra/venda/segurar por ativo (**IA**: Random Forest ou agente RL Q-Learning, nunca regra fixa), com **quando**, **onde** e **por quê** (notícias que motivaram).
@@ -86,7 +89,7 @@ with tab1:
     """)
     st.subheader("Fluxo de dados")
     st.code("""
-[Portais] → Scrapy → financial_news.json
+[Portais] → Scrapy → financial_news.jsonl
     → analisar_noticias.py (FinBERT) → noticias_com_sentimento.json
     → associar_tickers.py → noticias_mapeadas.json
     → recomendacao.py → ultima_recomendacao.json (investir? onde? quando? por quê?)
@@ -102,38 +105,33 @@ with tab2:
         n_noticias_brutas = 0
         if os.path.exists(ARQUIVO_JSON_NOTICIAS):
             try:
-                with open(ARQUIVO_JSON_NOTICIAS, "r", encoding="utf-8") as f:
-                    raw = f.read()
-                # Conta objetos no JSON (aproximado)
-                n_noticias_brutas = raw.count('"title"') if raw.strip() and raw.strip() != "[]" else 0
+                n_noticias_brutas = contar_noticias_brutas(ARQUIVO_JSON_NOTICIAS)
             except Exception:
                 pass
         st.metric("Notícias brutas (Scrapy)", n_noticias_brutas)
     with col2:
         n_sentimento = 0
-        if os.path.exists(ARQUIVO_JSON_SENTIMENTO):
+        if existe_base(ARQUIVO_JSON_SENTIMENTO):
             try:
-                df = pd.read_json(ARQUIVO_JSON_SENTIMENTO)
-                n_sentimento = len(df)
+                n_sentimento = contar_noticias(ARQUIVO_JSON_SENTIMENTO)
             except Exception:
                 pass
         st.metric("Notícias com sentimento", n_sentimento)
     with col3:
         n_mapeadas = 0
-        if os.path.exists(ARQUIVO_JSON_MAPEADAS):
+        if existe_base(ARQUIVO_JSON_MAPEADAS):
             try:
-                df = pd.read_json(ARQUIVO_JSON_MAPEADAS)
-                n_mapeadas = len(df)
+                n_mapeadas = contar_noticias(ARQUIVO_JSON_MAPEADAS)
             except Exception:
                 pass
         st.metric("Notícias mapeadas (tickers)", n_mapeadas)
 
     st.subheader("Amostra: notícias com sentimento")
-    if os.path.exists(ARQUIVO_JSON_SENTIMENTO):
+    if existe_base(ARQUIVO_JSON_SENTIMENTO):
         try:
-            df = pd.read_json(ARQUIVO_JSON_SENTIMENTO)
+            df = ler_noticias(ARQUIVO_JSON_SENTIMENTO, ["title", "date", "data_normalizada", "source", "sentimento_previsto"])
             if not df.empty:
-                cols_show = [c for c in ["title", "date", "data_normalizada", "source", "sentimento_previsto"] if c in df.columns]
+                cols_show = list(df.columns)
                 if cols_show:
                     st.dataframe(df[cols_show].head(50), use_container_width=True)
             else:
@@ -177,6 +175,17 @@ with tab3:
             st.error(f"Erro ao carregar recomendação: {e}")
     else:
         st.info("Nenhuma recomendação gerada ainda. Execute: python recomendacao.py (ou python main.py após associar_tickers.py).")
+    st.subheader("Histórico de recomendações")
+    if os.path.exists(ARQUIVO_HISTORICO_RECOMENDACOES):
+        try:
+            historico = pd.read_parquet(ARQUIVO_HISTORICO_RECOMENDACOES)
+            contagem = historico.groupby(["data", "acao"]).size().unstack(fill_value=0)
+            st.bar_chart(contagem)
+            st.dataframe(historico.sort_values(["data", "ticker"], ascending=[False, True]), use_container_width=True)
+        except Exception as e:
+            st.error(f"Erro ao carregar histórico: {e}")
+    else:
+        st.caption("Sem histórico ainda. Ele é gravado a cada recomendação diária ou em lote com recomendacao.gerar_recomendacoes.")
 
 # --- Tab 4: Backtest (lucro / métricas) ---
 with tab4:
@@ -0,0 +1,243 @@
+"""
+Armazenamento colunar (Parquet) das bases de notícias.
+
+Cada arquivo JSON de notícias (noticias_com_sentimento.json, noticias_mapeadas.json) tem um
+dataset Parquet ao lado (`<nome>.parquet/`), particionado por mês da `data_normalizada`
+(partições hive `mes=AAAA-MM`). Escritas novas só acrescentam arquivos; leituras carregam apenas
+as colunas pedidas e filtram por data direto no Parquet (partições fora do período nem são abertas).
+O JSON de compatibilidade é exportado sob demanda (`python armazenamento.py` ou `exportar_json`), ou a
+cada escrita se config.EXPORTAR_JSON_COMPATIVEL for True.
+
+Na primeira leitura/escrita, se o dataset ainda não existir, ele é criado a partir do JSON.
+
+Uso:
+  python armazenamento.py       (reexporta noticias_com_sentimento.json e noticias_mapeadas.json)
+"""
+import json
+import logging
+import os
+import shutil
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from config import EXPORTAR_JSON_COMPATIVEL
+
+logger = logging.getLogger(__name__)
+
+# Colunas que a maior parte dos leitores usa (projeção mínima)
+COLUNAS_RESUMO: List[str] = ["data_normalizada", "sentimento_previsto", "tickers_citados"]
+# Colunas de listas (Parquet devolve arrays numpy; convertidas de volta para list)
+COLUNAS_LISTA = ("tickers_citados", "empresas_citadas", "probabilidades_sentimento")
+# Colunas de dicts com chaves variáveis: gravadas como texto JSON
+COLUNAS_JSON = ("precos_no_dia",)
+# Colunas auxiliares de partição/filtro
+COLUNA_MES = "mes"
+COLUNA_DIA = "dia"
+MES_SEM_DATA = "sem-data"
+
+_PARTICIONAMENTO = ds.partitioning(pa.schema([(COLUNA_MES, pa.string())]), flavor="hive")
+
+
+def diretorio_dataset(arquivo_json: str) -> str:
+    """Retorna o diretório do dataset Parquet correspondente ao arquivo JSON."""
+    return os.path.splitext(arquivo_json)[0] + ".parquet"
+
+
+def existe_base(arquivo_json: str) -> bool:
+    """True se a base existe (dataset Parquet ou JSON ainda não migrado)."""
+    return os.path.isdir(diretorio_dataset(arquivo_json)) or os.path.exists(arquivo_json)
+
+
+def impressao_dataset(diretorio: str) -> Dict[str, List[int]]:
+    """Arquivos do dataset (caminho relativo) com [tamanho, mtime_ns]; muda a cada escrita."""
+    partes: Dict[str, List[int]] = {}
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            if nome.endswith(".parquet"):
+                caminho = os.path.join(raiz, nome)
+                info = os.stat(caminho)
+                partes[os.path.relpath(caminho, diretorio)] = [info.st_size, info.st_mtime_ns]
+    return partes
+
+
+def _preparar_para_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza tipos (datas, listas, dicts, colunas mistas) e cria as colunas mes/dia."""
+    df = df.drop(columns=[COLUNA_MES, COLUNA_DIA], errors="ignore").copy()
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            # Mesmo formato do to_json(date_format="iso") usado antes
+            df[col] = serie.dt.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3].where(serie.notna(), None)
+        elif col in COLUNAS_LISTA:
+            df[col] = serie.map(lambda v: list(v) if isinstance(v, (list, tuple)) or hasattr(v, "tolist") else None)
+        elif col in COLUNAS_JSON:
+            df[col] = serie.map(lambda v: json.dumps(v, ensure_ascii=False) if isinstance(v, dict) else None)
+        elif serie.dtype == object:
+            tipos = {type(v) for v in serie if v is not None and not (isinstance(v, float) and pd.isna(v))}
+            if len(tipos) > 1:
+                df[col] = serie.map(lambda v: None if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+    datas = df["data_normalizada"].tolist() if "data_normalizada" in df.columns else [None] * len(df)
+    dias = [v[:10] if isinstance(v, str) and len(v) >= 10 else None for v in datas]
+    df[COLUNA_DIA] = pd.Series(dias, index=df.index, dtype=object)
+    df[COLUNA_MES] = [d[:7] if d else MES_SEM_DATA for d in dias]
+    return df
+
+
+def _escrever(df: pd.DataFrame, diretorio: str) -> None:
+    """Acrescenta os registros ao dataset (novos arquivos; nunca reescreve os existentes)."""
+    if df.empty:
+        return
+    tabela = pa.Table.from_pandas(_preparar_para_parquet(df), preserve_index=False)
+    ds.write_dataset(
+        tabela,
+        diretorio,
+        format="parquet",
+        partitioning=_PARTICIONAMENTO,
+        basename_template=f"parte-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def _abrir(diretorio: str) -> Optional[ds.Dataset]:
+    """Abre o dataset unificando os schemas das partes (colunas novas em escritas recentes)."""
+    if not os.path.isdir(diretorio):
+        return None
+    base = ds.dataset(diretorio, format="parquet", partitioning=_PARTICIONAMENTO)
+    schemas = [f.physical_schema for f in base.get_fragments()]
+    if not schemas:
+        return None
+    schema = pa.unify_schemas(schemas, promote_options="permissive")
+    schema = schema.append(pa.field(COLUNA_MES, pa.string())) if COLUNA_MES not in schema.names else schema
+    return ds.dataset(diretorio, schema=schema, format="parquet", partitioning=_PARTICIONAMENTO)
+
+
+def garantir_dataset(arquivo_json: str) -> str:
+    """Cria o dataset a partir do JSON se ele ainda não existir. Retorna o diretório."""
+    diretorio = diretorio_dataset(arquivo_json)
+    if os.path.isdir(diretorio) or not os.path.exists(arquivo_json):
+        return diretorio
+    logger.info("Criando dataset Parquet '%s' a partir de '%s'...", diretorio, arquivo_json)
+    df = pd.read_json(arquivo_json, orient="records", convert_dates=False)
+    temporario = f"{diretorio}.tmp-{uuid.uuid4().hex}"
+    _escrever(df, temporario)
+    if os.path.isdir(temporario):
+        os.replace(temporario, diretorio)
+    return diretorio
+
+
+def _filtro_datas(data_inicio: Optional[str], data_fim: Optional[str]) -> Optional[ds.Expression]:
+    filtro = None
+    if data_inicio:
+        cond = (ds.field(COLUNA_MES) >= data_inicio[:7]) & (ds.field(COLUNA_MES) != MES_SEM_DATA)
+        cond = cond & (ds.field(COLUNA_DIA) >= data_inicio[:10])
+        filtro = cond
+    if data_fim:
+        cond = (ds.field(COLUNA_MES) <= data_fim[:7]) & (ds.field(COLUNA_DIA) <= data_fim[:10])
+        filtro = cond if filtro is None else filtro & cond
+    return filtro
+
+
+def _restaurar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    for col in COLUNAS_LISTA:
+        if col in df.columns:
+            df[col] = df[col].map(lambda v: list(v) if v is not None and hasattr(v, "__len__") else v)
+    for col in COLUNAS_JSON:
+        if col in df.columns:
+            df[col] = df[col].map(lambda v: json.loads(v) if isinstance(v, str) else v)
+    return df
+
+
+def ler_noticias(
+    arquivo_json: str,
+    colunas: Optional[Sequence[str]] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+    urls: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Lê uma base de notícias do dataset Parquet (criado a partir do JSON se necessário).
+
+    Args:
+        arquivo_json: Caminho do JSON lógico (ex.: config.ARQUIVO_JSON_MAPEADAS).
+        colunas: Colunas a carregar (None = todas). Colunas inexistentes são ignoradas.
+        data_inicio: Data mínima "AAAA-MM-DD" (inclusive), aplicada no Parquet.
+        data_fim: Data máxima "AAAA-MM-DD" (inclusive), aplicada no Parquet.
+        urls: Só as notícias com estas URLs, filtradas no Parquet (None = todas).
+
+    Returns:
+        DataFrame (vazio se a base não existir).
+    """
+    dataset = _abrir(garantir_dataset(arquivo_json))
+    if dataset is None:
+        return pd.DataFrame(columns=list(colunas) if colunas else None)
+    internas = {COLUNA_MES, COLUNA_DIA}
+    if colunas is None:
+        selecionadas = [c for c in dataset.schema.names if c not in internas]
+    else:
+        selecionadas = [c for c in colunas if c in dataset.schema.names]
+    filtro = _filtro_datas(data_inicio, data_fim)
+    if urls is not None:
+        cond = ds.field("url").isin(pa.array(sorted(set(urls)), pa.string()))
+        filtro = cond if filtro is None else filtro & cond
+    tabela = dataset.to_table(columns=selecionadas, filter=filtro)
+    return _restaurar_tipos(tabela.to_pandas())
+
+
+def ler_noticias_registros(arquivo_json: str, colunas: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Como ler_noticias, mas retorna lista de dicts (valores ausentes como None, igual ao json.load)."""
+    df = ler_noticias(arquivo_json, colunas)
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
+
+
+def contar_noticias(arquivo_json: str) -> int:
+    """Número de notícias na base (lido dos metadados do Parquet, sem carregar as colunas)."""
+    dataset = _abrir(garantir_dataset(arquivo_json))
+    return int(dataset.count_rows()) if dataset is not None else 0
+
+
+def exportar_json(arquivo_json: str) -> None:
+    """Reescreve o JSON a partir do dataset (compatibilidade com scripts e ferramentas antigas)."""
+    df = ler_noticias(arquivo_json)
+    df.to_json(arquivo_json, orient="records", indent=4, force_ascii=False)
+    logger.info("JSON de compatibilidade exportado: %s (%d notícias).", arquivo_json, len(df))
+
+
+def anexar_noticias(df: pd.DataFrame, arquivo_json: str, exportar: bool = EXPORTAR_JSON_COMPATIVEL) -> None:
+    """Acrescenta notícias ao dataset (sem reescrever o histórico) e, opcionalmente, exporta o JSON."""
+    diretorio = garantir_dataset(arquivo_json)
+    _escrever(df, diretorio)
+    logger.info("%d notícias acrescentadas ao dataset '%s'.", len(df), diretorio)
+    if exportar:
+        exportar_json(arquivo_json)
+
+
+def salvar_noticias(df: pd.DataFrame, arquivo_json: str, exportar: bool = EXPORTAR_JSON_COMPATIVEL) -> None:
+    """Substitui todo o conteúdo do dataset por df (troca atômica do diretório)."""
+    diretorio = diretorio_dataset(arquivo_json)
+    temporario = f"{diretorio}.tmp-{uuid.uuid4().hex}"
+    _escrever(df, temporario)
+    antigo = f"{diretorio}.old-{uuid.uuid4().hex}"
+    if os.path.isdir(diretorio):
+        os.replace(diretorio, antigo)
+    if os.path.isdir(temporario):
+        os.replace(temporario, diretorio)
+    else:
+        os.makedirs(diretorio, exist_ok=True)
+    shutil.rmtree(antigo, ignore_errors=True)
+    logger.info("Dataset '%s' salvo com %d notícias.", diretorio, len(df))
+    if exportar:
+        exportar_json(arquivo_json)
+
+
+if __name__ == "__main__":
+    from config import ARQUIVO_JSON_MAPEADAS, ARQUIVO_JSON_SENTIMENTO
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    for arquivo in (ARQUIVO_JSON_SENTIMENTO, ARQUIVO_JSON_MAPEADAS):
+        if os.path.isdir(diretorio_dataset(arquivo)):
+            exportar_json(arquivo)
@@ -1,18 +1,42 @@
 """
 Associa notícias classificadas a tickers de ações/ETFs via NER (spaCy) e mapeamento.
+
+As empresas vêm do NER do spaCy ou, com MOTOR_MAPEAMENTO = "matcher", do matcher_empresas.py
+(nomes do mapa e códigos de ticker procurados direto no texto, sem carregar o spaCy).
+
+O mapeamento é incremental: as empresas extraídas de cada notícia ficam em `entidades_noticias.parquet/`
+(url + hash do texto), só as notícias de URL ainda não vista são lidas (sem o texto das demais), o
+spaCy só roda nos textos novos e as novas notícias mapeadas são acrescentadas à base. Só quando
+mapeamento_tickers.json muda (ou a base mapeada foi regravada por outro caminho) todas as notícias
+são lidas e remapeadas, reaproveitando as entidades gravadas.
 """
+import hashlib
 import json
 import logging
 import os
-from typing import Any, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Sequence
 
 import pandas as pd
-import spacy
 
+from armazenamento import anexar_noticias, diretorio_dataset, existe_base, impressao_dataset, ler_noticias, salvar_noticias
+from cache_sentimento import normalizar_texto
+from sentimento_diario import atualizar_sentimento_diario
 from config import (
+    ALIAS_APROXIMADO_ATIVO,
+    ALIAS_LIMIAR_CONFIANCA,
+    ALIAS_MIN_CARACTERES,
+    ARQUIVO_ENTIDADES_NOTICIAS,
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_JSON_SENTIMENTO,
     ARQUIVO_MAPEAMENTO_TICKERS,
+    MOTOR_MAPEAMENTO,
+    NER_BATCH_SIZE,
+    NER_MAX_CARACTERES,
+    NER_MIN_TEXTOS_PARALELO,
+    NER_MODELO_SPACY,
+    NER_N_PROCESSOS,
+    NER_PIPES_DESATIVADOS,
 )
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -21,22 +45,90 @@ logger = logging.getLogger(__name__)
 ARQUIVO_ENTRADA = ARQUIVO_JSON_SENTIMENTO
 MAPA_TICKERS_ARQ = ARQUIVO_MAPEAMENTO_TICKERS
 ARQUIVO_SAIDA = ARQUIVO_JSON_MAPEADAS
+ARQUIVO_ENTIDADES = ARQUIVO_ENTIDADES_NOTICIAS
+
+ROTULOS_EMPRESA = ("ORG", "MISC")
+MOTORES = ("ner", "matcher")
 
 # --- 2. FUNÇÕES DE PROCESSAMENTO ---
 
 def carregar_modelo_spacy() -> Any:
-    """Carrega o modelo 'pt_core_news_lg' do spaCy para NER em português."""
-    logger.info("Carregando modelo spaCy 'pt_core_news_lg'...")
+    """Carrega o modelo NER_MODELO_SPACY ('pt_core_news_lg') para NER em português, só com os componentes do NER ativos."""
+    # Import local: spaCy é opcional (requirements.txt) e só o NER precisa dele
+    import spacy
+    logger.info("Carregando modelo spaCy '%s'...", NER_MODELO_SPACY)
     try:
-        nlp = spacy.load("pt_core_news_lg")
-        logger.info("Modelo spaCy carregado com sucesso.")
-        return nlp
+        nlp = spacy.load(NER_MODELO_SPACY)
     except OSError:
         logger.error(
-            "Modelo 'pt_core_news_lg' não encontrado. Instale com: "
-            "pip install https://github.com/explosion/spacy-models/releases/download/pt_core_news_lg-v3.7.0/pt_core_news_lg-3.7.0.tar.gz"
+            "Modelo '%s' não encontrado. Instale com: "
+            "pip install https://github.com/explosion/spacy-models/releases/download/pt_core_news_lg-v3.7.0/pt_core_news_lg-3.7.0.tar.gz",
+            NER_MODELO_SPACY,
         )
         raise SystemExit(1)
+    for nome in pipes_sem_ner(nlp):
+        nlp.disable_pipe(nome)
+    logger.info("Modelo spaCy carregado com sucesso (componentes ativos: %s).", ", ".join(nlp.pipe_names))
+    return nlp
+
+def pipes_sem_ner(nlp_model: Any) -> List[str]:
+    """
+    Componentes ativos de `nlp_model` que o NER não usa (NER_PIPES_DESATIVADOS presentes no modelo).
+
+    O tok2vec compartilhado entra na lista só se nenhum componente que continua ativo depende dele
+    (no pt_core_news_lg o NER tem o próprio tok2vec).
+    """
+    desativar = [nome for nome in NER_PIPES_DESATIVADOS if nome in nlp_model.pipe_names]
+    if "tok2vec" in nlp_model.pipe_names:
+        ouvintes = set(getattr(nlp_model.get_pipe("tok2vec"), "listening_components", []))
+        if not ouvintes - set(desativar):
+            desativar.append("tok2vec")
+    return desativar
+
+def _empresas_do_doc(doc: Any) -> List[str]:
+    # Nomes únicos, na ordem em que aparecem no texto
+    return list(dict.fromkeys(ent.text.strip() for ent in doc.ents if ent.label_ in ROTULOS_EMPRESA))
+
+def extrair_empresas_lote(
+    textos: Sequence[Optional[str]],
+    nlp_model: Any,
+    batch_size: int = NER_BATCH_SIZE,
+    n_processos: int = NER_N_PROCESSOS,
+    max_caracteres: int = NER_MAX_CARACTERES,
+) -> List[List[str]]:
+    """
+    Extrai entidades ORG/MISC de vários textos com `nlp.pipe`, só com os componentes que o NER usa.
+
+    Args:
+        textos: Textos a processar (None ou vazios resultam em lista vazia).
+        nlp_model: Modelo spaCy carregado.
+        batch_size: Textos por lote do nlp.pipe.
+        n_processos: Processos do nlp.pipe (usado só a partir de NER_MIN_TEXTOS_PARALELO textos).
+        max_caracteres: Cada texto é cortado neste número de caracteres (corpo longo custa
+            tempo e as empresas citadas aparecem no título e no início da notícia).
+
+    Returns:
+        Para cada texto, a lista de nomes de empresas/organizações únicos.
+    """
+    validos = [i for i, t in enumerate(textos) if isinstance(t, str) and t]
+    resultado: List[List[str]] = [[] for _ in textos]
+    if not validos:
+        return resultado
+    n_processos = n_processos if len(validos) >= NER_MIN_TEXTOS_PARALELO else 1
+    inicio = time.perf_counter()
+    with nlp_model.select_pipes(disable=pipes_sem_ner(nlp_model)):
+        docs = nlp_model.pipe(
+            (textos[i][:max_caracteres] for i in validos), batch_size=batch_size, n_process=n_processos,
+        )
+        for i, doc in zip(validos, docs):
+            resultado[i] = _empresas_do_doc(doc)
+    duracao = time.perf_counter() - inicio
+    if len(validos) > 1:
+        logger.info(
+            "NER: %d textos em %.1fs (%.1f docs/s, %d processo(s)).",
+            len(validos), duracao, len(validos) / duracao if duracao > 0 else float("inf"), n_processos,
+        )
+    return resultado
 
 def extrair_empresas(texto: Optional[str], nlp_model: Any) -> List[str]:
     """
@@ -49,18 +141,7 @@ def extrair_empresas(texto: Optional[str], nlp_model: Any) -> List[str]:
     Returns:
         Lista de nomes de empresas/organizações únicos.
     """
-    if not isinstance(texto, str) or not texto:
-        return []
-        
-    doc = nlp_model(texto)
-    empresas = []
-    for ent in doc.ents:
-        if ent.label_ == "ORG" or ent.label_ == "MISC":
-            # Adiciona o nome da empresa, limpando espaços
-            empresas.append(ent.text.strip())
-            
-    # Remove duplicatas e retorna a lista
-    return list(set(empresas))
+    return extrair_empresas_lote([texto], nlp_model)[0]
 
 def carregar_mapa_tickers(arquivo_mapa: str) -> dict:
     """
@@ -84,48 +165,60 @@ def carregar_mapa_tickers(arquivo_mapa: str) -> dict:
     logger.info("Mapa carregado.")
     return mapa_tickers
 
-def mapear_tickers(lista_empresas: List[str], mapa_tickers: dict) -> List[str]:
+def mapear_tickers(lista_empresas: List[str], mapa_tickers: dict, indice: Any = None) -> List[str]:
     """
     Converte nomes de empresas em tickers usando o mapa. Ignora entradas null.
+
+    Com `indice` (indice_aliases.IndiceAliases), empresas que não são chave do mapa ("Petrobras S.A.",
+    "a Vale") recebem o ticker do alias mais parecido, se a confiança atingir o limiar do índice.
     """
     tickers = []
     for empresa in lista_empresas:
         # Verifica se a empresa está no mapa
         if empresa in mapa_tickers:
             ticker_mapeado = mapa_tickers[empresa]
-            
-            # Adiciona APENAS se o ticker não for 'null'
-            if ticker_mapeado is not None:
-                tickers.append(ticker_mapeado)
-                
+        elif indice is not None:
+            ticker_mapeado = indice.ticker(empresa)
+        else:
+            continue
+
+        # Adiciona APENAS se o ticker não for 'null'
+        if ticker_mapeado is not None:
+            tickers.append(ticker_mapeado)
+
     # Retorna a lista de tickers únicos
     return list(set(tickers))
 
-# --- 3. EXECUÇÃO PRINCIPAL ---
+def indice_do_mapa(mapa_tickers: dict) -> Any:
+    """Índice aproximado de aliases do mapa (indice_aliases.py), ou None se ALIAS_APROXIMADO_ATIVO for False."""
+    if not ALIAS_APROXIMADO_ATIVO:
+        return None
+    from indice_aliases import IndiceAliases
+    return IndiceAliases(mapa_tickers)
 
-if __name__ == "__main__":
-    
-    # --- PASSO 1: CARREGAR DADOS E MODELOS ---
-    nlp = carregar_modelo_spacy()
-    mapa_tickers = carregar_mapa_tickers(MAPA_TICKERS_ARQ)
-    
-    logger.info("Lendo notícias de entrada: '%s'...", ARQUIVO_ENTRADA)
-    try:
-        df = pd.read_json(ARQUIVO_ENTRADA)
-    except Exception as e:
-        logger.exception("Erro ao ler '%s': %s", ARQUIVO_ENTRADA, e)
-        raise SystemExit(1)
-    if "texto_completo" not in df.columns:
-        logger.error("Arquivo de entrada não contém a coluna 'texto_completo'.")
-        raise SystemExit(1)
-    logger.info("Encontradas %d notícias para processar.", len(df))
+def mapear_noticias(df: pd.DataFrame, nlp: Any, mapa_tickers: dict) -> pd.DataFrame:
+    """
+    Extrai empresas (NER) e tickers de cada notícia e mantém só as que citam algum ticker.
 
+    Args:
+        df: Notícias com sentimento (coluna texto_completo).
+        nlp: Modelo spaCy carregado.
+        mapa_tickers: Mapa empresa -> ticker.
+
+    Returns:
+        Cópia de df com empresas_citadas e tickers_citados, só com notícias mapeadas.
+    """
+    df = df.copy()
     logger.info("Iniciando extração de entidades (NER) com spaCy...")
-    df["empresas_citadas"] = df["texto_completo"].apply(lambda t: extrair_empresas(t, nlp))
+    df["empresas_citadas"] = extrair_empresas_lote(df["texto_completo"].tolist(), nlp)
     logger.info("Extração de entidades concluída.")
+    return _filtrar_mapeadas(df, mapa_tickers)
 
+def _filtrar_mapeadas(df: pd.DataFrame, mapa_tickers: dict) -> pd.DataFrame:
+    """Preenche tickers_citados a partir de empresas_citadas e mantém só as notícias com algum ticker."""
     logger.info("Iniciando mapeamento de tickers...")
-    df["tickers_citados"] = df["empresas_citadas"].apply(lambda l: mapear_tickers(l, mapa_tickers))
+    indice = indice_do_mapa(mapa_tickers)
+    df["tickers_citados"] = df["empresas_citadas"].apply(lambda l: mapear_tickers(l, mapa_tickers, indice))
     logger.info("Mapeamento concluído.")
 
     df_mapeado = df[df["tickers_citados"].apply(len) > 0].copy()
@@ -135,5 +228,265 @@ if __name__ == "__main__":
         "Processo finalizado. Originais: %d | Mapeadas: %d | Filtradas: %d",
         len(df), len(df_mapeado), len(df) - len(df_mapeado),
     )
-    df_mapeado.to_json(ARQUIVO_SAIDA, orient="records", indent=4, force_ascii=False)
-    logger.info("Notícias mapeadas salvas em '%s'. Próximo passo: criar_estrategia.py", ARQUIVO_SAIDA)
\ No newline at end of file
+    return df_mapeado
+
+# --- Mapeamento incremental ---
+
+def chave_entidades(texto: Optional[str], motor: str = "ner") -> str:
+    """SHA-256 (hex) do motor (modelo spaCy e limite de caracteres, no NER) e do texto normalizado."""
+    texto = normalizar_texto(texto) if isinstance(texto, str) else ""
+    motor_id = f"{NER_MODELO_SPACY}\x00{NER_MAX_CARACTERES}" if motor == "ner" else motor
+    conteudo = f"{motor_id}\x00{texto}"
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+def extrair_empresas_motor(
+    textos: Sequence[Optional[str]], motor: str, nlp: Any = None, mapa_tickers: Optional[dict] = None,
+) -> List[List[str]]:
+    """
+    Empresas de cada texto pelo motor escolhido.
+
+    Args:
+        textos: Textos a processar.
+        motor: "ner" (spaCy; `nlp` carregado se None) ou "matcher" (nomes de `mapa_tickers` e
+            códigos de ticker; não usa o spaCy).
+        nlp: Modelo spaCy já carregado (só no motor "ner").
+        mapa_tickers: Mapa empresa -> ticker (obrigatório no motor "matcher").
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de mapeamento desconhecido: {motor}. Válidos: {MOTORES}")
+    if motor == "matcher":
+        from matcher_empresas import MatcherEmpresas
+        return MatcherEmpresas(mapa_tickers or {}).empresas_lote(textos)
+    return extrair_empresas_lote(textos, nlp if nlp is not None else carregar_modelo_spacy())
+
+def mapa_do_motor(mapa_tickers: dict, motor: str) -> dict:
+    """Mapa usado em mapear_tickers: no motor "matcher", acrescido dos códigos ("PETR4" -> "PETR4.SA")."""
+    if motor == "matcher":
+        from matcher_empresas import mapa_com_codigos
+        return mapa_com_codigos(mapa_tickers)
+    return mapa_tickers
+
+def hash_mapa_tickers(mapa_tickers: dict) -> str:
+    """
+    SHA-256 (hex) do mapa empresa -> ticker (independente da ordem das chaves) e da configuração da
+    resolução aproximada de aliases, que também muda os tickers de cada notícia.
+    """
+    conteudo = {
+        "mapa": mapa_tickers,
+        "aliases": [ALIAS_APROXIMADO_ATIVO, ALIAS_LIMIAR_CONFIANCA, ALIAS_MIN_CARACTERES],
+    }
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _caminho_estado(arquivo_entidades: str) -> str:
+    return os.path.splitext(arquivo_entidades)[0] + ".estado.json"
+
+def _ler_estado(arquivo_entidades: str) -> Dict[str, Any]:
+    caminho = _caminho_estado(arquivo_entidades)
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _noticias_a_mapear(
+    df: Optional[pd.DataFrame], arquivo_entrada: Optional[str], ignorar: set, completa: bool,
+) -> pd.DataFrame:
+    """
+    Notícias de `arquivo_entrada` (todas, se `completa`; senão só as de URL fora de `ignorar`, lidas
+    pelo filtro do Parquet) seguidas das de `df` que ainda não estão nela.
+    """
+    partes = []
+    if arquivo_entrada is not None:
+        urls_entrada = set(ler_noticias(arquivo_entrada, ["url"])["url"].tolist())
+        if completa:
+            partes.append(ler_noticias(arquivo_entrada))
+        elif urls_entrada - ignorar:
+            partes.append(ler_noticias(arquivo_entrada, urls=urls_entrada - ignorar))
+    else:
+        urls_entrada = set()
+    if df is not None and not df.empty:
+        excluir = urls_entrada if completa else urls_entrada | ignorar
+        if "url" in df.columns:
+            df = df[~df["url"].isin(excluir)]
+        partes.append(df)
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=["url", "texto_completo"])
+    return pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0].reset_index(drop=True)
+
+def mapear_incremental(
+    df: Optional[pd.DataFrame] = None,
+    nlp: Any = None,
+    mapa_tickers: Optional[dict] = None,
+    arquivo_saida: str = ARQUIVO_SAIDA,
+    arquivo_entidades: str = ARQUIVO_ENTIDADES,
+    reprocessar: bool = False,
+    motor: Optional[str] = None,
+    arquivo_entrada: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Mapeia só as notícias ainda não processadas; não grava nada (ver gravar_mapeamento).
+
+    Uma notícia é nova se a URL dela não está em `arquivo_entidades` (só a coluna url é lida); o
+    texto completo e a chave_entidades são calculados só para as novas, e o NER roda só nos textos
+    ainda sem entidades gravadas (republicações em outra URL reaproveitam as entidades).
+    Se o mapa de tickers ou o motor mudou, a base mapeada não bate com o estado gravado ou
+    `reprocessar` é True, todas as notícias são lidas e remapeadas e a base mapeada é reconstruída.
+    No motor "matcher" as entidades dependem do mapa, então são sempre recalculadas (é barato).
+
+    Args:
+        df: Notícias com sentimento (coluna texto_completo) ainda fora de `arquivo_entrada`, ou todas
+            as notícias se `arquivo_entrada` for None.
+        nlp: Modelo spaCy já carregado; se None, é carregado só se houver textos novos.
+        mapa_tickers: Mapa empresa -> ticker; se None, é lido de MAPA_TICKERS_ARQ.
+        arquivo_saida: Base de notícias mapeadas.
+        arquivo_entidades: Base de entidades por notícia.
+        reprocessar: Ignora as entidades gravadas (roda o NER em tudo) e reconstrói a base mapeada.
+        motor: "ner" ou "matcher" (padrão: config.MOTOR_MAPEAMENTO).
+        arquivo_entrada: Base de notícias com sentimento já gravada (ex.: ARQUIVO_ENTRADA).
+
+    Returns:
+        {"mapeadas": DataFrame (só as novas, ou todas se reconstruir), "reconstruir": bool,
+        "entidades": DataFrame (url, chave, data_normalizada, empresas_citadas) a acrescentar,
+        "hash_mapa": str, "motor": str}.
+    """
+    motor = motor or MOTOR_MAPEAMENTO
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de mapeamento desconhecido: {motor}. Válidos: {MOTORES}")
+    if mapa_tickers is None:
+        mapa_tickers = carregar_mapa_tickers(MAPA_TICKERS_ARQ)
+    hash_mapa = hash_mapa_tickers(mapa_tickers)
+    estado = _ler_estado(arquivo_entidades)
+    reconstruir = (
+        reprocessar
+        or estado.get("mapa") != hash_mapa
+        or estado.get("motor", "ner") != motor
+        or not existe_base(arquivo_saida)
+        or estado.get("mapeadas") != impressao_dataset(diretorio_dataset(arquivo_saida))
+    )
+
+    if reprocessar:
+        urls_gravadas = set()
+    else:
+        urls_gravadas = set(ler_noticias(arquivo_entidades, ["url"])["url"].tolist())
+    base = _noticias_a_mapear(df, arquivo_entrada, urls_gravadas, reconstruir)
+    chaves = [chave_entidades(t, motor) for t in base["texto_completo"].tolist()]
+    urls = base["url"].tolist() if "url" in base.columns else [None] * len(base)
+    if reconstruir:
+        novas = [i for i, url in enumerate(urls) if url not in urls_gravadas]
+    else:
+        novas = list(range(len(base)))
+
+    # Entidades gravadas (sem texto) só para reaproveitar no NER ou na reconstrução
+    if reprocessar or not (reconstruir or (motor == "ner" and novas)):
+        empresas = {}
+    else:
+        gravadas = ler_noticias(arquivo_entidades, ["chave", "empresas_citadas"])
+        empresas = dict(zip(gravadas["chave"].tolist(), gravadas["empresas_citadas"].tolist())) if not gravadas.empty else {}
+    if motor == "ner":
+        a_extrair = [i for i in range(len(base)) if chaves[i] not in empresas]
+    else:
+        a_extrair = list(range(len(base)))
+    primeira: Dict[str, int] = {}
+    for i in a_extrair:
+        primeira.setdefault(chaves[i], i)
+    logger.info(
+        "Notícias lidas: %d | novas: %d | textos para o %s: %d | %s",
+        len(base), len(novas), motor, len(primeira),
+        "reconstruindo a base mapeada" if reconstruir else "acrescentando à base mapeada",
+    )
+    if primeira:
+        textos = [base.at[i, "texto_completo"] for i in primeira.values()]
+        empresas.update(zip(primeira, extrair_empresas_motor(textos, motor, nlp, mapa_tickers)))
+
+    vistos = set()
+    linhas_entidades = []
+    for i in novas:
+        if (urls[i], chaves[i]) not in vistos:
+            vistos.add((urls[i], chaves[i]))
+            linhas_entidades.append(i)
+    entidades = pd.DataFrame({
+        "url": [urls[i] for i in linhas_entidades],
+        "chave": [chaves[i] for i in linhas_entidades],
+        "data_normalizada": base["data_normalizada"].iloc[linhas_entidades].tolist() if "data_normalizada" in base.columns else None,
+        "empresas_citadas": [list(empresas[chaves[i]]) for i in linhas_entidades],
+    })
+
+    selecionadas = base.copy()
+    selecionadas["empresas_citadas"] = [list(empresas[c]) for c in chaves]
+    return {
+        "mapeadas": _filtrar_mapeadas(selecionadas, mapa_do_motor(mapa_tickers, motor)),
+        "reconstruir": reconstruir,
+        "entidades": entidades,
+        "hash_mapa": hash_mapa,
+        "motor": motor,
+    }
+
+def gravar_mapeamento(
+    resultado: Dict[str, Any],
+    arquivo_saida: str = ARQUIVO_SAIDA,
+    arquivo_entidades: str = ARQUIVO_ENTIDADES,
+) -> None:
+    """
+    Grava o resultado de mapear_incremental: reconstrói ou acrescenta à base mapeada, acrescenta as
+    entidades novas e, por último, o estado (hash do mapa e impressão da base mapeada).
+    """
+    if resultado["reconstruir"]:
+        salvar_noticias(resultado["mapeadas"], arquivo_saida)
+    elif not resultado["mapeadas"].empty:
+        anexar_noticias(resultado["mapeadas"], arquivo_saida)
+    if not resultado["entidades"].empty:
+        anexar_noticias(resultado["entidades"], arquivo_entidades, exportar=False)
+    # Se o processo parar antes daqui, a impressão da base mapeada não bate e a próxima execução reconstrói
+    estado = {
+        "mapa": resultado["hash_mapa"],
+        "motor": resultado["motor"],
+        "mapeadas": impressao_dataset(diretorio_dataset(arquivo_saida)),
+    }
+    caminho = _caminho_estado(arquivo_entidades)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(caminho + ".tmp", caminho)
+
+# --- 3. EXECUÇÃO PRINCIPAL ---
+
+def run_associacao(nlp: Any = None, mapa_tickers: Optional[dict] = None, reprocessar: bool = False) -> bool:
+    """
+    Extrai empresas (NER) das notícias novas, mapeia para tickers, grava as notícias mapeadas e
+    atualiza o sentimento diário.
+
+    Args:
+        nlp: Modelo spaCy já carregado (ex.: pelo servico_recomendacao.py); se None, é carregado
+            só se houver notícias novas.
+        mapa_tickers: Mapa empresa -> ticker já carregado; se None, é lido de MAPA_TICKERS_ARQ.
+        reprocessar: Roda o NER em todas as notícias e reconstrói a base mapeada.
+
+    Returns:
+        True se as notícias mapeadas foram salvas.
+    """
+    # --- PASSO 1: CARREGAR DADOS E MAPA ---
+    if mapa_tickers is None:
+        mapa_tickers = carregar_mapa_tickers(MAPA_TICKERS_ARQ)
+
+    if not existe_base(ARQUIVO_ENTRADA):
+        logger.error("Arquivo de entrada '%s' não encontrado.", ARQUIVO_ENTRADA)
+        return False
+
+    # --- PASSO 2: NER SÓ NAS NOVAS (LIDAS PELA URL) E GRAVAÇÃO ---
+    logger.info("Lendo notícias ainda não mapeadas de '%s'...", ARQUIVO_ENTRADA)
+    try:
+        resultado = mapear_incremental(None, nlp, mapa_tickers, reprocessar=reprocessar, arquivo_entrada=ARQUIVO_ENTRADA)
+    except Exception as e:
+        logger.exception("Erro ao mapear as notícias de '%s': %s", ARQUIVO_ENTRADA, e)
+        return False
+    gravar_mapeamento(resultado)
+    logger.info("Notícias mapeadas salvas em '%s'. Próximo passo: criar_estrategia.py", ARQUIVO_SAIDA)
+    atualizar_sentimento_diario(ARQUIVO_SAIDA)
+    return True
+
+
+if __name__ == "__main__":
+    if not run_associacao():
+        raise SystemExit(1)
@@ -0,0 +1,173 @@
+"""
+Cache persistente de resultados de sentimento (SQLite).
+A chave é o hash do texto normalizado + nome do modelo FinBERT: a mesma notícia publicada
+em URLs diferentes (republicações, query strings de rastreamento, http/https) não é reclassificada.
+O tamanho do arquivo é limitado com remoção LRU (entradas acessadas há mais tempo saem primeiro).
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import (
+    ARQUIVO_CACHE_SENTIMENTO,
+    CACHE_SENTIMENTO_MAX_MB,
+    FINBERT_MODEL_NAME,
+)
+
+logger = logging.getLogger(__name__)
+
+# Limite de parâmetros por consulta (SQLite antigo aceita no máximo 999)
+_TAMANHO_CONSULTA = 500
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza Unicode (NFKC) e colapsa espaços para que variações triviais gerem a mesma chave."""
+    return _RE_ESPACOS.sub(" ", unicodedata.normalize("NFKC", texto)).strip()
+
+
+def chave_cache(texto: str, model_name: str = FINBERT_MODEL_NAME) -> str:
+    """Retorna o SHA-256 (hex) de nome do modelo + texto normalizado."""
+    conteudo = f"{model_name}\x00{normalizar_texto(texto)}"
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheSentimento:
+    """
+    Cache em disco de {texto -> sentimento, probabilidades}.
+
+    Args:
+        caminho: Arquivo SQLite (padrão: config.ARQUIVO_CACHE_SENTIMENTO).
+        model_name: Modelo que gerou os resultados (faz parte da chave).
+        max_mb: Tamanho máximo aproximado do conteúdo em MB antes da remoção LRU.
+    """
+
+    def __init__(
+        self,
+        caminho: str = ARQUIVO_CACHE_SENTIMENTO,
+        model_name: str = FINBERT_MODEL_NAME,
+        max_mb: float = CACHE_SENTIMENTO_MAX_MB,
+    ) -> None:
+        self.caminho = caminho
+        self.model_name = model_name
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.acertos = 0
+        self.falhas = 0
+        self.removidos = 0
+        self._ultimo_instante = 0.0
+        self._conn = sqlite3.connect(caminho)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " chave TEXT PRIMARY KEY,"
+            " sentimento TEXT NOT NULL,"
+            " probabilidades TEXT,"
+            " tamanho INTEGER NOT NULL,"
+            " ultimo_acesso REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acesso ON resultados (ultimo_acesso)")
+        self._conn.commit()
+
+    def __enter__(self) -> "CacheSentimento":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        """Fecha a conexão com o SQLite."""
+        self._conn.close()
+
+    def _agora(self) -> float:
+        """Instante estritamente crescente (desempata acessos no mesmo tique do relógio)."""
+        self._ultimo_instante = max(time.time(), self._ultimo_instante + 1e-6)
+        return self._ultimo_instante
+
+    def buscar(self, textos: Sequence[Optional[str]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Procura os textos no cache.
+
+        Returns:
+            Dict {índice na entrada: {"sentimento", "probabilidades"}} apenas para os acertos.
+            Textos inválidos (vazios/não-string) não contam como acerto nem falha.
+        """
+        chaves_por_indice = {
+            i: chave_cache(t, self.model_name) for i, t in enumerate(textos) if isinstance(t, str) and t
+        }
+        unicas = list(set(chaves_por_indice.values()))
+        encontrados: Dict[str, Dict[str, Any]] = {}
+        for k in range(0, len(unicas), _TAMANHO_CONSULTA):
+            parte = unicas[k:k + _TAMANHO_CONSULTA]
+            marcadores = ",".join("?" * len(parte))
+            for chave, sentimento, probs in self._conn.execute(
+                f"SELECT chave, sentimento, probabilidades FROM resultados WHERE chave IN ({marcadores})", parte,
+            ):
+                encontrados[chave] = {
+                    "sentimento": sentimento,
+                    "probabilidades": json.loads(probs) if probs else None,
+                }
+        if encontrados:
+            agora = self._agora()
+            self._conn.executemany(
+                "UPDATE resultados SET ultimo_acesso = ? WHERE chave = ?",
+                [(agora, chave) for chave in encontrados],
+            )
+            self._conn.commit()
+
+        resultado = {i: encontrados[c] for i, c in chaves_por_indice.items() if c in encontrados}
+        self.acertos += len(resultado)
+        self.falhas += len(chaves_por_indice) - len(resultado)
+        return resultado
+
+    def salvar(self, textos: Sequence[Optional[str]], resultados: Sequence[Dict[str, Any]]) -> None:
+        """Grava os resultados (mesma ordem dos textos) e aplica o limite de tamanho."""
+        agora = self._agora()
+        linhas = []
+        for texto, res in zip(textos, resultados):
+            if not isinstance(texto, str) or not texto or res.get("probabilidades") is None:
+                continue
+            probs = json.dumps(res["probabilidades"])
+            chave = chave_cache(texto, self.model_name)
+            tamanho = len(chave) + len(res["sentimento"]) + len(probs)
+            linhas.append((chave, res["sentimento"], probs, tamanho, agora))
+        if not linhas:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO resultados (chave, sentimento, probabilidades, tamanho, ultimo_acesso)"
+            " VALUES (?, ?, ?, ?, ?)",
+            linhas,
+        )
+        self._conn.commit()
+        self._aplicar_limite()
+
+    def _aplicar_limite(self) -> None:
+        """Remove as entradas menos recentemente usadas até o total caber em max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        excesso = total - self.max_bytes
+        if excesso <= 0:
+            return
+        remover: List[str] = []
+        for chave, tamanho in self._conn.execute("SELECT chave, tamanho FROM resultados ORDER BY ultimo_acesso"):
+            remover.append(chave)
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        self._conn.executemany("DELETE FROM resultados WHERE chave = ?", [(c,) for c in remover])
+        self._conn.commit()
+        self.removidos += len(remover)
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM resultados").fetchone()[0])
+
+    def registrar_estatisticas(self) -> None:
+        """Loga acertos/falhas acumulados desde a abertura do cache."""
+        consultas = self.acertos + self.falhas
+        taxa = 100.0 * self.acertos / consultas if consultas else 0.0
+        logger.info(
+            "Cache de sentimento: %d acertos, %d falhas (%.1f%% de acerto), %d removidos (LRU), %d entradas.",
+            self.acertos, self.falhas, taxa, self.removidos, len(self),
+        )
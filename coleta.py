@@ -0,0 +1,155 @@
+"""
+Coleta das notícias: todos os spiders em um único reator do Twisted, ao mesmo tempo.
+
+Antes cada spider rodava em um `scrapy crawl` próprio, em sequência, e as esperas de
+`DOWNLOAD_DELAY` de cada site se somavam. Aqui um `CrawlerProcess` agenda exame, valor,
+infomoney e bloomberg juntos; como o atraso e a concorrência valem por domínio
+(`DOWNLOAD_SLOTS` e AutoThrottle em financial_scraper/settings.py), a coleta leva perto do
+tempo do site mais lento.
+
+O reator do Twisted não pode ser reiniciado no mesmo processo, então o `CrawlerProcess` roda em
+um processo filho (`spawn`), que devolve as estatísticas por spider: itens, respostas, erros,
+duração e latência de download (média e p95).
+
+Uso:
+  python coleta.py       (todos os spiders de SPIDER_NAMES)
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import ARQUIVO_JSON_NOTICIAS, SCRAPY_PROJECT_DIR, SPIDER_NAMES
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class _EstatisticasSpider:
+    """Latências de download e itens de um spider (ligado aos sinais do crawler)."""
+
+    def __init__(self, saida: Any) -> None:
+        self.saida = saida
+        self.latencias: List[float] = []
+
+    def resposta_recebida(self, response: Any, request: Any, spider: Any) -> None:
+        latencia = request.meta.get("download_latency")
+        if latencia is not None:
+            self.latencias.append(float(latencia))
+
+    def item_coletado(self, item: Any, response: Any, spider: Any) -> None:
+        from itemadapter import ItemAdapter
+        self.saida.write(json.dumps(ItemAdapter(item).asdict(), ensure_ascii=False) + "\n")
+
+    def resumo(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        lat = np.asarray(self.latencias, dtype=float)
+        return {
+            "itens": int(stats.get("item_scraped_count", 0)),
+            "respostas": int(stats.get("downloader/response_count", 0)),
+            "erros": int(stats.get("log_count/ERROR", 0)),
+            "duracao_s": round(float(stats.get("elapsed_time_seconds", 0.0)), 1),
+            "latencia_media_s": round(float(lat.mean()), 3) if lat.size else None,
+            "latencia_p95_s": round(float(np.percentile(lat, 95)), 3) if lat.size else None,
+            "motivo": stats.get("finish_reason"),
+        }
+
+
+def _rodar_crawlers(project_dir: str, spiders: Sequence[str], arquivo_saida: str) -> Dict[str, Dict[str, Any]]:
+    """Roda os spiders em um `CrawlerProcess` (bloqueia até todos terminarem; uma vez por processo)."""
+    from scrapy import signals
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    os.chdir(project_dir)  # get_project_settings procura o scrapy.cfg a partir do diretório atual
+    settings = get_project_settings()
+    # Os feeds de cada crawler abririam o mesmo .jsonl com arquivos separados (linhas podem se
+    # misturar); aqui todos os itens passam por um único arquivo, no thread do reator
+    settings.set("FEEDS", {}, priority="cmdline")
+    processo = CrawlerProcess(settings)
+    coletores: Dict[str, Any] = {}
+    with open(arquivo_saida, "a", encoding="utf-8") as saida:
+        for nome in spiders:
+            crawler = processo.create_crawler(nome)
+            estatisticas = _EstatisticasSpider(saida)
+            # Os sinais guardam referência fraca: `coletores` mantém os objetos vivos
+            crawler.signals.connect(estatisticas.resposta_recebida, signal=signals.response_received)
+            crawler.signals.connect(estatisticas.item_coletado, signal=signals.item_scraped)
+            coletores[nome] = (crawler, estatisticas)
+            processo.crawl(crawler)
+        processo.start()
+    return {nome: est.resumo(crawler.stats.get_stats()) for nome, (crawler, est) in coletores.items()}
+
+
+def _processo_filho(project_dir: str, spiders: List[str], arquivo_saida: str, conexao: Any) -> None:
+    try:
+        conexao.send({"spiders": _rodar_crawlers(project_dir, spiders, arquivo_saida), "erro": None})
+    except (Exception, SystemExit) as e:  # o erro volta para o processo pai
+        conexao.send({"spiders": {}, "erro": f"{type(e).__name__}: {e}"})
+    finally:
+        conexao.close()
+
+
+def executar_coleta(
+    spiders: Sequence[str] = SPIDER_NAMES,
+    project_dir: str = SCRAPY_PROJECT_DIR,
+    arquivo_saida: str = ARQUIVO_JSON_NOTICIAS,
+) -> Dict[str, Any]:
+    """
+    Roda os spiders ao mesmo tempo em um processo filho e acrescenta os itens em `arquivo_saida`.
+
+    Args:
+        spiders: Nomes dos spiders do projeto Scrapy.
+        project_dir: Diretório com o scrapy.cfg.
+        arquivo_saida: JSON Lines de notícias brutas (só acréscimo).
+
+    Returns:
+        {"spiders": {nome: {"itens", "respostas", "erros", "duracao_s", "latencia_media_s",
+        "latencia_p95_s", "motivo"}}, "duracao_s": float, "ok": bool}. `ok` é False se o processo
+        filho falhou ou algum spider não terminou com motivo "finished".
+    """
+    if not os.path.isdir(project_dir):
+        logger.error("Diretório do Scrapy não encontrado: %s", project_dir)
+        return {"spiders": {}, "duracao_s": 0.0, "ok": False}
+
+    inicio = time.perf_counter()
+    contexto = multiprocessing.get_context("spawn")
+    receber, enviar = contexto.Pipe(duplex=False)
+    filho = contexto.Process(
+        target=_processo_filho, args=(project_dir, list(spiders), os.path.abspath(arquivo_saida), enviar),
+    )
+    logger.info("Iniciando spiders em paralelo: %s", ", ".join(spiders))
+    filho.start()
+    enviar.close()
+    try:
+        resultado: Optional[Dict[str, Any]] = receber.recv()
+    except EOFError:
+        resultado = None
+    filho.join()
+    duracao = round(time.perf_counter() - inicio, 1)
+
+    if resultado is None or resultado["erro"]:
+        erro = resultado["erro"] if resultado else f"processo encerrado com código {filho.exitcode}"
+        logger.error("Erro na coleta: %s", erro)
+        return {"spiders": resultado["spiders"] if resultado else {}, "duracao_s": duracao, "ok": False}
+
+    por_spider = resultado["spiders"]
+    for nome, est in por_spider.items():
+        logger.info(
+            "  %-10s %5d itens  %5d respostas  %3d erros  %7.1fs  latência média %s / p95 %s  (%s)",
+            nome, est["itens"], est["respostas"], est["erros"], est["duracao_s"],
+            est["latencia_media_s"], est["latencia_p95_s"], est["motivo"],
+        )
+    logger.info("Coleta concluída em %.1fs.", duracao)
+    return {
+        "spiders": por_spider,
+        "duracao_s": duracao,
+        "ok": all(est["motivo"] == "finished" for est in por_spider.values()),
+    }
+
+
+if __name__ == "__main__":
+    executar_coleta()
@@ -3,7 +3,7 @@ Configurações centralizadas do projeto.
 Usa caminhos relativos à raiz do repositório para portabilidade.
 """
 import os
-from typing import List
+from typing import List, Optional
 
 # Diretório raiz do projeto (onde estão main.py, config.py, etc.)
 BASE_DIR: str = os.path.dirname(os.path.abspath(__file__))
@@ -20,23 +20,79 @@ SPIDER_NAMES: List[str] = [
 ]
 
 # Arquivos de dados (relativos a BASE_DIR)
-ARQUIVO_JSON_NOTICIAS: str = os.path.join(SCRAPY_PROJECT_DIR, "financial_news.json")
+# Notícias brutas do Scrapy em JSON Lines (só acréscimo; lidas em streaming por leitor_noticias.py)
+ARQUIVO_JSON_NOTICIAS: str = os.path.join(SCRAPY_PROJECT_DIR, "financial_news.jsonl")
 ARQUIVO_JSON_SENTIMENTO: str = os.path.join(BASE_DIR, "noticias_com_sentimento.json")
 ARQUIVO_JSON_MAPEADAS: str = os.path.join(BASE_DIR, "noticias_mapeadas.json")
+# As bases de notícias ficam em Parquet (armazenamento.py, `<nome>.parquet/` ao lado do JSON);
+# se True, o JSON inteiro é reexportado a cada escrita (custo proporcional ao histórico). Desligado:
+# o JSON de compatibilidade é exportado sob demanda (python armazenamento.py)
+EXPORTAR_JSON_COMPATIVEL: bool = False
+# Sentimento diário materializado por (dia, ticker, fonte), atualizado de forma incremental (sentimento_diario.py)
+ARQUIVO_SENTIMENTO_DIARIO: str = os.path.join(BASE_DIR, "sentimento_diario.parquet")
 ARQUIVO_MAPEAMENTO_TICKERS: str = os.path.join(BASE_DIR, "mapeamento_tickers.json")
 ARQUIVO_RESULTADOS_BACKTEST: str = os.path.join(BASE_DIR, "resultados_backtest_v1.html")
 ARQUIVO_ULTIMA_RECOMENDACAO: str = os.path.join(BASE_DIR, "ultima_recomendacao.json")
+# Histórico de recomendações por (data, ticker), gerado em lote por recomendacao.gerar_recomendacoes
+ARQUIVO_HISTORICO_RECOMENDACOES: str = os.path.join(BASE_DIR, "historico_recomendacoes.parquet")
 ARQUIVO_ULTIMO_BACKTEST_JSON: str = os.path.join(BASE_DIR, "ultimo_backtest.json")
+# Ranking da varredura de parâmetros da estratégia (varredura_estrategia.py)
+ARQUIVO_VARREDURA_ESTRATEGIA: str = os.path.join(BASE_DIR, "resultados_varredura.csv")
 ARQUIVO_STATUS: str = os.path.join(BASE_DIR, "status.json")
+# Impressão das entradas de cada etapa do orquestrador.py (etapas com entradas inalteradas são puladas)
+ARQUIVO_ESTADO_ORQUESTRADOR: str = os.path.join(BASE_DIR, "orquestrador.estado.json")
 # Modelo treinado para decisão compra/venda/segurar (histórico: sentimento → retorno)
 ARQUIVO_MODELO_DECISAO: str = os.path.join(BASE_DIR, "modelo_decisao.joblib")
 ARQUIVO_CONFIG_MODELO_DECISAO: str = os.path.join(BASE_DIR, "config_modelo_decisao.json")
 # Política de RL (Q-Learning): tabela Q ou parâmetros do agente
 ARQUIVO_POLITICA_RL: str = os.path.join(BASE_DIR, "politica_rl_qlearning.json")
 
+# Cache local de preços diários OHLCV (precos.py): um Parquet por ticker, completado de forma incremental
+DIRETORIO_CACHE_PRECOS: str = os.path.join(BASE_DIR, "cache_precos")
+
 # Modelo de sentimento (FinBERT-PT-BR) — versionamento para reprodutibilidade
 # Ref: Santos (2022) — docs/CITACAO.md
 FINBERT_MODEL_NAME: str = "lucas-leme/FinBERT-PT-BR"
 
+# Inferência em lote (inferencia_sentimento.py): máximo de textos e de tokens (com padding) por lote
+INFERENCIA_MAX_BATCH_SIZE: int = 32
+INFERENCIA_MAX_TOKENS_LOTE: int = 8192
+
+# Cache de sentimento (cache_sentimento.py): SQLite chaveado por hash do texto + modelo
+ARQUIVO_CACHE_SENTIMENTO: str = os.path.join(BASE_DIR, "cache_sentimento.sqlite")
+CACHE_SENTIMENTO_MAX_MB: float = 256.0
+
+# Serviço local (servico_recomendacao.py): FinBERT, spaCy e decisor carregados uma vez por processo
+SERVICO_HOST: str = "127.0.0.1"
+SERVICO_PORTA: int = 8765
+
+# NER em lote (associar_tickers.py): só doc.ents é usado, então os demais componentes do spaCy ficam
+# desligados; textos por lote do nlp.pipe, processos (só a partir de NER_MIN_TEXTOS_PARALELO textos,
+# abaixo disso o custo de iniciar os processos não compensa) e limite de caracteres por texto
+NER_PIPES_DESATIVADOS: List[str] = ["morphologizer", "tagger", "parser", "lemmatizer", "attribute_ruler", "senter"]
+NER_BATCH_SIZE: int = 64
+NER_N_PROCESSOS: int = os.cpu_count() or 1
+NER_MIN_TEXTOS_PARALELO: int = 2000
+NER_MAX_CARACTERES: int = 5000
+NER_MODELO_SPACY: str = "pt_core_news_lg"
+# Motor de reconhecimento de empresas em associar_tickers.py: "ner" (spaCy NER_MODELO_SPACY) ou
+# "matcher" (matcher_empresas.py: dicionário do mapeamento_tickers.json + códigos, sem spaCy)
+MOTOR_MAPEAMENTO: str = "ner"
+# Entidades (empresas_citadas) já extraídas por notícia (url + hash do texto), para o mapeamento
+# incremental de associar_tickers.py: dataset Parquet `entidades_noticias.parquet/` (armazenamento.py,
+# sem JSON de compatibilidade) e estado `entidades_noticias.estado.json` (hash do mapa de tickers)
+ARQUIVO_ENTIDADES_NOTICIAS: str = os.path.join(BASE_DIR, "entidades_noticias.json")
+# Resolução aproximada de entidades sem chave exata no mapa (indice_aliases.py): confiança mínima
+# (Jaccard de trigramas dos nomes normalizados) e tamanho mínimo para comparar sem ser por igualdade
+ALIAS_APROXIMADO_ATIVO: bool = True
+ALIAS_LIMIAR_CONFIANCA: float = 0.6
+ALIAS_MIN_CARACTERES: int = 4
+# Relatório das entidades mais frequentes ainda sem ticker (curadoria de lista_empresas_para_mapear.txt)
+ARQUIVO_ENTIDADES_NAO_RESOLVIDAS: str = os.path.join(BASE_DIR, "entidades_nao_resolvidas.csv")
+
+# Fuso em que timestamps Unix das notícias viram data/hora local (datas.py), ex. "America/Sao_Paulo";
+# None usa o fuso da máquina
+FUSO_HORARIO_NOTICIAS: Optional[str] = None
+
 # Seeds para reprodutibilidade (numpy, torch)
 RANDOM_SEED: int = 42
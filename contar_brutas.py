@@ -1,22 +1,14 @@
-import re
-import json
+import os
+
+from config import ARQUIVO_JSON_NOTICIAS
+from leitor_noticias import contar_noticias_brutas
 
 def contar_noticias():
-    try:
-        with open("financial_scraper/financial_news.json", "r", encoding="utf-8") as f:
-            conteudo = f.read()
-        
-        blocos = re.findall(r"(\[.*?\])", conteudo, re.DOTALL)
-        total = 0
-        for bloco in blocos:
-            try:
-                noticias = json.loads(bloco)
-                total += len(noticias)
-            except json.JSONDecodeError:
-                continue
-        print(f"Total de notícias no financial_news.json: {total}")
-    except FileNotFoundError:
+    if not os.path.exists(ARQUIVO_JSON_NOTICIAS):
         print("Arquivo não encontrado.")
+        return
+    total = contar_noticias_brutas(ARQUIVO_JSON_NOTICIAS)
+    print(f"Total de notícias em {os.path.basename(ARQUIVO_JSON_NOTICIAS)}: {total}")
 
 if __name__ == "__main__":
     contar_noticias()
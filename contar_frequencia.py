@@ -76,12 +76,18 @@ import os
 from datetime import datetime
 from collections import Counter
 
+from armazenamento import diretorio_dataset, exportar_json
+
 # Caminhos dos arquivos
 ARQUIVO_ENTRADA = 'noticias_mapeadas.json'
 ARQUIVO_SAIDA = 'analise_frequencia.json'
 ARQUIVO_MAPA = 'mapeamento_tickers.json'  # Adicionamos o mapa aqui!
 
 def processar_frequencia():
+    # A base fica em Parquet; o JSON lido abaixo é exportado sob demanda
+    if os.path.isdir(diretorio_dataset(ARQUIVO_ENTRADA)):
+        exportar_json(ARQUIVO_ENTRADA)
+
     if not os.path.exists(ARQUIVO_ENTRADA):
         print(f"Erro: O arquivo {ARQUIVO_ENTRADA} não foi encontrado.")
         return
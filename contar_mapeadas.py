@@ -1,9 +1,15 @@
 import json
 import os
 
+from armazenamento import diretorio_dataset, exportar_json
+
 def contar_noticias_mapeadas():
     arquivo = "noticias_mapeadas.json"
-    
+
+    # A base fica em Parquet; o JSON lido abaixo é exportado sob demanda
+    if os.path.isdir(diretorio_dataset(arquivo)):
+        exportar_json(arquivo)
+
     if not os.path.exists(arquivo):
         print(f"O arquivo {arquivo} não foi encontrado.")
         return
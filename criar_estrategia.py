@@ -11,8 +11,10 @@ from datetime import datetime
 
 import pandas as pd
 import vectorbt as vbt
-import yfinance as yf
 
+from sentimento_diario import carregar_sentimento_diario
+from precos import get_prices
+from registro_modelos import carregar_modelo_decisao, carregar_politica_rl
 from config import (
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_RESULTADOS_BACKTEST,
@@ -37,35 +39,19 @@ UMBRAL_PROB_VENDA = 0.4
 
 # --- 2. CARREGAR E PROCESSAR DADOS DE SENTIMENTO ---
 
-logger.info("Carregando notícias de '%s'...", ARQUIVO_NOTICIAS)
+logger.info("Carregando sentimento diário de '%s'...", ARQUIVO_NOTICIAS)
+
+# 2.1 a 2.4. Score (POSITIVE=1, NEGATIVE=-1, NEUTRAL=0) somado por dia e por ticker.
+# A tabela materializada (sentimento_diario.py) só recalcula os dias com notícias novas.
+# Ex: PETR4 em 2025-10-28 teve 2 POS e 1 NEG = Score +1
 try:
-    df_noticias = pd.read_json(ARQUIVO_NOTICIAS)
+    df_sentimento_diario = carregar_sentimento_diario(ARQUIVO_NOTICIAS)
 except Exception as e:
     logger.exception("Erro ao ler '%s': %s", ARQUIVO_NOTICIAS, e)
     raise SystemExit(1)
 
 logger.info("Processando e agregando sinais de sentimento...")
 
-# 2.1. Mapear sentimento (texto) para score (número)
-sentimento_map = {'POSITIVE': 1, 'NEGATIVE': -1, 'NEUTRAL': 0}
-df_noticias['score'] = df_noticias['sentimento_previsto'].map(sentimento_map).fillna(0)
-
-# 2.2. Garantir que a data está no formato correto (datetime)
-# Usamos a data normalizada que você já criou
-df_noticias['data'] = pd.to_datetime(df_noticias['data_normalizada'])
-
-# 2.3. "Explodir" o DataFrame
-# Se uma notícia tem 2 tickers [A, B], ela vira duas linhas: (Notícia1, A) e (Notícia1, B)
-df_exploded = df_noticias.explode('tickers_citados')
-
-# 2.4. Agregar sentimento por dia e por ticker
-# Agrupamos por data (diário) e pelo ticker, e SOMAMOS os scores.
-# Ex: PETR4 em 2025-10-28 teve 2 POS e 1 NEG = Score +1
-df_sentimento_diario = df_exploded.groupby([
-    pd.Grouper(key='data', freq='D'), 
-    'tickers_citados'
-])['score'].sum().reset_index()
-
 # 2.5. Pivotar para o formato "Wide"
 # O VectorBT precisa de um DataFrame onde:
 # - Índice = Data
@@ -73,8 +59,8 @@ df_sentimento_diario = df_exploded.groupby([
 # - Valores = Score de Sentimento
 df_sentimento_pivot = df_sentimento_diario.pivot(
     index='data', 
-    columns='tickers_citados', 
-    values='score'
+    columns='ticker', 
+    values='sentimento'
 ).fillna(0)
 
 # --- 3. OBTER DADOS DE PREÇO (MERCADO) ---
@@ -86,11 +72,11 @@ tickers_unicos = list(df_sentimento_pivot.columns)
 start_date = df_sentimento_pivot.index.min()
 end_date = df_sentimento_pivot.index.max() 
 
-logger.info("Baixando dados de preço para %d tickers. Período: %s até %s", len(tickers_unicos), start_date.date(), end_date.date())
+logger.info("Obtendo dados de preço para %d tickers. Período: %s até %s", len(tickers_unicos), start_date.date(), end_date.date())
 
-# Baixa os preços de FECHAMENTO ('Close') para todos os tickers
-# O 'yf.download' já nos dá o formato "Wide" que precisamos
-precos = yf.download(tickers_unicos, start=start_date, end=end_date, repair=True)['Close']
+# Preços de FECHAMENTO ('Close') para todos os tickers, da base local (só baixa o que falta)
+# O get_prices já nos dá o formato "Wide" que precisamos
+precos = get_prices(tickers_unicos, start_date, end_date, 'Close')
 
 # --- 4. ALINHAR DADOS E DEFINIR ESTRATÉGIA ---
 
@@ -108,64 +94,46 @@ sinais = sinais.ffill() # Preenche "buracos" no sentimento (fins de semana)
 sinais_atrasados = sinais.shift(1).fillna(0)
 
 # 4.3. Gerar ordens (Entries/Exits) por IA (modelo ou RL) quando disponível
+# Vetorizado: a matriz (datas x tickers) é avaliada de uma vez (tabela de ações do RL
+# ou uma única chamada de predict_proba), sem loop por célula.
 def _sinais_por_ia(sinais_df: pd.DataFrame) -> tuple:
     """Se houver modelo ou RL, gera entries/exits por IA; senão fallback por limiares."""
     import numpy as np
+    valores = sinais_df.to_numpy(dtype=np.float64)
+    validos = ~np.isnan(valores)
+
+    def _quadro(mascara):
+        return pd.DataFrame(mascara & validos, index=sinais_df.index, columns=sinais_df.columns)
+
     # Tentar RL primeiro
     if os.path.exists(ARQUIVO_POLITICA_RL):
         try:
-            from rl_agente import carregar_politica, acao_rl, ACAO_COMPRAR, ACAO_VENDER
-            pol = carregar_politica()
+            from rl_agente import acoes_rl, ACAO_COMPRAR, ACAO_VENDER
+            pol = carregar_politica_rl(ARQUIVO_POLITICA_RL)
             if pol:
-                entries = pd.DataFrame(False, index=sinais_df.index, columns=sinais_df.columns)
-                exits = pd.DataFrame(False, index=sinais_df.index, columns=sinais_df.columns)
-                for i in range(len(sinais_df.index)):
-                    for c in sinais_df.columns:
-                        sc = sinais_df.iloc[i][c]
-                        if pd.isna(sc):
-                            continue
-                        a = acao_rl(float(sc), pol)
-                        idx = sinais_df.index[i]
-                        if a == ACAO_COMPRAR:
-                            entries.loc[idx, c] = True
-                        elif a == ACAO_VENDER:
-                            exits.loc[idx, c] = True
-                entries = entries.astype(bool)
-                exits = exits.astype(bool)
+                acoes = acoes_rl(np.where(validos, valores, 0.0), pol)
                 logger.info("Backtest usando agente RL (Q-Learning).")
-                return entries, exits
+                return _quadro(acoes == ACAO_COMPRAR), _quadro(acoes == ACAO_VENDER)
         except Exception as e:
             logger.debug("RL não usado no backtest: %s", e)
     # Tentar modelo (Random Forest / Logistic)
     if os.path.exists(ARQUIVO_MODELO_DECISAO):
         try:
-            import joblib
-            obj = joblib.load(ARQUIVO_MODELO_DECISAO)
-            model, scaler = obj["model"], obj["scaler"]
-            entries = pd.DataFrame(False, index=sinais_df.index, columns=sinais_df.columns)
-            exits = pd.DataFrame(False, index=sinais_df.index, columns=sinais_df.columns)
-            for i in range(len(sinais_df.index)):
-                for c in sinais_df.columns:
-                    sc = sinais_df.iloc[i][c]
-                    if pd.isna(sc):
-                        continue
-                    X = np.array([[float(sc)]], dtype=np.float64)
-                    X_s = scaler.transform(X)
-                    idx = sinais_df.index[i]
-                    if hasattr(model, "predict_proba"):
-                        prob = model.predict_proba(X_s)[0, 1]
-                        if prob >= UMBRAL_PROB_COMPRA:
-                            entries.loc[idx, c] = True
-                        elif prob <= UMBRAL_PROB_VENDA:
-                            exits.loc[idx, c] = True
-                    else:
-                        pred = model.predict(X_s)[0]
-                        if pred == 1:
-                            entries.loc[idx, c] = True
-                        else:
-                            exits.loc[idx, c] = True
+            model, scaler = carregar_modelo_decisao(ARQUIVO_MODELO_DECISAO)
+            entries_arr = np.zeros(valores.shape, dtype=bool)
+            exits_arr = np.zeros(valores.shape, dtype=bool)
+            if validos.any():
+                X_s = scaler.transform(valores[validos].reshape(-1, 1))
+                if hasattr(model, "predict_proba"):
+                    prob = model.predict_proba(X_s)[:, 1]
+                    entries_arr[validos] = prob >= UMBRAL_PROB_COMPRA
+                    exits_arr[validos] = (prob < UMBRAL_PROB_COMPRA) & (prob <= UMBRAL_PROB_VENDA)
+                else:
+                    pred = model.predict(X_s)
+                    entries_arr[validos] = pred == 1
+                    exits_arr[validos] = pred != 1
             logger.info("Backtest usando modelo treinado (Random Forest/Logistic).")
-            return entries, exits
+            return _quadro(entries_arr), _quadro(exits_arr)
         except Exception as e:
             logger.debug("Modelo não usado no backtest: %s", e)
     # Fallback: limiares (apenas para o backtest rodar sem modelo/RL)
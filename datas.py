@@ -0,0 +1,249 @@
+"""
+Normalização das datas das notícias para ISO 8601, sem o dateparser no caminho comum.
+
+Formatos de cada site (reconhecidos pelo formato, que não se confundem entre si):
+  Exame            "21 de outubro de 2025", "1712750000000"
+  Valor/InfoMoney  "2026-04-01T05:03:35.388-03:00", "1774999712612"
+  Bloomberg Línea  "02 de Março, 2026 | 06:53 AM", "1776962421580"
+  outros           "21/10/2025 14:30", ISO sem fuso
+Timestamps Unix (10 dígitos em segundos, 13 em milissegundos) viram a hora local, sem fuso (no fuso da
+máquina, ou em FUSO_HORARIO_NOTICIAS se definido); ISO mantém o fuso do texto; datas por extenso e dd/mm/aaaa saem sem fuso
+("2025-10-21T00:00:00"). Só o que não casa com nenhum formato vai para o dateparser (contado em
+`estatisticas_datas`).
+
+`normalizar_datas` trata uma coluna inteira: cada valor distinto é classificado uma vez por regex e cada
+formato é convertido de uma vez (`pd.to_datetime` com os campos já extraídos). `normalizar_data` trata
+um valor só, com cache dos textos já vistos.
+"""
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from config import FUSO_HORARIO_NOTICIAS
+
+logger = logging.getLogger(__name__)
+
+_RE_EPOCH = re.compile(r"\d{10}(?:\d{3})?")
+# Fuso só depois da hora ("2025-10-21Z" não é aceito pelo datetime.fromisoformat)
+_RE_ISO = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?")
+_RE_EXTENSO = re.compile(
+    r"(?P<dia>\d{1,2})\s+de\s+(?P<mes>[a-zç]+)\.?(?:\s+de|,)?\s+(?P<ano>\d{4})"
+    r"(?:\s*(?:\||,|-|às)?\s*(?P<hora>\d{1,2})[:h](?P<minuto>\d{2})(?:\s*(?P<ampm>[ap]m))?)?",
+    re.IGNORECASE,
+)
+_RE_NUMERICA = re.compile(
+    r"(?P<dia>\d{1,2})/(?P<mes>\d{1,2})/(?P<ano>\d{4})(?:\s+(?:às\s+)?(?P<hora>\d{1,2})[:h](?P<minuto>\d{2}))?",
+    re.IGNORECASE,
+)
+_MESES = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+_MESES.update({nome[:3]: numero for nome, numero in _MESES.items()})
+# Timestamps fora de 2000-01-01 .. 2050-01-01 não são datas de notícia
+_EPOCH_MIN_S, _EPOCH_MAX_S = 946684800, 2524608000
+_VAZIOS = ("", "nan", "none", "nat", "null")
+
+_ESTATISTICAS: Counter = Counter()
+
+
+def estatisticas_datas() -> Dict[str, int]:
+    """Contadores do processo: datas enviadas ao dateparser e datas que nenhum parser entendeu."""
+    return {"dateparser": _ESTATISTICAS["dateparser"], "falhas": _ESTATISTICAS["falhas"]}
+
+
+def _hora_24(hora: int, ampm: Optional[str]) -> int:
+    if ampm:
+        return hora % 12 + (12 if ampm.lower() == "pm" else 0)
+    return hora
+
+
+def _iso(texto: str) -> Optional[str]:
+    try:
+        return datetime.fromisoformat(texto).isoformat()
+    except ValueError:
+        return None
+
+
+def _dateparser(texto: str) -> Optional[str]:
+    """Último recurso para formatos desconhecidos (lento; cada chamada é contada)."""
+    _ESTATISTICAS["dateparser"] += 1
+    try:
+        import dateparser
+    except ImportError:
+        logger.warning("dateparser não instalado: data '%s' não reconhecida.", texto)
+        return None
+    try:
+        data = dateparser.parse(texto.replace("|", " "), languages=["pt", "en"])
+    except Exception:
+        return None
+    return data.isoformat() if data else None
+
+
+@lru_cache(maxsize=65536)
+def _normalizar_texto(texto: str) -> Optional[str]:
+    if _RE_EPOCH.fullmatch(texto):
+        segundos = int(texto) / (1000 if len(texto) == 13 else 1)
+        if not _EPOCH_MIN_S < segundos < _EPOCH_MAX_S:
+            resultado = None
+        else:
+            fuso = ZoneInfo(FUSO_HORARIO_NOTICIAS) if FUSO_HORARIO_NOTICIAS else None
+            resultado = datetime.fromtimestamp(segundos, fuso).replace(tzinfo=None).isoformat()
+    elif _RE_ISO.fullmatch(texto):
+        resultado = _iso(texto)
+    elif (m := _RE_EXTENSO.fullmatch(texto) or _RE_NUMERICA.fullmatch(texto)) is not None:
+        mes = m["mes"] if m["mes"].isdigit() else _MESES.get(m["mes"].lower())
+        try:
+            data = datetime(
+                int(m["ano"]), int(mes or 0), int(m["dia"]),
+                _hora_24(int(m["hora"] or 0), m.groupdict().get("ampm")), int(m["minuto"] or 0),
+            )
+            resultado = data.isoformat()
+        except ValueError:
+            resultado = None
+    else:
+        resultado = _dateparser(texto)
+    if resultado is None:
+        _ESTATISTICAS["falhas"] += 1
+    return resultado
+
+
+def normalizar_data(valor: Any) -> Optional[str]:
+    """
+    Data de uma notícia em ISO 8601 (None se vazia ou não reconhecida).
+
+    Args:
+        valor: Texto ou número da data, no formato de qualquer site coletado.
+    """
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor).strip()
+    if texto.lower() in _VAZIOS:
+        return None
+    return _normalizar_texto(texto)
+
+
+def _epochs_para_iso(textos: pd.Series) -> pd.Series:
+    """Timestamps de 10/13 dígitos → hora local em ISO, sem fuso; None fora do intervalo."""
+    ms = textos.astype("int64") * np.where(textos.str.len() == 10, 1000, 1)
+    valido = (ms > _EPOCH_MIN_S * 1000) & (ms < _EPOCH_MAX_S * 1000)
+    resultado = pd.Series(None, index=textos.index, dtype=object)
+    if valido.any():
+        ms = ms[valido]
+        if FUSO_HORARIO_NOTICIAS:
+            datas = pd.to_datetime(ms, unit="ms", utc=True).dt.tz_convert(FUSO_HORARIO_NOTICIAS).dt.tz_localize(None)
+        else:
+            datas = pd.to_datetime(ms + _deslocamento_local_ms(ms.to_numpy()), unit="ms")
+        micros = datas.dt.microsecond.to_numpy()
+        # Como datetime.isoformat: fração de segundo só quando diferente de zero
+        fracao = np.where(micros > 0, np.char.add(".", np.char.zfill(micros.astype(str), 6)), "")
+        resultado[valido] = np.char.add(_iso_segundos(datas), fracao)
+    return resultado
+
+
+def _deslocamento_segundo(segundo: int) -> int:
+    """Hora local da máquina menos UTC (ms) no instante `segundo`, como em datetime.fromtimestamp."""
+    local = datetime.fromtimestamp(segundo)
+    return (local - datetime.fromtimestamp(segundo, timezone.utc).replace(tzinfo=None)) // pd.Timedelta(milliseconds=1)
+
+
+def _deslocamento_local_ms(ms: np.ndarray) -> np.ndarray:
+    """
+    Deslocamento da hora local para UTC (ms) de cada timestamp. É calculado no início e no fim de cada
+    dia (UTC) distinto; só nos dias de mudança de horário de verão, hora a hora (as mudanças caem em
+    horas cheias).
+    """
+    dias, pos_dia = np.unique(ms // 86_400_000, return_inverse=True)
+    inicio = np.array([_deslocamento_segundo(d * 86400) for d in dias.tolist()], dtype="int64")
+    fim = np.array([_deslocamento_segundo(d * 86400 + 86399) for d in dias.tolist()], dtype="int64")
+    desloc = inicio[pos_dia]
+    mudanca = (inicio != fim)[pos_dia]
+    if mudanca.any():
+        horas, pos_hora = np.unique(ms[mudanca] // 3_600_000, return_inverse=True)
+        desloc[mudanca] = np.array([_deslocamento_segundo(h * 3600) for h in horas.tolist()], dtype="int64")[pos_hora]
+    return desloc
+
+
+def _iso_segundos(datas: pd.Series) -> np.ndarray:
+    """Datas sem fuso → "AAAA-MM-DDTHH:MM:SS" (formatação do NumPy, bem mais rápida que strftime)."""
+    return np.datetime_as_string(datas.to_numpy(dtype="datetime64[s]"), unit="s")
+
+
+def _campos_para_iso(campos: pd.DataFrame) -> pd.Series:
+    """Colunas extraídas (dia, mes, ano, hora, minuto, ampm) → ISO sem fuso; None para datas inválidas."""
+    mes = campos["mes"].str.lower().map(_MESES).fillna(pd.to_numeric(campos["mes"], errors="coerce"))
+    hora = pd.to_numeric(campos["hora"], errors="coerce").fillna(0).astype(int)
+    if "ampm" in campos:
+        ampm = campos["ampm"].str.lower()
+        hora = hora.where(ampm.isna(), hora % 12 + np.where(ampm == "pm", 12, 0))
+    datas = pd.to_datetime(
+        pd.DataFrame({
+            "year": pd.to_numeric(campos["ano"]),
+            "month": mes,
+            "day": pd.to_numeric(campos["dia"]),
+            "hour": hora,
+            "minute": pd.to_numeric(campos["minuto"], errors="coerce").fillna(0),
+        }),
+        errors="coerce",
+    )
+    validas = datas.notna()
+    resultado = pd.Series(None, index=campos.index, dtype=object)
+    resultado[validas] = _iso_segundos(datas[validas])
+    return resultado
+
+
+def normalizar_datas(valores: Iterable[Any]) -> pd.Series:
+    """
+    Normaliza uma coluna de datas para ISO 8601 (None onde vazia ou não reconhecida).
+
+    Args:
+        valores: Datas no formato de qualquer site (Series ou lista, textos ou números).
+
+    Returns:
+        Series de strings ISO (dtype object), com o índice de `valores` se for uma Series.
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(list(valores), dtype=object)
+    # Timestamps lidos como float por causa de NaN na coluna viram inteiros ("1712750000000.0")
+    if pd.api.types.is_float_dtype(serie):
+        serie = serie.astype("Int64")
+    elif serie.dtype == object:
+        serie = serie.map(lambda v: int(v) if isinstance(v, float) and v.is_integer() else v)
+    textos = serie.astype(object).where(serie.notna(), "").astype(str).str.strip()
+    codigos, unicos = pd.factorize(textos)
+    unicos = pd.Series(unicos, dtype=object)
+    resultado = pd.Series(None, index=unicos.index, dtype=object)
+
+    vazio = unicos.str.lower().isin(_VAZIOS)
+    epoch = ~vazio & unicos.str.fullmatch(_RE_EPOCH)
+    iso = ~vazio & ~epoch & unicos.str.fullmatch(_RE_ISO)
+    if epoch.any():
+        resultado[epoch] = _epochs_para_iso(unicos[epoch])
+    if iso.any():
+        resultado[iso] = [_iso(t) for t in unicos[iso]]
+    restantes = ~(vazio | epoch | iso)
+    for regex in (_RE_EXTENSO, _RE_NUMERICA):
+        if not restantes.any():
+            break
+        # Texto inteiro, como no fullmatch de normalizar_data (str.extract sozinho busca em qualquer posição)
+        casou = restantes & unicos.str.fullmatch(regex)
+        if casou.any():
+            resultado[casou] = _campos_para_iso(unicos[casou].str.extract(regex))
+            restantes &= ~casou
+    if restantes.any():
+        resultado[restantes] = [_dateparser(t) for t in unicos[restantes]]
+    falhas = int((~vazio & resultado.isna()).sum())
+    _ESTATISTICAS["falhas"] += falhas
+    if falhas:
+        logger.warning("%d datas distintas não reconhecidas.", falhas)
+
+    valores_iso = resultado.astype(object).where(resultado.notna(), None).to_numpy()
+    return pd.Series(valores_iso[codigos], index=serie.index, dtype=object)
@@ -1,8 +1,8 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import json
 import os
+import sys
 import numpy as np # Importado para checar tipos
 
 # --- ARQUIVOS ---
@@ -12,39 +12,32 @@ ARQUIVO_SAIDA_PRECOS = "../dados_historicos_acoes.json"
 '''
 # Pega o caminho absoluto da pasta raiz do projeto de forma automática
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from armazenamento import ler_noticias, salvar_noticias
+from precos import CAMPOS_OHLCV, get_prices
 
 ARQUIVO_NOTICIAS = os.path.join(BASE_DIR, "noticias_mapeadas.json")
 ARQUIVO_SAIDA_PRECOS = os.path.join(BASE_DIR, "dados_historicos_acoes.json")
 
 def fetch_stock_data(tickers, start_date, end_date):
     """
-    Busca dados históricos para uma lista de tickers.
-    'tickers' deve ser uma lista de strings.
+    Busca dados históricos (OHLCV) para uma lista de tickers na base local de preços.
+    'tickers' deve ser uma lista de strings. Só o período ausente do cache é baixado.
+    Retorna colunas MultiIndex (Ticker, Campo), como o yf.download com group_by='ticker'.
     """
     if not tickers:
         print("Nenhum ticker fornecido para busca.")
         return None
         
-    # Converte a lista de tickers em uma string separada por espaços (formato do yfinance)
-    tickers_str = " ".join(tickers)
-    
     print(f"Buscando dados para {len(tickers)} tickers de {start_date} até {end_date}...")
     
     try:
-        # group_by='ticker' é útil se um ticker falhar, os outros continuam
-        # progress=False reduz ruido no log
-        data = yf.download(
-            tickers_str,
-            start=start_date,
-            end=end_date,
-            interval="1d",
-            group_by="ticker",
-            progress=False,
-            threads=True,
-        )
-        return data
+        data = get_prices(tickers, start_date, end_date, list(CAMPOS_OHLCV))
+        return data.swaplevel(axis=1).sort_index(axis=1)
     except Exception as e:
-        print(f"Erro ao baixar dados: {e}")
+        print(f"Erro ao obter dados: {e}")
         return None
 
 # --- NOVA FUNÇÃO ---
@@ -120,7 +113,7 @@ if __name__ == "__main__":
     # --- 1. LER O ARQUIVO DE NOTÍCIAS MAPEADAS ---
     print(f"Lendo notícias de '{ARQUIVO_NOTICIAS}' para encontrar tickers...")
     try:
-        df_noticias = pd.read_json(ARQUIVO_NOTICIAS)
+        df_noticias = ler_noticias(ARQUIVO_NOTICIAS)
     except FileNotFoundError:
         print(f"ERRO: Arquivo '{ARQUIVO_NOTICIAS}' não encontrado.")
         print("Certifique-se de que 'associar_tickers.py' foi executado com sucesso.")
@@ -177,7 +170,7 @@ if __name__ == "__main__":
     # Data de início: A data mais antiga (menos 1 dia por segurança)
     data_inicio_busca = data_mais_antiga - timedelta(days=1)
     
-    # Data de fim: O dia de "hoje" (adicionamos 1 dia pois o yfinance não inclui o 'end_date')
+    # Data de fim: O dia de "hoje" (adicionamos 1 dia pois o 'end_date' não é incluído)
     data_fim_busca = datetime.now() + timedelta(days=1)
     
     # Formata as datas para string no formato YYYY-MM-DD
@@ -191,7 +184,7 @@ if __name__ == "__main__":
         print("Não foi possível baixar os dados históricos. Encerrando.")
         exit()
         
-    print("\nDados baixados com sucesso.")
+    print("\nDados obtidos com sucesso.")
 
     # --- 5. PROCESSAR E SALVAR OS DADOS DE PREÇO (PARA BACKTEST) ---
     
@@ -199,81 +192,15 @@ if __name__ == "__main__":
     # Com group_by='ticker', as colunas são um MultiIndex (Ticker, PriceType)
     # Ex: ('PETR4.SA', 'Open'), ('PETR4.SA', 'Close'), ('VALE3.SA', 'Open'), ...
     
-    dados_fechamento = None
-    
-    def _baixar_close_individual(ticker: str) -> pd.Series | None:
-        """
-        Baixa apenas o 'Close' para um ticker, para fallback quando o lote falha.
-        Retorna uma Series com índice datetime e nome = ticker.
-        """
-        try:
-            df_retry = yf.download(
-                ticker,
-                start=start_str,
-                end=end_str,
-                interval="1d",
-                group_by="ticker",
-                progress=False,
-                threads=False,
-            )
-            if df_retry is None or df_retry.empty:
-                return None
-
-            if isinstance(df_retry.columns, pd.MultiIndex):
-                # MultiIndex => (ticker, campo). Extrai o Close.
-                close_df = df_retry.xs("Close", level=1, axis=1)
-                if close_df.shape[1] == 1:
-                    s = close_df.iloc[:, 0]
-                    s.name = ticker
-                    return s
-                return None
-
-            if "Close" not in df_retry.columns:
-                return None
-            s = df_retry["Close"]
-            s.name = ticker
-            return s
-        except Exception:
-            return None
-
+    # A base de preços já repete individualmente os tickers que falham no lote;
+    # tickers sem nenhum dado aparecem como colunas só com NaN e são descartados aqui.
     try:
-        if isinstance(dados_historicos_raw.columns, pd.MultiIndex):
-            # Caso 1: Múltiplos tickers baixados com sucesso. Colunas = MultiIndex (e.g., ('PETR4.SA', 'Close'))
-            # O group_by='ticker' faz o Ticker ser o level 0.
-            print("Múltiplos tickers detectados (MultiIndex). Extraindo 'Close' (Nível 1)...")
-            dados_fechamento = dados_historicos_raw.xs("Close", level=1, axis=1)
-
-            # --- RETRY: tickers ausentes no lote ---
-            tickers_encontrados = set(dados_fechamento.columns)
-            tickers_falharam = sorted(list(set(tickers_unicos) - tickers_encontrados))
-            if tickers_falharam:
-                print(f"Retry para {len(tickers_falharam)} tickers que falharam no lote...")
-                for t in tickers_falharam:
-                    s = _baixar_close_individual(t)
-                    if s is None or s.empty:
-                        continue
-                    # Junta no DF final (alinha pelos índices de datas)
-                    dados_fechamento[t] = s
-
-        else:
-            # Caso 2: Apenas um ticker baixado com sucesso. Colunas = ['Open', 'High', 'Low', 'Close']
-            print("Ticker único detectado (SingleIndex). Extraindo 'Close'.")
-            if "Close" in dados_historicos_raw.columns:
-                dados_fechamento = dados_historicos_raw[["Close"]] # DataFrame
-                # Se vier um único ticker, tenta nomear.
-                if len(tickers_unicos) == 1:
-                    ticker_name = list(tickers_unicos)[0]
-                    dados_fechamento.columns = [ticker_name]
-                    print(f"Ticker único nomeado como: {ticker_name}")
-                else:
-                    print("Aviso: SingleIndex com múltiplos tickers esperados. Mantendo coluna 'Close'.")
-            else:
-                print("Erro: SingleIndex retornado, mas sem coluna 'Close'.")
-                dados_fechamento = pd.DataFrame() # Vazio
-
+        dados_fechamento = dados_historicos_raw.xs("Close", level=1, axis=1).dropna(axis=1, how='all')
+        tickers_sem_dados = sorted(set(tickers_unicos) - set(dados_fechamento.columns))
+        if tickers_sem_dados:
+            print(f"Aviso: {len(tickers_sem_dados)} tickers sem dados de preço: {tickers_sem_dados}")
     except Exception as e:
-        print(f"ERRO CRÍTICO ao processar estrutura de dados do yfinance: {e}")
-        print("É provável que a estrutura de dados tenha mudado.")
+        print(f"ERRO CRÍTICO ao processar estrutura de dados de preços: {e}")
         dados_fechamento = pd.DataFrame() # Vazio
 
     # Remove linhas que só contêm NaN (dias sem negociação para todos)
@@ -323,15 +250,9 @@ if __name__ == "__main__":
 
     print("Preços adicionados. Salvando arquivo de notícias atualizado...")
     
-    # Salva o df_noticias MODIFICADO de volta ao arquivo original
-    # Usamos 'date_format='iso'' para manter as datas padronizadas
-    df_noticias.to_json(
-        ARQUIVO_NOTICIAS,
-        orient='records',
-        indent=4,
-        force_ascii=False,
-        date_format='iso' 
-    )
+    # Salva o df_noticias MODIFICADO de volta (dataset Parquet + JSON de compatibilidade)
+    # As datas são gravadas em ISO, como antes
+    salvar_noticias(df_noticias, ARQUIVO_NOTICIAS)
 
     print("\nSucesso!")
     print(f"OK: O arquivo '{ARQUIVO_NOTICIAS}' foi ATUALIZADO com os precos do dia.")
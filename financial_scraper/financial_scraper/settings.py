@@ -5,8 +5,28 @@ NEWSPIDER_MODULE = "financial_scraper.spiders"
 ROBOTSTXT_OBEY = False
 DOWNLOAD_DELAY = 1
 
+# Concorrência e atraso valem por domínio: com os spiders no mesmo processo (coleta.py), as esperas
+# de um site não atrasam os outros. DOWNLOAD_SLOTS (Scrapy >= 2.11) ajusta cada site; em versões
+# anteriores valem os valores globais abaixo.
+CONCURRENT_REQUESTS = 32
+CONCURRENT_REQUESTS_PER_DOMAIN = 4
+DOWNLOAD_SLOTS = {
+    "exame.com": {"concurrency": 4, "delay": 1},
+    "valor.globo.com": {"concurrency": 4, "delay": 1},
+    "www.infomoney.com.br": {"concurrency": 4, "delay": 1},
+    "www.bloomberglinea.com.br": {"concurrency": 2, "delay": 1},
+}
+
+# AutoThrottle ajusta o atraso de cada domínio pela latência observada (DOWNLOAD_DELAY é o mínimo)
+AUTOTHROTTLE_ENABLED = True
+AUTOTHROTTLE_START_DELAY = 1
+AUTOTHROTTLE_MAX_DELAY = 10
+AUTOTHROTTLE_TARGET_CONCURRENCY = 2.0
+
+# JSON Lines em modo acréscimo: cada execução adiciona uma linha por notícia
+# (lido em streaming por leitor_noticias.py, com checkpoint de bytes já consumidos)
 FEEDS = {
-    "financial_news.json": {"format": "json", "encoding": "utf8"}
+    "financial_news.jsonl": {"format": "jsonlines", "encoding": "utf8", "overwrite": False}
 }
 
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
@@ -103,103 +103,133 @@ if __name__ == "__main__":
     CAMINHO_JSON_MAPEADO = "noticias_mapeadas.json"
     
     gerar_matriz_mestra(TICKER_ALVO, CAMINHO_JSON_MAPEADO)"""
-import pandas as pd
-import yfinance as yf
-import json
 import os
+import shutil
+import time
 from datetime import timedelta
 
-# Cria a pasta para organizar as matrizes, se ela não existir
-PASTA_MATRIZES = "matrizes_rl"
-os.makedirs(PASTA_MATRIZES, exist_ok=True)
+import pandas as pd
 
-def extrair_todos_tickers(caminho_json):
-    """Lê o JSON e descobre todos os tickers únicos que temos notícias."""
-    with open(caminho_json, 'r', encoding='utf-8') as f:
-        noticias = json.load(f)
-    
-    tickers_unicos = set()
-    for n in noticias:
-        for t in n.get('tickers_citados', []):
-            tickers_unicos.add(t)
-            
-    return list(tickers_unicos), noticias
-
-def gerar_matriz_mestra(ticker_bolsa, noticias_brutas):
-    print(f"\nProcessando {ticker_bolsa}...")
-
-    # Filtra as notícias específicas deste ticker
-    noticias_empresa = [n for n in noticias_brutas if n.get('tickers_citados') and ticker_bolsa in n['tickers_citados']]
-    df_noticias = pd.DataFrame(noticias_empresa)
-    
-    if df_noticias.empty:
-        print(f"-> Nenhuma notícia válida para {ticker_bolsa}. Pulando.")
-        return
+from armazenamento import ler_noticias
+from precos import get_prices
 
-    df_noticias = df_noticias.dropna(subset=['data_normalizada']).copy()
-    if df_noticias.empty:
-        return
-        
-    df_noticias['data'] = pd.to_datetime(df_noticias['data_normalizada']).dt.tz_localize(None)
+# Colunas da base usadas na matriz (o restante não é carregado do Parquet)
+COLUNAS_NOTICIAS = ['data_normalizada', 'source', 'title', 'sentimento_previsto', 'tickers_citados']
 
-    mapa_sentimento = {'POSITIVE': 1, 'NEUTRAL': 0, 'NEGATIVE': -1}
-    df_noticias['sentimento_valor'] = df_noticias['sentimento_previsto'].map(mapa_sentimento)
-    df_noticias = df_noticias.sort_values('data').reset_index(drop=True)
+# Pasta com um CSV por ticker (lida pelo treinar_agente.py) e dataset Parquet particionado por ticker
+PASTA_MATRIZES = "matrizes_rl"
+DATASET_MATRIZES = "matrizes_rl.parquet"
+
+MAPA_SENTIMENTO = {'POSITIVE': 1, 'NEUTRAL': 0, 'NEGATIVE': -1}
+N_LAGS = 5
+
+COLUNAS_FINAIS = [
+    'data', 'source', 'title', 'sentimento_previsto', 'sentimento_valor',
+    'preco_d', 'preco_d1', 'preco_d2', 'preco_d3', 'preco_d4', 'preco_d5',
+    'var_d1', 'var_d2', 'var_d3', 'var_d4', 'var_d5',
+    'var_acumulada_3d', 'var_acumulada_5d'
+]
+
+
+def carregar_noticias_por_ticker(caminho_json):
+    """
+    Lê a base de notícias uma vez e explode tickers_citados: uma linha por (notícia, ticker),
+    com data (sem fuso) e sentimento_valor. Notícias sem data são descartadas.
+    """
+    df = ler_noticias(caminho_json, COLUNAS_NOTICIAS)
+    if df.empty:
+        return pd.DataFrame(columns=COLUNAS_NOTICIAS + ['ticker', 'data', 'sentimento_valor'])
+    df = df.dropna(subset=['data_normalizada'])
+    df = df.explode('tickers_citados').dropna(subset=['tickers_citados'])
+    df = df.rename(columns={'tickers_citados': 'ticker'})
+    df['data'] = pd.to_datetime(df['data_normalizada']).dt.tz_localize(None)
+    df['sentimento_valor'] = df['sentimento_previsto'].map(MAPA_SENTIMENTO)
+    return df.reset_index(drop=True)
+
+
+def calcular_features_precos(precos_close):
+    """
+    A partir do fechamento em formato wide (índice=Date, colunas=tickers), calcula para todos
+    os tickers de uma vez preco_d1..d5, var_d1..d5 e var_acumulada_3d/5d (lags agrupados por ticker).
+    Retorna formato longo (Date, ticker, preco_d, ...) sem linhas incompletas.
+    """
+    longo = precos_close.rename_axis(index='Date', columns='ticker').stack().rename('preco_d').reset_index()
+    # Dias sem pregão de um ticker não contam como lag (mesmo efeito do dropna por ticker)
+    longo = longo.dropna(subset=['preco_d']).sort_values(['ticker', 'Date']).reset_index(drop=True)
+    grupos = longo.groupby('ticker', sort=False)['preco_d']
+    for i in range(1, N_LAGS + 1):
+        longo[f'preco_d{i}'] = grupos.shift(i)
+    # var_dk = variação entre os preços d(k-1) e dk (preco_d0 = preco_d)
+    for k in range(1, N_LAGS + 1):
+        anterior = longo['preco_d'] if k == 1 else longo[f'preco_d{k - 1}']
+        longo[f'var_d{k}'] = (anterior - longo[f'preco_d{k}']) / longo[f'preco_d{k}']
+    longo['var_acumulada_3d'] = (longo['preco_d'] - longo['preco_d3']) / longo['preco_d3']
+    longo['var_acumulada_5d'] = (longo['preco_d'] - longo['preco_d5']) / longo['preco_d5']
+    return longo.dropna().reset_index(drop=True)
+
+
+def montar_matriz_mestra(df_noticias, df_features):
+    """
+    Associa cada (notícia, ticker) ao primeiro pregão do mesmo ticker na data da notícia ou depois
+    (um único merge_asof agrupado por ticker).
+    """
+    esquerda = df_noticias.sort_values('data', kind='stable')
+    direita = df_features.sort_values('Date', kind='stable')
+    matriz = pd.merge_asof(
+        esquerda, direita, left_on='data', right_on='Date', by='ticker', direction='forward'
+    )
+    colunas = ['ticker'] + [c for c in COLUNAS_FINAIS if c in matriz.columns]
+    return matriz[colunas].sort_values(['ticker', 'data'], kind='stable').reset_index(drop=True)
+
+
+def salvar_matrizes(matriz, exportar_csv=True):
+    """Grava o dataset Parquet particionado por ticker (troca atômica) e, opcionalmente, os CSVs por ticker."""
+    temporario = f"{DATASET_MATRIZES}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    matriz.to_parquet(temporario, partition_cols=['ticker'], index=False)
+    shutil.rmtree(DATASET_MATRIZES, ignore_errors=True)
+    os.replace(temporario, DATASET_MATRIZES)
+    print(f"-> Dataset salvo em {DATASET_MATRIZES} ({len(matriz)} eventos).")
+    if exportar_csv:
+        os.makedirs(PASTA_MATRIZES, exist_ok=True)
+        for ticker, grupo in matriz.groupby('ticker', sort=True):
+            nome_arquivo = os.path.join(PASTA_MATRIZES, f"dataset_rl_{ticker.replace('.SA', '')}.csv")
+            grupo.drop(columns='ticker').to_csv(nome_arquivo, index=False)
+        print(f"-> {matriz['ticker'].nunique()} CSVs salvos em {PASTA_MATRIZES}/.")
+
+
+def gerar_matrizes(caminho_json, exportar_csv=True):
+    """
+    Monta as matrizes mestras de todos os tickers em uma passada: notícias explodidas uma vez,
+    preços de todos os tickers em uma única chamada ao get_prices e features agrupadas por ticker.
+    """
+    inicio = time.perf_counter()
+    df_noticias = carregar_noticias_por_ticker(caminho_json)
+    if df_noticias.empty:
+        print("Nenhuma notícia com data e ticker. Nada a fazer.")
+        return pd.DataFrame(columns=['ticker'] + COLUNAS_FINAIS)
+    tickers = sorted(df_noticias['ticker'].unique())
+    print(f"Encontrados {len(tickers)} ativos diferentes para processar.")
 
     data_inicio = df_noticias['data'].min() - timedelta(days=30)
     data_fim = df_noticias['data'].max() + timedelta(days=5)
-    
-    # Baixa os dados
-    df_bolsa = yf.download(ticker_bolsa, start=data_inicio, end=data_fim, progress=False)
-    if df_bolsa.empty:
-        print(f"-> Erro ao baixar preços de {ticker_bolsa} no yfinance. Pulando.")
-        return
+    # Preços da base local (só baixa o período que ainda não está em cache)
+    precos = get_prices(tickers, data_inicio, data_fim, 'Close')
+    sem_precos = [t for t in tickers if precos[t].isna().all()]
+    if sem_precos:
+        print(f"-> {len(sem_precos)} ativos sem preços (ignorados): {sem_precos}")
+        df_noticias = df_noticias[~df_noticias['ticker'].isin(sem_precos)]
+        if df_noticias.empty:
+            print("Nenhum ativo com preços. Nada a fazer.")
+            return pd.DataFrame(columns=['ticker'] + COLUNAS_FINAIS)
+
+    matriz = montar_matriz_mestra(df_noticias, calcular_features_precos(precos))
+    salvar_matrizes(matriz, exportar_csv=exportar_csv)
+    print(f"Matrizes de {matriz['ticker'].nunique()} ativos geradas em {time.perf_counter() - inicio:.1f}s.")
+    return matriz
 
-    df_bolsa = df_bolsa[['Close']].copy()
-    df_bolsa.columns = ['preco_d']
-    df_bolsa.index = df_bolsa.index.tz_localize(None)
-    
-    # Calcula os lags e variações
-    for i in range(1, 6):
-        df_bolsa[f'preco_d{i}'] = df_bolsa['preco_d'].shift(i)
-
-    df_bolsa['var_d1'] = (df_bolsa['preco_d'] - df_bolsa['preco_d1']) / df_bolsa['preco_d1']
-    df_bolsa['var_d2'] = (df_bolsa['preco_d1'] - df_bolsa['preco_d2']) / df_bolsa['preco_d2']
-    df_bolsa['var_d3'] = (df_bolsa['preco_d2'] - df_bolsa['preco_d3']) / df_bolsa['preco_d3']
-    df_bolsa['var_d4'] = (df_bolsa['preco_d3'] - df_bolsa['preco_d4']) / df_bolsa['preco_d4']
-    df_bolsa['var_d5'] = (df_bolsa['preco_d4'] - df_bolsa['preco_d5']) / df_bolsa['preco_d5']
-    df_bolsa['var_acumulada_3d'] = (df_bolsa['preco_d'] - df_bolsa['preco_d3']) / df_bolsa['preco_d3']
-    df_bolsa['var_acumulada_5d'] = (df_bolsa['preco_d'] - df_bolsa['preco_d5']) / df_bolsa['preco_d5']
-
-    df_bolsa = df_bolsa.dropna().reset_index()
-
-    df_noticias = df_noticias.sort_values('data')
-    df_bolsa = df_bolsa.sort_values('Date')
-    
-    matriz_mestra = pd.merge_asof(
-        df_noticias, df_bolsa, left_on='data', right_on='Date', direction='forward'
-    )
-
-    colunas_finais = [
-        'data', 'source', 'title', 'sentimento_previsto', 'sentimento_valor',
-        'preco_d', 'preco_d1', 'preco_d2', 'preco_d3', 'preco_d4', 'preco_d5',
-        'var_d1', 'var_d2', 'var_d3', 'var_d4', 'var_d5',
-        'var_acumulada_3d', 'var_acumulada_5d'
-    ]
-    
-    colunas_disponiveis = [c for c in colunas_finais if c in matriz_mestra.columns]
-    matriz_mestra = matriz_mestra[colunas_disponiveis]
-
-    # Salva DENTRO da nova pasta
-    nome_arquivo = os.path.join(PASTA_MATRIZES, f"dataset_rl_{ticker_bolsa.replace('.SA', '')}.csv")
-    matriz_mestra.to_csv(nome_arquivo, index=False)
-    print(f"-> Sucesso! Salvo em {nome_arquivo} ({len(matriz_mestra)} eventos).")
 
 if __name__ == "__main__":
     CAMINHO_JSON = "noticias_mapeadas.json"
     print("Mapeando todos os ativos...")
-    tickers, noticias = extrair_todos_tickers(CAMINHO_JSON)
-    print(f"Encontrados {len(tickers)} ativos diferentes para processar.")
-    
-    for ticker in tickers:
-        gerar_matriz_mestra(ticker, noticias)
\ No newline at end of file
+    gerar_matrizes(CAMINHO_JSON)
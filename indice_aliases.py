@@ -0,0 +1,218 @@
+"""
+Índice aproximado de aliases de empresas: resolve entidades que não batem exatamente com uma chave de
+mapeamento_tickers.json ("Petrobras S.A.", "a Vale", "Itaú Unibanco Holding", "Itau Unibancco") para o
+ticker da chave mais parecida, com uma confiança entre 0 e 1.
+
+Cada nome do mapa (e cada código de ticker) é normalizado uma vez — sem acentos, em minúsculas, sem
+pontuação, sem artigos/preposições e sem sufixos societários (S.A., Ltda, Holding...) — e indexado
+por trigramas de caracteres. Uma entidade normalizada igual a um nome tem confiança 1.0; senão, os
+candidatos vêm das listas invertidas dos trigramas dela e a confiança é a similaridade de Jaccard
+dos trigramas (como o pg_trgm). O resultado de cada entidade fica em memória.
+
+Usado por `associar_tickers.mapear_tickers` como alternativa quando a chave exata não existe
+(`ALIAS_APROXIMADO_ATIVO`/`ALIAS_LIMIAR_CONFIANCA` em config.py).
+
+Uso:
+  python indice_aliases.py       (entidades mais frequentes ainda sem ticker → entidades_nao_resolvidas.csv)
+"""
+import logging
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config import (
+    ALIAS_LIMIAR_CONFIANCA,
+    ALIAS_MIN_CARACTERES,
+    ARQUIVO_ENTIDADES_NAO_RESOLVIDAS,
+    ARQUIVO_ENTIDADES_NOTICIAS,
+    ARQUIVO_MAPEAMENTO_TICKERS,
+)
+from matcher_empresas import mapa_com_codigos, normalizar
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+_RE_TOKEN = re.compile(r"\w+")
+_PALAVRAS_VAZIAS = frozenset({"a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "na", "no"})
+# Retirados só do fim do nome ("S.A." vira "s" depois de tirar o artigo "a")
+_SUFIXOS = frozenset({
+    "s", "sa", "ltda", "cia", "holding", "holdings", "participacoes", "inc", "corp", "corporation",
+    "co", "plc", "ag", "nv", "group",
+})
+_PREFIXO_COMENTARIO = "---"
+
+# (alias do mapa, ticker ou None, confiança)
+Resolucao = Tuple[str, Optional[str], float]
+
+
+def normalizar_alias(nome: Optional[str]) -> str:
+    """
+    Forma canônica de um nome de empresa: sem acentos, minúsculas, sem pontuação, sem artigos e
+    preposições e sem sufixos societários no fim ("a Petrobrás S.A." → "petrobras").
+    """
+    if not isinstance(nome, str):
+        return ""
+    tokens = [t for t in _RE_TOKEN.findall(normalizar(nome)) if t not in _PALAVRAS_VAZIAS]
+    fim = len(tokens)
+    while fim > 1 and tokens[fim - 1] in _SUFIXOS:
+        fim -= 1
+    return " ".join(tokens[:fim])
+
+
+def trigramas(nome_normalizado: str) -> frozenset:
+    """Trigramas de caracteres de cada palavra, com duas posições de borda no início e uma no fim."""
+    resultado = set()
+    for palavra in nome_normalizado.split():
+        p = f"  {palavra} "
+        resultado.update(p[i:i + 3] for i in range(len(p) - 2))
+    return frozenset(resultado)
+
+
+class IndiceAliases:
+    """
+    Nomes normalizados do mapa de tickers com listas invertidas de trigramas.
+
+    Args:
+        mapa_tickers: Mapa empresa -> ticker (mapeamento_tickers.json). Nomes com ticker None também
+            entram: uma entidade mais parecida com um deles não recebe ticker.
+        limiar: Confiança mínima para `ticker` aceitar uma resolução aproximada.
+        min_caracteres: Entidades normalizadas mais curtas que isto só resolvem por igualdade
+            (siglas como "BC" e "C6" ficam muito perto umas das outras em trigramas).
+    """
+
+    def __init__(
+        self,
+        mapa_tickers: Dict[str, Optional[str]],
+        limiar: float = ALIAS_LIMIAR_CONFIANCA,
+        min_caracteres: int = ALIAS_MIN_CARACTERES,
+    ) -> None:
+        self.limiar = limiar
+        self.min_caracteres = min_caracteres
+        # Nome normalizado -> (alias original, tickers); nomes que colidem com tickers diferentes são ambíguos
+        por_nome: Dict[str, Tuple[str, set]] = {}
+        for alias, ticker in mapa_com_codigos(mapa_tickers).items():
+            if alias.startswith(_PREFIXO_COMENTARIO):
+                continue
+            nome = normalizar_alias(alias)
+            if nome:
+                por_nome.setdefault(nome, (alias, set()))[1].add(ticker)
+        self._nomes: List[str] = []
+        self._aliases: List[str] = []
+        self._tickers: List[Optional[str]] = []
+        self._trigramas: List[frozenset] = []
+        self._exatos: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for nome, (alias, tickers) in por_nome.items():
+            if len(tickers) > 1:
+                logger.warning("Alias ambíguo ignorado no índice: '%s' → %s", nome, sorted(map(str, tickers)))
+                continue
+            i = len(self._nomes)
+            self._nomes.append(nome)
+            self._aliases.append(alias)
+            self._tickers.append(next(iter(tickers)))
+            self._trigramas.append(trigramas(nome))
+            self._exatos[nome] = i
+            for tg in self._trigramas[i]:
+                self._postings.setdefault(tg, []).append(i)
+        self._memo: Dict[str, Optional[Resolucao]] = {}
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+    def resolver(self, entidade: Optional[str]) -> Optional[Resolucao]:
+        """
+        Nome do mapa mais parecido com a entidade, seja qual for a confiança.
+
+        Returns:
+            (alias do mapa, ticker ou None, confiança) ou None se a entidade for vazia, curta demais
+            para comparação aproximada, sem trigramas em comum ou empatada entre tickers diferentes.
+        """
+        nome = normalizar_alias(entidade)
+        if nome in self._memo:
+            return self._memo[nome]
+        resultado = self._resolver_normalizado(nome)
+        self._memo[nome] = resultado
+        return resultado
+
+    def _resolver_normalizado(self, nome: str) -> Optional[Resolucao]:
+        if not nome:
+            return None
+        i = self._exatos.get(nome)
+        if i is not None:
+            return self._aliases[i], self._tickers[i], 1.0
+        if len(nome.replace(" ", "")) < self.min_caracteres:
+            return None
+        tgs = trigramas(nome)
+        comuns = Counter(j for tg in tgs for j in self._postings.get(tg, ()))
+        if not comuns:
+            return None
+        pontuados = sorted(
+            ((c / (len(tgs) + len(self._trigramas[j]) - c), j) for j, c in comuns.items()),
+            reverse=True,
+        )
+        confianca, melhor = pontuados[0]
+        if any(s == confianca and self._tickers[j] != self._tickers[melhor] for s, j in pontuados[1:]):
+            return None
+        return self._aliases[melhor], self._tickers[melhor], round(confianca, 4)
+
+    def ticker(self, entidade: Optional[str]) -> Optional[str]:
+        """Ticker da entidade se a resolução tiver confiança >= limiar (None caso contrário)."""
+        resolucao = self.resolver(entidade)
+        if resolucao is None or resolucao[2] < self.limiar:
+            return None
+        return resolucao[1]
+
+
+def relatorio_nao_resolvidas(
+    listas_empresas: Iterable[Sequence[str]],
+    mapa_tickers: Dict[str, Optional[str]],
+    top: int = 50,
+    indice: Optional[IndiceAliases] = None,
+) -> pd.DataFrame:
+    """
+    Entidades mais frequentes que não são chave do mapa nem resolvem acima do limiar.
+
+    Args:
+        listas_empresas: empresas_citadas de cada notícia.
+        mapa_tickers: Mapa empresa -> ticker.
+        top: Número de entidades no relatório.
+        indice: Índice já construído (senão é criado a partir de `mapa_tickers`).
+
+    Returns:
+        DataFrame (entidade, frequencia, sugestao, ticker_sugerido, confianca), da mais frequente
+        para a menos; sugestao é o alias mais parecido (abaixo do limiar), para a curadoria de
+        lista_empresas_para_mapear.txt e mapeamento_tickers.json.
+    """
+    indice = indice or IndiceAliases(mapa_tickers)
+    frequencia = Counter(e for empresas in listas_empresas for e in dict.fromkeys(empresas or []))
+    linhas = []
+    for entidade, n in frequencia.most_common():
+        if entidade in mapa_tickers:
+            continue
+        resolucao = indice.resolver(entidade)
+        if resolucao is not None and resolucao[2] >= indice.limiar:
+            continue
+        alias, ticker, confianca = resolucao if resolucao else (None, None, None)
+        linhas.append({"entidade": entidade, "frequencia": n, "sugestao": alias, "ticker_sugerido": ticker, "confianca": confianca})
+        if len(linhas) >= top:
+            break
+    return pd.DataFrame(linhas, columns=["entidade", "frequencia", "sugestao", "ticker_sugerido", "confianca"])
+
+
+if __name__ == "__main__":
+    import json
+
+    from armazenamento import existe_base, ler_noticias
+    from config import ARQUIVO_JSON_MAPEADAS
+
+    with open(ARQUIVO_MAPEAMENTO_TICKERS, "r", encoding="utf-8") as f:
+        mapa = json.load(f)
+    # Entidades de todas as notícias processadas; sem elas, só das já mapeadas
+    origem = ARQUIVO_ENTIDADES_NOTICIAS if existe_base(ARQUIVO_ENTIDADES_NOTICIAS) else ARQUIVO_JSON_MAPEADAS
+    df = ler_noticias(origem, ["empresas_citadas"])
+    relatorio = relatorio_nao_resolvidas(df["empresas_citadas"].tolist(), mapa, top=100)
+    relatorio.to_csv(ARQUIVO_ENTIDADES_NAO_RESOLVIDAS, index=False)
+    logger.info("Notícias: %d (%s) | entidades sem ticker no relatório: %d", len(df), origem, len(relatorio))
+    logger.info("Relatório salvo em %s\n%s", ARQUIVO_ENTIDADES_NAO_RESOLVIDAS, relatorio.head(20).to_string(index=False))
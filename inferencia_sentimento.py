@@ -0,0 +1,140 @@
+"""
+Motor de inferência em lote para o FinBERT-PT-BR.
+Ordena os textos pelo comprimento em tokens, agrupa em lotes com padding dinâmico
+(limite de textos e de tokens por lote) e executa o modelo sob torch.inference_mode.
+Usado por analisar_noticias.py e sentimentprevision/modelo.py.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, BertForSequenceClassification
+
+from config import (
+    FINBERT_MODEL_NAME,
+    INFERENCIA_MAX_BATCH_SIZE,
+    INFERENCIA_MAX_TOKENS_LOTE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Índice da saída do FinBERT-PT-BR -> rótulo (Santos 2022)
+PRED_MAPPER: Dict[int, str] = {0: "POSITIVE", 1: "NEGATIVE", 2: "NEUTRAL"}
+ROTULO_TEXTO_INVALIDO = "TEXTO_INVALIDO"
+
+
+def montar_lotes(
+    comprimentos: Sequence[int],
+    max_batch_size: int = INFERENCIA_MAX_BATCH_SIZE,
+    max_tokens_lote: int = INFERENCIA_MAX_TOKENS_LOTE,
+) -> List[List[int]]:
+    """
+    Agrupa índices de textos em lotes ordenados por comprimento.
+
+    Cada lote respeita o número máximo de textos e o orçamento de tokens
+    (maior comprimento do lote × quantidade de textos, que é o tamanho do tensor após o padding).
+
+    Args:
+        comprimentos: Número de tokens de cada texto.
+        max_batch_size: Máximo de textos por lote.
+        max_tokens_lote: Máximo de tokens (com padding) por lote.
+
+    Returns:
+        Lista de lotes; cada lote é uma lista de índices da entrada original.
+    """
+    ordem = sorted(range(len(comprimentos)), key=lambda i: comprimentos[i])
+    lotes: List[List[int]] = []
+    atual: List[int] = []
+    maior = 0
+    for i in ordem:
+        n = int(comprimentos[i])
+        novo_maior = max(maior, n)
+        if atual and (len(atual) + 1 > max_batch_size or novo_maior * (len(atual) + 1) > max_tokens_lote):
+            lotes.append(atual)
+            atual = []
+            novo_maior = n
+        atual.append(i)
+        maior = novo_maior
+    if atual:
+        lotes.append(atual)
+    return lotes
+
+
+class MotorInferenciaFinBERT:
+    """
+    Classificador de sentimento em lote (FinBERT-PT-BR).
+
+    Args:
+        model_name: Nome do modelo no Hugging Face (padrão: config.FINBERT_MODEL_NAME).
+        max_batch_size: Máximo de textos por lote.
+        max_tokens_lote: Máximo de tokens (com padding) por lote.
+        max_length: Comprimento máximo de cada texto (truncamento).
+        tokenizer: Tokenizer já carregado (opcional; evita recarregar).
+        model: Modelo já carregado (opcional; evita recarregar).
+    """
+
+    def __init__(
+        self,
+        model_name: str = FINBERT_MODEL_NAME,
+        max_batch_size: int = INFERENCIA_MAX_BATCH_SIZE,
+        max_tokens_lote: int = INFERENCIA_MAX_TOKENS_LOTE,
+        max_length: int = 512,
+        tokenizer: Optional[Any] = None,
+        model: Optional[Any] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_tokens_lote = max(max_tokens_lote, max_length)
+        self.max_length = max_length
+        if tokenizer is None or model is None:
+            logger.info("Carregando o modelo %s (pode demorar na primeira vez)...", model_name)
+        self.tokenizer = tokenizer if tokenizer is not None else AutoTokenizer.from_pretrained(model_name)
+        self.model = model if model is not None else BertForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.ultima_taxa: float = 0.0  # artigos/segundo da última chamada a classificar()
+
+    def classificar(self, textos: Sequence[Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Classifica uma sequência de textos, preservando a ordem da entrada.
+
+        Returns:
+            Lista de dicts {"sentimento": rótulo, "probabilidades": [p_pos, p_neg, p_neu]}.
+            Textos vazios ou não-string recebem "TEXTO_INVALIDO" e probabilidades None.
+        """
+        resultados: List[Dict[str, Any]] = [
+            {"sentimento": ROTULO_TEXTO_INVALIDO, "probabilidades": None} for _ in textos
+        ]
+        validos = [i for i, t in enumerate(textos) if isinstance(t, str) and t]
+        if not validos:
+            return resultados
+
+        inicio = time.perf_counter()
+        codificados = self.tokenizer(
+            [textos[i] for i in validos], truncation=True, max_length=self.max_length,
+        )
+        comprimentos = [len(ids) for ids in codificados["input_ids"]]
+        lotes = montar_lotes(comprimentos, self.max_batch_size, self.max_tokens_lote)
+        device = getattr(self.model, "device", torch.device("cpu"))
+
+        for lote in lotes:
+            features = {chave: [codificados[chave][j] for j in lote] for chave in codificados.keys()}
+            entrada = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+            entrada = {chave: tensor.to(device) for chave, tensor in entrada.items()}
+            with torch.inference_mode():
+                logits = self.model(**entrada).logits
+            probs = torch.softmax(logits.float(), dim=-1).cpu().numpy()
+            for j, p in zip(lote, probs):
+                resultados[validos[j]] = {
+                    "sentimento": PRED_MAPPER.get(int(np.argmax(p)), "NEUTRAL"),
+                    "probabilidades": [round(float(x), 6) for x in p],
+                }
+
+        duracao = time.perf_counter() - inicio
+        self.ultima_taxa = len(validos) / duracao if duracao > 0 else float("inf")
+        logger.info(
+            "Inferência: %d textos em %d lotes, %.2fs (%.1f artigos/s).",
+            len(validos), len(lotes), duracao, self.ultima_taxa,
+        )
+        return resultados
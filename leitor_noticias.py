@@ -0,0 +1,119 @@
+"""
+Leitura em streaming das notícias brutas do Scrapy (JSON Lines, um objeto por linha).
+O arquivo é lido linha a linha (memória constante) e o leitor pode guardar o deslocamento
+em bytes já consumido (checkpoint), para que a próxima execução leia apenas as linhas novas.
+Também aceita o formato antigo do Scrapy (JSON array com um item por linha e blocos "[...]" concatenados).
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SUFIXO_CHECKPOINT = ".offset"
+
+
+def _decodificar_linha(linha: bytes) -> Optional[Dict[str, Any]]:
+    """Converte uma linha em dict. Retorna None para linhas sem objeto (vazias, "[", "]", "[]")."""
+    conteudo = linha.strip().lstrip(b"[").rstrip(b"],").strip()
+    if not conteudo.startswith(b"{"):
+        return None
+    obj = json.loads(conteudo)
+    return obj if isinstance(obj, dict) else None
+
+
+class LeitorNoticiasBrutas:
+    """
+    Iterador sobre as notícias de um arquivo JSON Lines, com checkpoint opcional.
+
+    Com usar_checkpoint=True a leitura começa no deslocamento salvo em `<caminho>.offset`
+    e o novo deslocamento só é gravado ao chamar confirmar() (após o processamento dar certo).
+    Se o arquivo foi reescrito ou truncado desde o checkpoint, a leitura recomeça do início.
+
+    Args:
+        caminho: Arquivo de notícias brutas (config.ARQUIVO_JSON_NOTICIAS).
+        usar_checkpoint: Se True, pula as linhas já consumidas em execuções anteriores.
+    """
+
+    def __init__(self, caminho: str, usar_checkpoint: bool = False) -> None:
+        self.caminho = caminho
+        self.usar_checkpoint = usar_checkpoint
+        self.arquivo_checkpoint = caminho + SUFIXO_CHECKPOINT
+        self.offset_inicial = self._ler_checkpoint() if usar_checkpoint else 0
+        self.offset = self.offset_inicial
+        self.linhas_invalidas = 0
+
+    def _ler_checkpoint(self) -> int:
+        if not os.path.exists(self.arquivo_checkpoint) or not os.path.exists(self.caminho):
+            return 0
+        try:
+            with open(self.arquivo_checkpoint, "r", encoding="utf-8") as f:
+                ck = json.load(f)
+            st = os.stat(self.caminho)
+            offset = int(ck.get("offset", 0))
+            if ck.get("inode") != st.st_ino or offset > st.st_size:
+                logger.info("Arquivo '%s' foi reescrito desde o último checkpoint. Lendo do início.", self.caminho)
+                return 0
+            return offset
+        except (OSError, ValueError) as e:
+            logger.warning("Checkpoint inválido em '%s' (%s). Lendo do início.", self.arquivo_checkpoint, e)
+            return 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.caminho):
+            logger.warning("Arquivo não encontrado: %s", self.caminho)
+            return
+        with open(self.caminho, "rb") as f:
+            f.seek(self.offset)
+            for linha in f:
+                # Linha incompleta (Scrapy ainda escrevendo): não consome, fica para a próxima leitura
+                if not linha.endswith(b"\n"):
+                    break
+                self.offset += len(linha)
+                try:
+                    obj = _decodificar_linha(linha)
+                except json.JSONDecodeError:
+                    self.linhas_invalidas += 1
+                    continue
+                if obj is not None:
+                    yield obj
+        if self.linhas_invalidas:
+            logger.warning("%d linha(s) inválida(s) ignorada(s) em '%s'.", self.linhas_invalidas, self.caminho)
+
+    def confirmar(self) -> None:
+        """Grava o deslocamento atual como checkpoint (linhas lidas não serão lidas de novo)."""
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.arquivo_checkpoint, "w", encoding="utf-8") as f:
+            json.dump({"offset": self.offset, "inode": os.stat(self.caminho).st_ino}, f)
+        logger.info("Checkpoint de '%s' atualizado: byte %d.", self.caminho, self.offset)
+
+
+def iterar_noticias_brutas(caminho: str) -> Iterator[Dict[str, Any]]:
+    """Itera sobre todas as notícias do arquivo, do início, sem checkpoint."""
+    return iter(LeitorNoticiasBrutas(caminho))
+
+
+def contar_noticias_brutas(caminho: str) -> int:
+    """Conta as notícias do arquivo sem carregá-lo inteiro na memória."""
+    return sum(1 for _ in iterar_noticias_brutas(caminho))
+
+
+def salvar_noticias_brutas(caminho: str, noticias: Iterable[Dict[str, Any]]) -> int:
+    """
+    Reescreve o arquivo em JSON Lines (escrita atômica) e descarta o checkpoint.
+
+    Returns:
+        Quantidade de notícias gravadas.
+    """
+    temporario = caminho + ".tmp"
+    total = 0
+    with open(temporario, "w", encoding="utf-8") as f:
+        for noticia in noticias:
+            f.write(json.dumps(noticia, ensure_ascii=False) + "\n")
+            total += 1
+    os.replace(temporario, caminho)
+    if os.path.exists(caminho + SUFIXO_CHECKPOINT):
+        os.remove(caminho + SUFIXO_CHECKPOINT)
+    return total
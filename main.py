@@ -6,76 +6,13 @@ import datetime
 import json
 import logging
 import os
-import subprocess
-import sys
-from typing import List
 
+from coleta import executar_coleta
 from config import ARQUIVO_STATUS, SCRAPY_PROJECT_DIR, SPIDER_NAMES
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
-def run_scrapers(project_dir: str, spiders: List[str]) -> bool:
-    """
-    Executa os spiders Scrapy em sequência no diretório do projeto.
-
-    Args:
-        project_dir: Caminho da pasta que contém scrapy.cfg.
-        spiders: Lista de nomes dos spiders (ex: exame, valor, infomoney, bloomberg).
-
-    Returns:
-        True se todos os spiders concluíram com sucesso; False caso contrário.
-    """
-    logger.info("Mudando para o diretório do Scrapy: %s", project_dir)
-    try:
-        # Guarda o diretório original para poder voltar depois
-        original_dir = os.getcwd()
-        os.chdir(project_dir)
-    except FileNotFoundError:
-        logger.error("Diretório do Scrapy não encontrado: %s", project_dir)
-        return False
-
-    logger.info("Iniciando execução dos spiders...")
-    for spider in spiders:
-        logger.info("Iniciando scraper: %s", spider)
-        try:
-            subprocess.run(f"scrapy crawl {spider}", shell=True, check=True)
-            logger.info("Scraper %s concluído com sucesso.", spider)
-        except subprocess.CalledProcessError as e:
-            logger.exception("Erro ao executar o scraper %s: %s. Rotina interrompida.", spider, e)
-            os.chdir(original_dir)
-            return False
-        except FileNotFoundError:
-            logger.error("Comando 'scrapy' não encontrado. Verifique instalação e PATH.")
-            os.chdir(original_dir)
-            return False
-
-    os.chdir(original_dir)
-    logger.info("Todos os scrapers foram executados com sucesso.")
-    return True
-
-def run_analysis(script_name: str) -> bool:
-    """
-    Executa um script Python (ex: analisar_noticias.py) com o mesmo interpretador do main.
-
-    Args:
-        script_name: Nome do arquivo .py (deve estar na raiz do projeto).
-
-    Returns:
-        True se o script terminou com sucesso; False caso contrário.
-    """
-    logger.info("Iniciando script de análise: %s", script_name)
-    try:
-        subprocess.run([sys.executable, script_name], check=True)
-        logger.info("Script de análise %s concluído com sucesso.", script_name)
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.exception("Erro ao executar %s: %s", script_name, e)
-        return False
-    except FileNotFoundError:
-        logger.error("Script de análise não encontrado: %s", script_name)
-        return False
-
 def atualizar_status_json(campo: str, valor: str) -> None:
     """Atualiza status.json com um campo (ultima_coleta, ultima_analise)."""
     status = {}
@@ -98,17 +35,17 @@ if __name__ == "__main__":
     logger.info("INICIANDO ROTINA DIÁRIA - %s", now)
     logger.info("=" * 60)
 
-    success_scrapers = run_scrapers(SCRAPY_PROJECT_DIR, SPIDER_NAMES)
+    success_scrapers = executar_coleta(SPIDER_NAMES, SCRAPY_PROJECT_DIR)["ok"]
     if success_scrapers:
         atualizar_status_json("ultima_coleta", now_iso)
-        run_analysis("analisar_noticias.py")
-        atualizar_status_json("ultima_analise", datetime.datetime.now().isoformat())
-        # Gera recomendação se existir notícias mapeadas (associar_tickers já foi rodado)
-        try:
-            from recomendacao import run_recomendacao
-            run_recomendacao()
-        except Exception as e:
-            logger.warning("Recomendação não executada (pode faltar noticias_mapeadas.json): %s", e)
+        # Sentimento e recomendação: no servico_recomendacao.py (FinBERT já carregado), se estiver
+        # no ar; senão no orquestrador, neste processo (a recomendação usa as notícias já mapeadas)
+        from orquestrador import executar_pipeline
+        from servico_recomendacao import executar_no_servico
+        etapas = ["sentimento", "recomendacao"]
+        relatorio = executar_no_servico(etapas) or executar_pipeline(etapas)
+        if not relatorio["ok"]:
+            logger.warning("Uma das etapas falhou: %s", relatorio["etapas"])
     else:
         logger.warning("Análise não executada devido a falha nos scrapers.")
 
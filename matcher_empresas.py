@@ -0,0 +1,235 @@
+"""
+Reconhecimento de empresas por dicionário, sem o spaCy: todos os nomes de mapeamento_tickers.json e
+os códigos dos tickers (PETR4, VALE3...) compilados em um único autômato Aho-Corasick sobre tokens.
+
+O texto é tokenizado e normalizado (sem acentos, minúsculas) e percorrido uma vez, da esquerda para a
+direita; entre ocorrências sobrepostas vale a mais longa que começa primeiro ("Banco do Brasil" e não
+"Banco"). Nomes de uma palavra ("Vale", "Banco") escritos com maiúscula no mapa só casam com a
+palavra em maiúscula no texto original, para não confundir "vale a pena" com a mineradora.
+As empresas encontradas são chaves do mapa (ou códigos de ticker), então
+`associar_tickers.mapear_tickers` continua valendo.
+
+Selecionado em associar_tickers.py com MOTOR_MAPEAMENTO = "matcher" (config.py).
+
+Uso:
+  python matcher_empresas.py       (compara com o NER nas notícias já mapeadas: recall e docs/s)
+"""
+import json
+import logging
+import re
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import ARQUIVO_JSON_MAPEADAS, ARQUIVO_MAPEAMENTO_TICKERS
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+_RE_TOKEN = re.compile(r"\w+")
+_RE_CODIGO = re.compile(r"^[A-Z0-9]{4}\d{1,2}$")
+# Linhas de seção do mapeamento ("--- NOVAS EMPRESAS B3 ---") não são nomes
+_PREFIXO_COMENTARIO = "---"
+
+
+def _tabela_sem_acentos() -> Dict[int, str]:
+    """Tradução caractere a caractere (mesmo comprimento) de letras acentuadas para a letra base."""
+    tabela = {}
+    for codigo in range(0xC0, 0x250):
+        base = unicodedata.normalize("NFKD", chr(codigo))[:1]
+        if base.isascii() and base.isalpha() and base != chr(codigo):
+            tabela[codigo] = base
+    return tabela
+
+
+_SEM_ACENTOS = _tabela_sem_acentos()
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos (á → a, ç → c) e passa para minúsculas."""
+    return texto.translate(_SEM_ACENTOS).lower()
+
+
+def codigo_ticker(ticker: str) -> str:
+    """Código do ticker sem o sufixo da bolsa ("PETR4.SA" → "PETR4")."""
+    return ticker.split(".")[0]
+
+
+def mapa_com_codigos(mapa_tickers: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """Mapa empresa -> ticker acrescido dos códigos ("PETR4" -> "PETR4.SA") que ainda não são chaves."""
+    mapa = dict(mapa_tickers)
+    for ticker in set(v for v in mapa_tickers.values() if v):
+        mapa.setdefault(codigo_ticker(ticker), ticker)
+    return mapa
+
+
+class MatcherEmpresas:
+    """
+    Autômato Aho-Corasick com os nomes do mapa de tickers e os códigos dos tickers.
+
+    Args:
+        mapa_tickers: Mapa empresa -> ticker (mapeamento_tickers.json). Nomes com ticker None também
+            entram: uma ocorrência mais longa mapeada para None ("Bloomberg News") impede que um
+            nome contido nela seja contado.
+        incluir_codigos: Se True, reconhece os códigos dos tickers do mapa escritos no texto.
+    """
+
+    def __init__(self, mapa_tickers: Dict[str, Optional[str]], incluir_codigos: bool = True) -> None:
+        self.mapa = mapa_com_codigos(mapa_tickers) if incluir_codigos else dict(mapa_tickers)
+        # Estado 0 é a raiz; cada estado tem transições por token, link de falha e saídas (nome, tamanho)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[List[Tuple[str, int]]] = [[]]
+        self._exige_maiuscula: Dict[str, bool] = {}
+        for nome in self.mapa:
+            if nome.startswith(_PREFIXO_COMENTARIO):
+                continue
+            tokens = _RE_TOKEN.findall(normalizar(nome))
+            if tokens:
+                self._inserir(tokens, nome)
+                # Palavra única escrita com inicial maiúscula no mapa (não sigla nem código): só com
+                # inicial maiúscula no texto; chaves em minúsculas ("bitcoin") casam de qualquer jeito
+                self._exige_maiuscula[nome] = (
+                    len(tokens) == 1 and nome[:1].isupper() and not nome.isupper() and not _RE_CODIGO.match(nome)
+                )
+        self._construir_falhas()
+
+    def __len__(self) -> int:
+        return len(self._exige_maiuscula)
+
+    def _inserir(self, tokens: List[str], nome: str) -> None:
+        estado = 0
+        for token in tokens:
+            proximo = self._goto[estado].get(token)
+            if proximo is None:
+                proximo = len(self._goto)
+                self._goto[estado][token] = proximo
+                self._goto.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+            estado = proximo
+        if all(saida[0] != nome for saida in self._saidas[estado]):
+            self._saidas[estado].append((nome, len(tokens)))
+
+    def _construir_falhas(self) -> None:
+        fila = list(self._goto[0].values())
+        for estado in fila:
+            for token, proximo in self._goto[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and token not in self._goto[falha]:
+                    falha = self._falha[falha]
+                destino = self._goto[falha].get(token, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falha[proximo]]
+
+    def ocorrencias(self, texto: Optional[str]) -> List[Tuple[int, int, str]]:
+        """
+        Ocorrências (token inicial, token final exclusivo, nome do mapa) sem sobreposição,
+        escolhendo a mais longa entre as que começam primeiro.
+        """
+        if not isinstance(texto, str) or not texto:
+            return []
+        originais = _RE_TOKEN.findall(texto)
+        tokens = normalizar("\x00".join(originais)).split("\x00")
+        goto, falha, saidas = self._goto, self._falha, self._saidas
+        candidatas = []
+        estado = 0
+        for fim, token in enumerate(tokens, start=1):
+            while estado and token not in goto[estado]:
+                estado = falha[estado]
+            estado = goto[estado].get(token, 0)
+            for nome, tamanho in saidas[estado]:
+                inicio = fim - tamanho
+                if self._exige_maiuscula[nome] and not originais[inicio][:1].isupper():
+                    continue
+                candidatas.append((inicio, fim, nome))
+        candidatas.sort(key=lambda c: (c[0], c[0] - c[1]))
+        escolhidas = []
+        livre = 0
+        for inicio, fim, nome in candidatas:
+            if inicio >= livre:
+                escolhidas.append((inicio, fim, nome))
+                livre = fim
+        return escolhidas
+
+    def empresas(self, texto: Optional[str]) -> List[str]:
+        """Nomes do mapa encontrados no texto, únicos, na ordem em que aparecem."""
+        return list(dict.fromkeys(nome for _, _, nome in self.ocorrencias(texto)))
+
+    def empresas_lote(self, textos: Sequence[Optional[str]]) -> List[List[str]]:
+        """`empresas` para cada texto, com a taxa (docs/s) no log."""
+        inicio = time.perf_counter()
+        resultado = [self.empresas(t) for t in textos]
+        duracao = time.perf_counter() - inicio
+        if len(textos) > 1:
+            logger.info(
+                "Matcher: %d textos em %.2fs (%.0f docs/s).",
+                len(textos), duracao, len(textos) / duracao if duracao > 0 else float("inf"),
+            )
+        return resultado
+
+    def tickers(self, texto: Optional[str]) -> List[str]:
+        """Tickers (sem None) das empresas encontradas no texto, únicos, na ordem em que aparecem."""
+        return list(dict.fromkeys(t for t in (self.mapa.get(n) for n in self.empresas(texto)) if t))
+
+
+def comparar_com_ner(
+    textos: Sequence[Optional[str]],
+    tickers_referencia: Sequence[Sequence[str]],
+    mapa_tickers: Dict[str, Optional[str]],
+    nlp: Any = None,
+) -> Dict[str, Any]:
+    """
+    Recall e taxa do matcher em relação aos tickers de referência (os do NER), e a taxa do NER se
+    `nlp` for informado.
+
+    Returns:
+        {"textos", "tickers_referencia", "recall", "tickers_extras", "matcher_docs_s", "ner_docs_s"}:
+        recall é a fração dos pares (notícia, ticker) da referência que o matcher também encontrou;
+        tickers_extras conta os pares que só o matcher encontrou.
+    """
+    matcher = MatcherEmpresas(mapa_tickers)
+    inicio = time.perf_counter()
+    encontrados = [matcher.tickers(t) for t in textos]
+    matcher_docs_s = len(textos) / max(time.perf_counter() - inicio, 1e-9)
+
+    referencia = sum(len(set(r)) for r in tickers_referencia)
+    acertos = sum(len(set(r) & set(e)) for r, e in zip(tickers_referencia, encontrados))
+    extras = sum(len(set(e) - set(r)) for r, e in zip(tickers_referencia, encontrados))
+
+    ner_docs_s = None
+    if nlp is not None:
+        from associar_tickers import extrair_empresas_lote
+        inicio = time.perf_counter()
+        extrair_empresas_lote(list(textos), nlp)
+        ner_docs_s = len(textos) / max(time.perf_counter() - inicio, 1e-9)
+    return {
+        "textos": len(textos),
+        "tickers_referencia": referencia,
+        "recall": acertos / referencia if referencia else None,
+        "tickers_extras": extras,
+        "matcher_docs_s": matcher_docs_s,
+        "ner_docs_s": ner_docs_s,
+    }
+
+
+if __name__ == "__main__":
+    from armazenamento import ler_noticias
+
+    with open(ARQUIVO_MAPEAMENTO_TICKERS, "r", encoding="utf-8") as f:
+        mapa = json.load(f)
+    df = ler_noticias(ARQUIVO_JSON_MAPEADAS, ["texto_completo", "tickers_citados"])
+    try:
+        from associar_tickers import carregar_modelo_spacy
+        nlp = carregar_modelo_spacy()
+    except (ImportError, SystemExit):
+        logger.warning("spaCy/pt_core_news_lg indisponível: só o matcher será medido.")
+        nlp = None
+    r = comparar_com_ner(df["texto_completo"].tolist(), df["tickers_citados"].tolist(), mapa, nlp)
+    logger.info("Notícias: %d | pares (notícia, ticker) do NER: %d", r["textos"], r["tickers_referencia"])
+    logger.info("Recall do matcher: %.1f%% | pares só do matcher: %d", 100 * (r["recall"] or 0), r["tickers_extras"])
+    logger.info(
+        "Matcher: %.0f docs/s | NER: %s docs/s",
+        r["matcher_docs_s"], f"{r['ner_docs_s']:.0f}" if r["ner_docs_s"] else "-",
+    )
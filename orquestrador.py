@@ -0,0 +1,307 @@
+"""
+Orquestrador do pipeline em um único processo: coleta → sentimento → tickers → preços → recomendação.
+
+As etapas passam DataFrames em memória (as notícias classificadas vão direto para o mapeamento de
+tickers, as recém-mapeadas para os preços e para a recomendação) e tudo é gravado uma vez, no fim.
+Cada etapa guarda em `orquestrador.estado.json` a impressão das entradas em disco (tamanho/mtime
+dos arquivos e partes do dataset) da última execução bem-sucedida; se as entradas não mudaram e
+nenhuma etapa anterior produziu dados novos nesta execução, a etapa é pulada.
+
+Só a coleta roda em um processo filho (coleta.py: o reator do Twisted não pode ser reiniciado no
+mesmo processo).
+
+Uso:
+  python orquestrador.py       (todas as etapas)
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from armazenamento import anexar_noticias, diretorio_dataset, impressao_dataset, ler_noticias
+from config import (
+    ALIAS_APROXIMADO_ATIVO,
+    ALIAS_LIMIAR_CONFIANCA,
+    ALIAS_MIN_CARACTERES,
+    ARQUIVO_ESTADO_ORQUESTRADOR,
+    ARQUIVO_JSON_MAPEADAS,
+    ARQUIVO_JSON_NOTICIAS,
+    ARQUIVO_JSON_SENTIMENTO,
+    ARQUIVO_MAPEAMENTO_TICKERS,
+    ARQUIVO_MODELO_DECISAO,
+    ARQUIVO_POLITICA_RL,
+    ARQUIVO_STATUS,
+    FINBERT_MODEL_NAME,
+    MOTOR_MAPEAMENTO,
+    SCRAPY_PROJECT_DIR,
+    SPIDER_NAMES,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+ETAPAS = ["coleta", "sentimento", "tickers", "precos", "recomendacao"]
+
+
+# --- Impressão das entradas ---
+
+def _arquivo(caminho: str) -> Optional[List[int]]:
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return [info.st_size, info.st_mtime_ns]
+
+
+def impressao_entradas(etapa: str) -> Optional[Dict[str, Any]]:
+    """Entradas em disco de cada etapa (None: a etapa sempre roda)."""
+    if etapa == "sentimento":
+        return {"brutas": _arquivo(ARQUIVO_JSON_NOTICIAS), "modelo": FINBERT_MODEL_NAME}
+    if etapa == "tickers":
+        return {
+            "sentimento": impressao_dataset(diretorio_dataset(ARQUIVO_JSON_SENTIMENTO)),
+            "mapa": _arquivo(ARQUIVO_MAPEAMENTO_TICKERS),
+            # Mudam os tickers de cada notícia sem mudar nenhum arquivo
+            "motor": MOTOR_MAPEAMENTO,
+            "aliases": [ALIAS_APROXIMADO_ATIVO, ALIAS_LIMIAR_CONFIANCA, ALIAS_MIN_CARACTERES],
+        }
+    if etapa == "precos":
+        # Preços mudam a cada pregão: no máximo uma atualização por dia para as mesmas notícias
+        return {"mapeadas": impressao_dataset(diretorio_dataset(ARQUIVO_JSON_MAPEADAS)), "dia": date.today().isoformat()}
+    if etapa == "recomendacao":
+        return {
+            "mapeadas": impressao_dataset(diretorio_dataset(ARQUIVO_JSON_MAPEADAS)),
+            "modelo": _arquivo(ARQUIVO_MODELO_DECISAO),
+            "politica": _arquivo(ARQUIVO_POLITICA_RL),
+        }
+    return None
+
+
+def _hash(impressao: Optional[Dict[str, Any]]) -> Optional[str]:
+    if impressao is None:
+        return None
+    return hashlib.sha256(json.dumps(impressao, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _ler_estado(caminho: str) -> Dict[str, Any]:
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Estado do orquestrador inválido (%s). Todas as etapas serão executadas.", e)
+        return {}
+
+
+def _gravar_estado(estado: Dict[str, Any], caminho: str) -> None:
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + ".tmp", caminho)
+
+
+# --- Etapas: recebem o contexto e retornam True se produziram dados novos ---
+
+def _etapa_coleta(ctx: Dict[str, Any]) -> bool:
+    from coleta import executar_coleta
+    if not executar_coleta(SPIDER_NAMES, SCRAPY_PROJECT_DIR)["ok"]:
+        raise RuntimeError("Falha na coleta.")
+    ctx["status"]["ultima_coleta"] = datetime.now().isoformat()
+    return True
+
+
+def _etapa_sentimento(ctx: Dict[str, Any]) -> bool:
+    from analisar_noticias import classificar_noticias_novas
+    novas, leitor = classificar_noticias_novas(ctx.get("motor"))
+    if novas is None or novas.empty:
+        return False
+    ctx["sentimento_novas"], ctx["leitor"] = novas, leitor
+    ctx["status"]["ultima_analise"] = datetime.now().isoformat()
+    return True
+
+
+def _etapa_tickers(ctx: Dict[str, Any]) -> bool:
+    from associar_tickers import mapear_incremental
+    # As classificadas nesta execução ainda não foram gravadas; da base gravada só as URLs não mapeadas são
+    # lidas (tudo só se a base mapeada for reconstruída). NER (ou matcher, ver MOTOR_MAPEAMENTO) só nas
+    # notícias ainda não vistas; "mapeadas" tem só as novas, salvo se a base for reconstruída
+    resultado = mapear_incremental(
+        ctx.get("sentimento_novas"), ctx.get("nlp"), ctx.get("mapa_tickers"), arquivo_entrada=ARQUIVO_JSON_SENTIMENTO,
+    )
+    ctx["mapeamento"] = resultado
+    ctx["mapeadas"] = resultado["mapeadas"]
+    ctx["mapeadas_completas"] = resultado["reconstruir"]
+    return resultado["reconstruir"] or not resultado["mapeadas"].empty
+
+
+def precos_no_dia(df: pd.DataFrame, fechamento: pd.DataFrame) -> List[Dict[str, Optional[float]]]:
+    """Fechamento de cada ticker citado no dia da notícia (None sem pregão ou sem preço)."""
+    dias = fechamento.index.strftime("%Y-%m-%d")
+    precos = {
+        (dia, ticker): float(valor)
+        for ticker in fechamento.columns
+        for dia, valor in zip(dias, fechamento[ticker].to_numpy())
+        if not pd.isna(valor)
+    }
+    resultado = []
+    for data, tickers in zip(df["data_normalizada"].tolist(), df["tickers_citados"].tolist()):
+        dia = data[:10] if isinstance(data, str) else None
+        resultado.append({t: precos.get((dia, t)) for t in tickers} if isinstance(tickers, list) else {})
+    return resultado
+
+
+def _etapa_precos(ctx: Dict[str, Any]) -> bool:
+    from precos import get_prices
+    mapeadas = ctx.get("mapeadas")
+    df = mapeadas if mapeadas is not None else ler_noticias(ARQUIVO_JSON_MAPEADAS, ["data_normalizada", "tickers_citados"])
+    if df.empty:
+        return False
+    tickers = sorted({t for lista in df["tickers_citados"] for t in lista})
+    dias = pd.to_datetime(df["data_normalizada"].str[:10], errors="coerce").dropna()
+    inicio = (dias.min() - timedelta(days=1)) if not dias.empty else pd.Timestamp(date.today() - timedelta(days=365))
+    fim = pd.Timestamp(date.today() + timedelta(days=1))
+    fechamento = get_prices(tickers, inicio, fim, "Close")
+    logger.info("Preços de %d tickers de %s a %s.", len(tickers), inicio.date(), fim.date())
+    ctx["precos"] = fechamento
+    if mapeadas is None:
+        return False  # cache de preços atualizado; a base mapeada não muda
+    mapeadas["precos_no_dia"] = precos_no_dia(mapeadas, fechamento)
+    return True
+
+
+def _etapa_recomendacao(ctx: Dict[str, Any]) -> bool:
+    from recomendacao import (
+        agregar_sentimento_por_dia_ticker,
+        carregar_noticias_mapeadas,
+        escolher_data,
+        gerar_recomendacao,
+        recomendar,
+        sentimento_diario_recomendacao,
+    )
+    mapeadas = ctx.get("mapeadas")
+    if mapeadas is None or mapeadas.empty:
+        ctx["recomendacao"] = recomendar()
+    elif ctx.get("mapeadas_completas", True):
+        ctx["recomendacao"] = gerar_recomendacao(mapeadas, df_sent=agregar_sentimento_por_dia_ticker(mapeadas))
+    else:
+        # Só as notícias novas estão em memória: o score delas (somas) entra na tabela diária gravada
+        # e as notícias já gravadas do dia escolhido se juntam às novas
+        df_sent = pd.concat(
+            [sentimento_diario_recomendacao(ARQUIVO_JSON_MAPEADAS), agregar_sentimento_por_dia_ticker(mapeadas)],
+            ignore_index=True,
+        ).groupby(["data", "tickers_citados"], sort=True)["score"].sum().reset_index()
+        _, dia = escolher_data(df_sent)
+        gravadas = carregar_noticias_mapeadas(ARQUIVO_JSON_MAPEADAS, data_inicio=dia, data_fim=dia) if dia else None
+        df = mapeadas if gravadas is None else pd.concat([gravadas, mapeadas], ignore_index=True)
+        ctx["recomendacao"] = gerar_recomendacao(df, data_alvo=dia, df_sent=df_sent)
+    return True
+
+
+_FUNCOES: Dict[str, Callable[[Dict[str, Any]], bool]] = {
+    "coleta": _etapa_coleta,
+    "sentimento": _etapa_sentimento,
+    "tickers": _etapa_tickers,
+    "precos": _etapa_precos,
+    "recomendacao": _etapa_recomendacao,
+}
+
+
+def _persistir(ctx: Dict[str, Any]) -> None:
+    """Grava, uma vez, o que as etapas produziram em memória."""
+    novas = ctx.get("sentimento_novas")
+    if novas is not None:
+        logger.info("Acrescentando %d notícias classificadas em '%s'...", len(novas), ARQUIVO_JSON_SENTIMENTO)
+        anexar_noticias(novas, ARQUIVO_JSON_SENTIMENTO)
+        ctx["leitor"].confirmar()
+    if ctx.get("mapeamento") is not None:
+        from associar_tickers import gravar_mapeamento
+        from sentimento_diario import atualizar_sentimento_diario
+        gravar_mapeamento(ctx["mapeamento"])
+        atualizar_sentimento_diario(ARQUIVO_JSON_MAPEADAS)
+    if "recomendacao" in ctx:
+        from recomendacao import registrar_recomendacao
+        registrar_recomendacao(ctx["recomendacao"])
+    if ctx["status"]:
+        status: Dict[str, Any] = {}
+        if os.path.exists(ARQUIVO_STATUS):
+            try:
+                with open(ARQUIVO_STATUS, "r", encoding="utf-8") as f:
+                    status = json.load(f)
+            except (OSError, ValueError):
+                pass
+        status.update(ctx["status"])
+        with open(ARQUIVO_STATUS, "w", encoding="utf-8") as f:
+            json.dump(status, f, ensure_ascii=False, indent=2)
+
+
+def executar_pipeline(
+    etapas: Sequence[str] = ETAPAS,
+    forcar: bool = False,
+    motor: Any = None,
+    nlp: Any = None,
+    mapa_tickers: Optional[dict] = None,
+    caminho_estado: str = ARQUIVO_ESTADO_ORQUESTRADOR,
+) -> Dict[str, Any]:
+    """
+    Executa as etapas pedidas (na ordem de ETAPAS) no processo atual e grava tudo no fim.
+
+    Args:
+        etapas: Subconjunto de ETAPAS.
+        forcar: Se True, não pula etapas com entradas inalteradas.
+        motor: Motor FinBERT já carregado (opcional).
+        nlp: Modelo spaCy já carregado (opcional).
+        mapa_tickers: Mapa empresa -> ticker já carregado (opcional).
+        caminho_estado: JSON com a impressão das entradas de cada etapa.
+
+    Returns:
+        {"etapas": [{"etapa", "ok", "pulada", "duracao_s"}, ...], "persistencia_s": float, "ok": bool}.
+        Uma etapa com falha interrompe as seguintes; o que já foi produzido é gravado mesmo assim.
+    """
+    desconhecidas = [e for e in etapas if e not in ETAPAS]
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas: {desconhecidas}. Válidas: {ETAPAS}")
+    estado = _ler_estado(caminho_estado)
+    ctx: Dict[str, Any] = {"motor": motor, "nlp": nlp, "mapa_tickers": mapa_tickers, "status": {}}
+    relatorio: List[Dict[str, Any]] = []
+    concluidas: List[str] = []
+    dados_novos = False
+
+    for etapa in [e for e in ETAPAS if e in etapas]:
+        impressao = _hash(impressao_entradas(etapa))
+        if not forcar and not dados_novos and impressao is not None and estado.get(etapa, {}).get("impressao") == impressao:
+            logger.info("Etapa %s: entradas inalteradas, pulada.", etapa)
+            relatorio.append({"etapa": etapa, "ok": True, "pulada": True, "duracao_s": 0.0})
+            continue
+        inicio = time.perf_counter()
+        try:
+            dados_novos = _FUNCOES[etapa](ctx) or dados_novos
+            ok = True
+        except (Exception, SystemExit) as e:
+            logger.exception("Etapa %s falhou: %s", etapa, e)
+            ok = False
+        duracao = round(time.perf_counter() - inicio, 3)
+        relatorio.append({"etapa": etapa, "ok": ok, "pulada": False, "duracao_s": duracao})
+        logger.info("Etapa %s: %s em %.2fs.", etapa, "ok" if ok else "falhou", duracao)
+        if not ok:
+            break
+        concluidas.append(etapa)
+
+    inicio = time.perf_counter()
+    _persistir(ctx)
+    persistencia = round(time.perf_counter() - inicio, 3)
+    logger.info("Persistência: %.2fs.", persistencia)
+
+    # Impressões depois da gravação: é o estado que a próxima execução vai encontrar
+    for etapa in concluidas:
+        estado[etapa] = {"impressao": _hash(impressao_entradas(etapa)), "concluida_em": datetime.now().isoformat()}
+    _gravar_estado(estado, caminho_estado)
+    return {"etapas": relatorio, "persistencia_s": persistencia, "ok": all(r["ok"] for r in relatorio)}
+
+
+if __name__ == "__main__":
+    executar_pipeline()
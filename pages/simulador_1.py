@@ -124,17 +124,47 @@ import os
 st.title("📈 Simulador Dinâmico de Estratégias (IC)")
 
 pasta_resultados = 'resultados_simulacao'
-arquivos_encontrados = glob.glob(f"{pasta_resultados}/resultado_estrategia_*.csv")
+arquivo_operacoes = os.path.join(pasta_resultados, 'simulacoes.parquet')
+arquivo_patrimonio = os.path.join(pasta_resultados, 'patrimonio.parquet')
+arquivo_resumo = os.path.join(pasta_resultados, 'resumo_simulacoes.csv')
 
-if not arquivos_encontrados:
-    st.warning(f"Nenhum CSV encontrado. Rode o simulador_estrategia.py primeiro para popular a pasta '{pasta_resultados}'!")
+
+@st.cache_data
+def carregar_consolidado(caminho, mtime):
+    # Uma leitura para todos os tickers; mtime entra na chave do cache (parâmetros com "_" ficam
+    # de fora), então o cache é invalidado quando o simulador regrava o arquivo
+    return pd.read_parquet(caminho)
+
+
+def _mtime(caminho):
+    return os.path.getmtime(caminho) if os.path.exists(caminho) else None
+
+
+df_curvas = None
+df_resumo = None
+if os.path.exists(arquivo_operacoes):
+    df_operacoes = carregar_consolidado(arquivo_operacoes, _mtime(arquivo_operacoes))
+    opcoes_tickers = sorted(df_operacoes['ticker'].str.replace('.SA', '', regex=False).unique())
+    if os.path.exists(arquivo_patrimonio):
+        df_curvas = carregar_consolidado(arquivo_patrimonio, _mtime(arquivo_patrimonio))
+    if os.path.exists(arquivo_resumo):
+        df_resumo = pd.read_csv(arquivo_resumo)
 else:
-    opcoes_tickers = [os.path.basename(arq).replace("resultado_estrategia_", "").replace(".csv", "") for arq in arquivos_encontrados]
+    # Resultados antigos: um CSV por ticker
+    df_operacoes = None
+    arquivos_encontrados = glob.glob(f"{pasta_resultados}/resultado_estrategia_*.csv")
+    opcoes_tickers = sorted(os.path.basename(arq).replace("resultado_estrategia_", "").replace(".csv", "") for arq in arquivos_encontrados)
+
+if not opcoes_tickers:
+    st.warning(f"Nenhum resultado encontrado. Rode o simulador_estrategia.py primeiro para popular a pasta '{pasta_resultados}'!")
+else:
+    ticker_escolhido = st.selectbox("Selecione o Ativo para visualizar os resultados:", opcoes_tickers)
     
-    ticker_escolhido = st.selectbox("Selecione o Ativo para visualizar os resultados:", sorted(opcoes_tickers))
-    
-    caminho_csv = f"{pasta_resultados}/resultado_estrategia_{ticker_escolhido}.csv"
-    df_estrategia = pd.read_csv(caminho_csv)
+    if df_operacoes is not None:
+        do_ticker = df_operacoes['ticker'].str.replace('.SA', '', regex=False) == ticker_escolhido
+        df_estrategia = df_operacoes[do_ticker].drop(columns='ticker').reset_index(drop=True)
+    else:
+        df_estrategia = pd.read_csv(f"{pasta_resultados}/resultado_estrategia_{ticker_escolhido}.csv")
     
     patrimonio_inicial = 10000.00
     patrimonio_final = df_estrategia['Patrimônio Total'].iloc[-1]
@@ -148,6 +178,18 @@ else:
     cor_delta = "normal" if lucro >= 0 else "inverse"
     col2.metric("Patrimônio Final", f"R$ {patrimonio_final:,.2f}", f"{rentabilidade:.2f}%", delta_color=cor_delta)
     col3.metric("Lucro / Prejuízo", f"R$ {lucro:,.2f}")
+
+    if df_resumo is not None:
+        linha = df_resumo[df_resumo['ticker'].str.replace('.SA', '', regex=False) == ticker_escolhido]
+        if not linha.empty:
+            col4, col5 = st.columns(2)
+            col4.metric("Sharpe (diário, anualizado)", f"{linha['sharpe_ratio'].iloc[0]:.2f}")
+            col5.metric("Drawdown Máximo", f"{linha['max_drawdown_pct'].iloc[0]:.2f}%")
+
+    if df_curvas is not None:
+        curva = df_curvas[df_curvas['ticker'].str.replace('.SA', '', regex=False) == ticker_escolhido]
+        st.subheader("Evolução do Patrimônio")
+        st.line_chart(curva.set_index('Data')['Patrimônio Total'])
     
     st.divider()
 
@@ -170,4 +212,4 @@ else:
         },
         use_container_width=True,
         hide_index=True
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,275 @@
+"""
+Base local de preços diários (OHLCV) por ticker, com cache em Parquet.
+
+Todos os módulos que precisam de cotações usam get_prices(); o download (yfinance por padrão)
+só acontece para os intervalos de datas que ainda não estão no cache. Cada ticker tem um arquivo
+`<TICKER>.parquet` e um `<TICKER>.cobertura.json` com os intervalos já consultados (inclusive
+períodos sem pregão, para não baixar de novo fins de semana e feriados).
+"""
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from config import DIRETORIO_CACHE_PRECOS
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_OHLCV: Tuple[str, ...] = ("Open", "High", "Low", "Close", "Volume")
+NOME_INDICE = "Date"
+
+Data = Union[str, date, datetime, pd.Timestamp]
+Intervalo = Tuple[pd.Timestamp, pd.Timestamp]  # [início, fim) em dias
+
+
+def _dia(valor: Data) -> pd.Timestamp:
+    """Converte para Timestamp sem fuso, à meia-noite."""
+    ts = pd.Timestamp(valor)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def _normalizar_ohlcv(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Índice diário sem fuso (nome Date), colunas OHLCV em float, sem linhas vazias."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=list(CAMPOS_OHLCV), index=pd.DatetimeIndex([], name=NOME_INDICE), dtype=float)
+    df = df.reindex(columns=list(CAMPOS_OHLCV)).astype(float)
+    indice = pd.DatetimeIndex(df.index)
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    df.index = indice.normalize().rename(NOME_INDICE)
+    df = df[~df.index.duplicated(keep="last")].dropna(how="all")
+    return df.sort_index()
+
+
+class ProvedorPrecos(ABC):
+    """
+    Interface dos provedores: baixar OHLCV diário de vários tickers no intervalo [inicio, fim).
+    Um provedor sem `baixar` falha ao ser instanciado.
+    """
+
+    @abstractmethod
+    def baixar(self, tickers: Sequence[str], inicio: pd.Timestamp, fim: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        """Retorna {ticker: DataFrame com colunas OHLCV e índice de datas}. Tickers sem dados podem faltar."""
+
+
+class ProvedorYFinance(ProvedorPrecos):
+    """
+    Provedor padrão (yfinance). Baixa os tickers em um único lote e repete individualmente
+    os que vierem vazios (falhas pontuais do lote).
+    """
+
+    def __init__(self, repair: bool = True) -> None:
+        self.repair = repair
+
+    def _download(self, tickers: Sequence[str], inicio: pd.Timestamp, fim: pd.Timestamp) -> Optional[pd.DataFrame]:
+        import yfinance as yf
+
+        try:
+            return yf.download(
+                list(tickers),
+                start=inicio.strftime("%Y-%m-%d"),
+                end=fim.strftime("%Y-%m-%d"),
+                interval="1d",
+                group_by="ticker",
+                repair=self.repair,
+                progress=False,
+                threads=len(tickers) > 1,
+            )
+        except Exception as e:
+            logger.warning("Falha no download de %d ticker(s) no yfinance: %s", len(tickers), e)
+            return None
+
+    @staticmethod
+    def _separar(bruto: Optional[pd.DataFrame], tickers: Sequence[str]) -> Dict[str, pd.DataFrame]:
+        if bruto is None or bruto.empty:
+            return {}
+        if not isinstance(bruto.columns, pd.MultiIndex):
+            return {tickers[0]: bruto} if len(tickers) == 1 else {}
+        return {t: bruto[t] for t in tickers if t in bruto.columns.get_level_values(0)}
+
+    def baixar(self, tickers: Sequence[str], inicio: pd.Timestamp, fim: pd.Timestamp) -> Dict[str, pd.DataFrame]:
+        dados = self._separar(self._download(tickers, inicio, fim), tickers)
+        dados = {t: df for t, df in dados.items() if not df.dropna(how="all").empty}
+        faltantes = [t for t in tickers if t not in dados]
+        if faltantes and len(tickers) > 1:
+            logger.info("Repetindo download individual de %d ticker(s) que falharam no lote...", len(faltantes))
+            for t in faltantes:
+                dados.update(self._separar(self._download([t], inicio, fim), [t]))
+        return dados
+
+
+def _mesclar(intervalos: List[Intervalo]) -> List[Intervalo]:
+    """Une intervalos sobrepostos ou adjacentes."""
+    resultado: List[Intervalo] = []
+    for ini, fim in sorted(intervalos):
+        if resultado and ini <= resultado[-1][1]:
+            resultado[-1] = (resultado[-1][0], max(resultado[-1][1], fim))
+        else:
+            resultado.append((ini, fim))
+    return resultado
+
+
+def _lacunas(pedido: Intervalo, cobertos: List[Intervalo]) -> List[Intervalo]:
+    """Partes de `pedido` que não estão em `cobertos` (intervalos mesclados e ordenados)."""
+    ini, fim = pedido
+    lacunas: List[Intervalo] = []
+    cursor = ini
+    for c_ini, c_fim in cobertos:
+        if c_fim <= cursor or c_ini >= fim:
+            continue
+        if c_ini > cursor:
+            lacunas.append((cursor, c_ini))
+        cursor = max(cursor, c_fim)
+    if cursor < fim:
+        lacunas.append((cursor, fim))
+    return lacunas
+
+
+class ArmazemPrecos:
+    """
+    Cache em disco de OHLCV diário por ticker, completado de forma incremental.
+
+    Args:
+        diretorio: Pasta do cache (padrão: config.DIRETORIO_CACHE_PRECOS).
+        provedor: Fonte dos dados ausentes (padrão: ProvedorYFinance).
+    """
+
+    def __init__(self, diretorio: str = DIRETORIO_CACHE_PRECOS, provedor: Optional[ProvedorPrecos] = None) -> None:
+        self.diretorio = diretorio
+        self.provedor = provedor if provedor is not None else ProvedorYFinance()
+        self.downloads = 0
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, ticker: str, sufixo: str) -> str:
+        nome = "".join(c if c.isalnum() or c in "._-" else "_" for c in ticker)
+        return os.path.join(self.diretorio, nome + sufixo)
+
+    def _ler_cobertura(self, ticker: str) -> List[Intervalo]:
+        caminho = self._caminho(ticker, ".cobertura.json")
+        if not os.path.exists(caminho):
+            return []
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                return _mesclar([(pd.Timestamp(a), pd.Timestamp(b)) for a, b in json.load(f)])
+        except (OSError, ValueError) as e:
+            logger.warning("Cobertura inválida para %s (%s). O ticker será baixado de novo.", ticker, e)
+            return []
+
+    def ler_cache(self, ticker: str) -> pd.DataFrame:
+        """OHLCV já armazenado do ticker (vazio se não houver)."""
+        caminho = self._caminho(ticker, ".parquet")
+        if not os.path.exists(caminho):
+            return _normalizar_ohlcv(None)
+        return _normalizar_ohlcv(pd.read_parquet(caminho))
+
+    def _gravar(self, ticker: str, df: pd.DataFrame, cobertura: List[Intervalo]) -> None:
+        """Grava dados e cobertura (arquivos temporários + os.replace)."""
+        caminho = self._caminho(ticker, ".parquet")
+        temporario = f"{caminho}.tmp-{uuid.uuid4().hex}"
+        df.to_parquet(temporario)
+        os.replace(temporario, caminho)
+        caminho_cob = self._caminho(ticker, ".cobertura.json")
+        with open(caminho_cob + ".tmp", "w", encoding="utf-8") as f:
+            json.dump([[a.strftime("%Y-%m-%d"), b.strftime("%Y-%m-%d")] for a, b in cobertura], f)
+        os.replace(caminho_cob + ".tmp", caminho_cob)
+
+    def completar(self, tickers: Sequence[str], inicio: Data, fim: Data) -> None:
+        """
+        Baixa apenas os intervalos de [inicio, fim) ainda não cobertos no cache.
+
+        Tickers com a mesma lacuna são baixados juntos (um download por lacuna distinta).
+        O dia de hoje em diante nunca é marcado como coberto (o pregão pode não ter fechado).
+        """
+        inicio, fim = _dia(inicio), _dia(fim)
+        hoje = _dia(datetime.now())
+        coberturas = {t: self._ler_cobertura(t) for t in tickers}
+        por_lacuna: Dict[Intervalo, List[str]] = {}
+        for t in tickers:
+            for lacuna in _lacunas((inicio, fim), coberturas[t]):
+                por_lacuna.setdefault(lacuna, []).append(t)
+
+        for (l_ini, l_fim), grupo in sorted(por_lacuna.items()):
+            logger.info(
+                "Baixando preços de %d ticker(s) de %s a %s...", len(grupo), l_ini.date(), l_fim.date(),
+            )
+            baixados = {t: _normalizar_ohlcv(df) for t, df in self.provedor.baixar(grupo, l_ini, l_fim).items()}
+            self.downloads += 1
+            # Lote todo vazio: pode ser falha de rede; não marca cobertura para tentar de novo depois
+            algum_dado = any(not df.empty for df in baixados.values())
+            fim_coberto = min(l_fim, hoje)
+            for t in grupo:
+                novos = baixados.get(t)
+                if (novos is None or novos.empty) and not algum_dado:
+                    continue
+                dados = self.ler_cache(t)
+                if novos is not None and not novos.empty:
+                    dados = _normalizar_ohlcv(pd.concat([dados, novos]))
+                cobertura = coberturas[t]
+                if l_ini < fim_coberto:
+                    cobertura = _mesclar(cobertura + [(l_ini, fim_coberto)])
+                    coberturas[t] = cobertura
+                self._gravar(t, dados, cobertura)
+
+    def obter(
+        self, tickers: Sequence[str], inicio: Data, fim: Data, campos: Union[str, Sequence[str]] = "Close",
+    ) -> pd.DataFrame:
+        """Ver get_prices."""
+        tickers = list(dict.fromkeys(tickers))
+        self.completar(tickers, inicio, fim)
+        inicio, fim = _dia(inicio), _dia(fim)
+        lista_campos = [campos] if isinstance(campos, str) else list(campos)
+        partes = {}
+        for t in tickers:
+            df = self.ler_cache(t)
+            partes[t] = df.loc[(df.index >= inicio) & (df.index < fim), lista_campos]
+        if not partes:
+            return pd.DataFrame()
+        tabela = pd.concat(partes, axis=1, names=["Ticker", "Price"]).sort_index()
+        tabela.index.name = NOME_INDICE
+        if isinstance(campos, str):
+            return tabela.xs(campos, axis=1, level="Price").reindex(columns=tickers)
+        return tabela.swaplevel(axis=1).reindex(columns=pd.MultiIndex.from_product([lista_campos, tickers]))
+
+
+_armazem_padrao: Optional[ArmazemPrecos] = None
+
+
+def armazem_padrao() -> ArmazemPrecos:
+    """Instância compartilhada com o diretório e provedor padrão."""
+    global _armazem_padrao
+    if _armazem_padrao is None:
+        _armazem_padrao = ArmazemPrecos()
+    return _armazem_padrao
+
+
+def get_prices(
+    tickers: Union[str, Sequence[str]],
+    start: Data,
+    end: Data,
+    fields: Union[str, Sequence[str]] = "Close",
+    armazem: Optional[ArmazemPrecos] = None,
+) -> pd.DataFrame:
+    """
+    Preços diários dos tickers no intervalo [start, end) (end exclusivo, como no yfinance).
+
+    Args:
+        tickers: Ticker ou lista de tickers (ex.: "PETR4.SA").
+        start: Data inicial (inclusive).
+        end: Data final (exclusiva).
+        fields: Um campo ("Close") ou lista de campos de CAMPOS_OHLCV.
+        armazem: Cache a usar (padrão: armazem_padrao()).
+
+    Returns:
+        Com um campo (str): DataFrame índice=Date, colunas=tickers.
+        Com lista de campos: colunas MultiIndex (campo, ticker), como o yf.download.
+        Tickers sem dados aparecem como colunas só com NaN.
+    """
+    lista = [tickers] if isinstance(tickers, str) else list(tickers)
+    return (armazem or armazem_padrao()).obter(lista, start, end, fields)
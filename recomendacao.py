@@ -7,18 +7,24 @@ Se não houver modelo/RL, tenta treinar com os dados disponíveis; se falhar, re
 import json
 import logging
 import os
+import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from armazenamento import COLUNAS_RESUMO, ler_noticias
+from registro_modelos import carregar_modelo_decisao, carregar_politica_rl
+from sentimento_diario import agregar_noticias, carregar_sentimento_diario
 from config import (
+    ARQUIVO_HISTORICO_RECOMENDACOES,
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_ULTIMA_RECOMENDACAO,
     ARQUIVO_STATUS,
     ARQUIVO_MODELO_DECISAO,
     ARQUIVO_CONFIG_MODELO_DECISAO,
+    ARQUIVO_POLITICA_RL,
 )
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -28,64 +34,114 @@ POR_QUANTO_TEMPO = "1 dia (day trade)"
 # Modelo treinado: prob(subiu) > UMBRAL_COMPRA → compra, < UMBRAL_VENDA → venda, senão segurar
 UMBRAL_PROB_COMPRA = 0.6
 UMBRAL_PROB_VENDA = 0.4
+# Colunas do histórico de recomendações (as mesmas chaves de "investir", mais a data)
+COLUNAS_HISTORICO = ["data", "ticker", "acao", "score", "quantidade_noticias", "usou_modelo_treinado", "usou_rl"]
 # Ordem de preferência: 1) agente RL, 2) modelo (Random Forest/Logistic), nunca regra fixa
 PREFERIR_RL = True  # Se True e existir política RL, usa RL; senão usa modelo.
 
 
 def _carregar_modelo_decisao() -> Optional[Tuple[Any, Any]]:
-    """Carrega modelo e scaler salvos por treinar_modelo_decisao.py. Retorna (model, scaler) ou None."""
-    if not os.path.exists(ARQUIVO_MODELO_DECISAO):
-        return None
+    """Modelo e scaler salvos por treinar_modelo_decisao.py (via registro_modelos). Retorna (model, scaler) ou None."""
     try:
-        import joblib
-        obj = joblib.load(ARQUIVO_MODELO_DECISAO)
-        return (obj["model"], obj["scaler"])
+        return carregar_modelo_decisao(ARQUIVO_MODELO_DECISAO)
     except Exception as e:
         logger.warning("Não foi possível carregar modelo de decisão: %s. Usando regra fixa.", e)
         return None
 
 
-def _decisao_com_modelo(score: float, model: Any, scaler: Any) -> str:
-    """Usa modelo treinado (sentimento → retorno) para decidir compra/venda/segurar."""
-    X = np.array([[float(score)]], dtype=np.float64)
-    X_s = scaler.transform(X)
-    if hasattr(model, "predict_proba"):
-        prob = model.predict_proba(X_s)[0, 1]  # P(subiu)
-        if prob >= UMBRAL_PROB_COMPRA:
-            return "compra"
-        if prob <= UMBRAL_PROB_VENDA:
-            return "venda"
-        return "segurar"
-    pred = model.predict(X_s)[0]
-    return "compra" if pred == 1 else "venda"
-
-
 def _carregar_politica_rl() -> Optional[Any]:
-    """Carrega política RL (Q-Learning) se existir. Retorna dict da política ou None."""
+    """Política RL (Q-Learning) via registro_modelos, se existir. Retorna dict da política ou None."""
     try:
-        from rl_agente import carregar_politica
-        return carregar_politica()
+        return carregar_politica_rl(ARQUIVO_POLITICA_RL)
     except Exception as e:
         logger.debug("Política RL não disponível: %s", e)
         return None
 
 
-def _decisao_rl(score: float, policy: Any) -> str:
-    """Usa agente RL (Q-Learning) para decidir compra/venda/segurar."""
-    from rl_agente import acao_rl, acao_para_str
-    acao = acao_rl(score, policy)
-    return acao_para_str(acao)
+def _carregar_decisor() -> Tuple[Optional[Any], Optional[Tuple[Any, Any]]]:
+    """
+    Carrega o decisor uma vez: (política RL, None) ou (None, (model, scaler)), na ordem de preferência.
+    Se não houver nenhum, tenta treinar o modelo e depois o RL; (None, None) se tudo falhar.
+    """
+    # Decisão sempre por IA: RL (Q-Learning) ou modelo (Random Forest). Nunca regra fixa.
+    politica_rl = _carregar_politica_rl() if PREFERIR_RL else None
+    modelo_dec = _carregar_modelo_decisao() if not politica_rl else None
 
+    # Se não tem nem RL nem modelo, tenta treinar uma vez
+    if not politica_rl and not modelo_dec:
+        logger.info("Nenhum modelo nem política RL. Tentando treinar modelo (Random Forest)...")
+        try:
+            from treinar_modelo_decisao import run as run_treino
+            if run_treino():
+                modelo_dec = _carregar_modelo_decisao()
+        except Exception as e:
+            logger.warning("Falha ao treinar modelo: %s", e)
+        if not modelo_dec:
+            logger.info("Tentando treinar agente RL (Q-Learning)...")
+            try:
+                from rl_agente import run_treino as run_rl
+                if run_rl():
+                    politica_rl = _carregar_politica_rl()
+            except Exception as e:
+                logger.warning("Falha ao treinar RL: %s", e)
 
-def carregar_noticias_mapeadas(caminho: str) -> Optional[pd.DataFrame]:
-    """Carrega noticias_mapeadas.json. Retorna None se arquivo não existir ou estiver vazio."""
-    if not os.path.exists(caminho):
-        logger.warning("Arquivo não encontrado: %s", caminho)
-        return None
+    if politica_rl is not None:
+        logger.info("Usando agente RL (Q-Learning) para decidir compra/venda/segurar.")
+        return politica_rl, None
+    if modelo_dec is not None:
+        logger.info("Usando modelo treinado (Random Forest / histórico sentimento → retorno) para decidir.")
+        return None, modelo_dec
+    logger.warning("Sem modelo nem RL. Recomendações serão 'segurar' até rodar treinar_modelo_decisao.py e/ou rl_agente.py.")
+    return None, None
+
+
+def decidir_acoes(
+    scores: np.ndarray,
+    politica_rl: Optional[Any] = None,
+    modelo_dec: Optional[Tuple[Any, Any]] = None,
+) -> np.ndarray:
+    """
+    Ação ("compra", "venda" ou "segurar") para cada score, numa única chamada ao decisor.
+
+    Args:
+        scores: Scores de sentimento (um por (data, ticker)).
+        politica_rl: Política Q-Learning (tem precedência sobre o modelo).
+        modelo_dec: (model, scaler) de treinar_modelo_decisao.py; prob(subiu) >= UMBRAL_PROB_COMPRA
+            → compra, <= UMBRAL_PROB_VENDA → venda, senão segurar.
+
+    Returns:
+        Array de strings com o mesmo tamanho de scores ("segurar" se não houver decisor).
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if politica_rl is not None:
+        from rl_agente import N_ACOES, acao_para_str, acoes_rl
+        nomes = np.array([acao_para_str(a) for a in range(N_ACOES)], dtype=object)
+        return nomes[acoes_rl(scores, politica_rl)]
+    if modelo_dec is None or scores.size == 0:
+        return np.full(scores.shape, "segurar", dtype=object)
+    model, scaler = modelo_dec
+    X_s = scaler.transform(scores.reshape(-1, 1))
+    if hasattr(model, "predict_proba"):
+        prob = model.predict_proba(X_s)[:, 1]  # P(subiu)
+        return np.where(prob >= UMBRAL_PROB_COMPRA, "compra", np.where(prob <= UMBRAL_PROB_VENDA, "venda", "segurar")).astype(object)
+    return np.where(model.predict(X_s) == 1, "compra", "venda").astype(object)
+
+
+# Colunas usadas na recomendação (o restante da base não é carregado)
+COLUNAS_RECOMENDACAO = COLUNAS_RESUMO + ["title", "url"]
+
+
+def carregar_noticias_mapeadas(
+    caminho: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Carrega as notícias mapeadas (Parquet), opcionalmente só do período [data_inicio, data_fim].
+    Retorna None se a base não existir ou estiver vazia.
+    """
     try:
-        df = pd.read_json(caminho)
+        df = ler_noticias(caminho, COLUNAS_RECOMENDACAO, data_inicio=data_inicio, data_fim=data_fim)
         if df.empty:
-            logger.warning("Arquivo vazio: %s", caminho)
+            logger.warning("Base de notícias vazia ou inexistente: %s", caminho)
             return None
         return df
     except Exception as e:
@@ -94,52 +150,93 @@ def carregar_noticias_mapeadas(caminho: str) -> Optional[pd.DataFrame]:
 
 
 def agregar_sentimento_por_dia_ticker(df: pd.DataFrame) -> pd.DataFrame:
-    """Agrega score de sentimento por (data, ticker)."""
-    sentimento_map = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0}
-    df = df.copy()
-    df["score"] = df["sentimento_previsto"].map(sentimento_map).fillna(0)
-    df["data"] = pd.to_datetime(df["data_normalizada"])
-    df_exploded = df.explode("tickers_citados").dropna(subset=["tickers_citados"])
+    """Agrega score de sentimento por (data, ticker) de um DataFrame de notícias (mesma regra da tabela diária)."""
+    agg = agregar_noticias(df)
     return (
-        df_exploded.groupby([pd.Grouper(key="data", freq="D"), "tickers_citados"])["score"]
+        agg.groupby(["data", "ticker"], sort=True)["sentimento"]
         .sum()
         .reset_index()
+        .rename(columns={"ticker": "tickers_citados", "sentimento": "score"})
     )
 
 
-def noticias_por_data_ticker(df: pd.DataFrame) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+def sentimento_diario_recomendacao(caminho: str) -> pd.DataFrame:
+    """Sentimento por (data, ticker) da tabela materializada, nas colunas usadas em gerar_recomendacao."""
+    return carregar_sentimento_diario(caminho)[["data", "ticker", "sentimento"]].rename(
+        columns={"ticker": "tickers_citados", "sentimento": "score"}
+    )
+
+
+def _dias_das_noticias(df: pd.DataFrame) -> List[Optional[str]]:
+    """Dia AAAA-MM-DD de cada notícia (10 primeiros caracteres de data_normalizada)."""
+    return [v[:10] if isinstance(v, str) and len(v) >= 10 else None for v in df["data_normalizada"].tolist()]
+
+
+def indexar_noticias_por_data(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Índice dia -> posições (iloc) das notícias do dia. Montado uma vez, permite buscar as
+    evidências de qualquer data em O(notícias do dia) com noticias_por_data_ticker(..., indice=...).
+    """
+    dias = pd.Series(_dias_das_noticias(df))
+    return {dia: np.asarray(posicoes) for dia, posicoes in dias.groupby(dias, sort=False).indices.items()}
+
+
+def noticias_por_data_ticker(
+    df: pd.DataFrame,
+    datas: Optional[List[str]] = None,
+    indice: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
     """
     Retorna estrutura: (data_str -> ticker -> lista de {titulo, url, sentimento}).
     Data no formato YYYY-MM-DD para chave.
+
+    Args:
+        df: Notícias mapeadas.
+        datas: Se informado, só estas datas (filtradas antes de agrupar).
+        indice: Índice de indexar_noticias_por_data(df); evita percorrer df para achar as datas.
     """
-    df = df.copy()
-    df["data"] = pd.to_datetime(df["data_normalizada"]).dt.strftime("%Y-%m-%d")
-    df_exploded = df.explode("tickers_citados").dropna(subset=["tickers_citados"])
+    if datas is not None:
+        if indice is not None:
+            posicoes = [indice[d] for d in datas if d in indice]
+            df = df.iloc[np.concatenate(posicoes)] if posicoes else df.iloc[0:0]
+        else:
+            df = df[pd.Series(_dias_das_noticias(df), index=df.index).isin(datas)]
     out: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
-    for (data_str, ticker), grp in df_exploded.groupby(["data", "tickers_citados"]):
-        if data_str not in out:
-            out[data_str] = {}
-        out[data_str][ticker] = [
-            {
-                "titulo": row.get("title", ""),
-                "url": row.get("url", ""),
-                "sentimento": row.get("sentimento_previsto", ""),
-            }
-            for _, row in grp.iterrows()
-        ]
+    if df.empty:
+        return out
+    evidencias = pd.DataFrame({
+        "data": _dias_das_noticias(df),
+        "ticker": df["tickers_citados"].to_numpy(),
+        "titulo": df["title"].to_numpy() if "title" in df.columns else "",
+        "url": df["url"].to_numpy() if "url" in df.columns else "",
+        "sentimento": df["sentimento_previsto"].to_numpy() if "sentimento_previsto" in df.columns else "",
+    }).explode("ticker").dropna(subset=["data", "ticker"]).sort_values(["data", "ticker"], kind="stable")
+    registros = evidencias[["titulo", "url", "sentimento"]].to_dict("records")
+    for data_str, ticker, registro in zip(evidencias["data"].tolist(), evidencias["ticker"].tolist(), registros):
+        out.setdefault(data_str, {}).setdefault(ticker, []).append(registro)
     return out
 
 
+def escolher_data(df_sent: pd.DataFrame, data_alvo: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+    """(datas disponíveis AAAA-MM-DD em ordem, data usada: data_alvo se disponível, senão a última)."""
+    datas_disponiveis = sorted(df_sent["data"].dt.strftime("%Y-%m-%d").unique()) if not df_sent.empty else []
+    if not datas_disponiveis:
+        return [], None
+    return datas_disponiveis, data_alvo if data_alvo and data_alvo in datas_disponiveis else datas_disponiveis[-1]
+
+
 def gerar_recomendacao(
     df: pd.DataFrame,
     data_alvo: Optional[str] = None,
+    df_sent: Optional[pd.DataFrame] = None,
 ) -> Dict[str, Any]:
     """
     Gera recomendação para uma data (última disponível se data_alvo for None).
+    df_sent (data, tickers_citados, score) vem da tabela de sentimento diário; se None, é agregado de df.
     Retorna dict com: data_recomendacao, quando, por_quanto_tempo, investir, onde, por_que, resumo.
     """
-    df_sent = agregar_sentimento_por_dia_ticker(df)
-    noticias_por_dt = noticias_por_data_ticker(df)
+    if df_sent is None:
+        df_sent = agregar_sentimento_por_dia_ticker(df)
 
     if df_sent.empty:
         return {
@@ -153,7 +250,7 @@ def gerar_recomendacao(
             "erro": True,
         }
 
-    datas_disponiveis = sorted(df_sent["data"].dt.strftime("%Y-%m-%d").unique())
+    datas_disponiveis, data_uso = escolher_data(df_sent, data_alvo)
     if not datas_disponiveis:
         return {
             "data_recomendacao": datetime.now().isoformat(),
@@ -166,55 +263,20 @@ def gerar_recomendacao(
             "erro": True,
         }
 
-    data_uso = data_alvo if data_alvo and data_alvo in datas_disponiveis else datas_disponiveis[-1]
     linha = df_sent[df_sent["data"].dt.strftime("%Y-%m-%d") == data_uso]
+    # Evidências ("por quê") só da data usada
+    noticias_por_dt = noticias_por_data_ticker(df, datas=[data_uso])
 
-    # Decisão sempre por IA: RL (Q-Learning) ou modelo (Random Forest). Nunca regra fixa.
-    politica_rl = _carregar_politica_rl() if PREFERIR_RL else None
-    modelo_dec = _carregar_modelo_decisao() if not politica_rl else None
-
-    # Se não tem nem RL nem modelo, tenta treinar uma vez
-    if not politica_rl and not modelo_dec:
-        logger.info("Nenhum modelo nem política RL. Tentando treinar modelo (Random Forest)...")
-        try:
-            from treinar_modelo_decisao import run as run_treino
-            if run_treino():
-                modelo_dec = _carregar_modelo_decisao()
-        except Exception as e:
-            logger.warning("Falha ao treinar modelo: %s", e)
-        if not modelo_dec:
-            logger.info("Tentando treinar agente RL (Q-Learning)...")
-            try:
-                from rl_agente import run_treino as run_rl
-                if run_rl():
-                    politica_rl = _carregar_politica_rl()
-            except Exception as e:
-                logger.warning("Falha ao treinar RL: %s", e)
-
+    politica_rl, modelo_dec = _carregar_decisor()
     usar_rl = politica_rl is not None
-    usar_modelo = modelo_dec is not None and not usar_rl
-    if usar_rl:
-        logger.info("Usando agente RL (Q-Learning) para decidir compra/venda/segurar.")
-    elif usar_modelo:
-        logger.info("Usando modelo treinado (Random Forest / histórico sentimento → retorno) para decidir.")
-    else:
-        logger.warning("Sem modelo nem RL. Recomendações serão 'segurar' até rodar treinar_modelo_decisao.py e/ou rl_agente.py.")
+    usar_modelo = modelo_dec is not None
 
     investir: List[Dict[str, Any]] = []
     onde: List[str] = []
     por_que: Dict[str, List[Dict[str, Any]]] = {}
 
-    for _, row in linha.iterrows():
-        ticker = row["tickers_citados"]
-        score = float(row["score"])
-        if usar_rl and politica_rl:
-            acao = _decisao_rl(score, politica_rl)
-        elif usar_modelo and modelo_dec:
-            model, scaler = modelo_dec
-            acao = _decisao_com_modelo(score, model, scaler)
-        else:
-            acao = "segurar"
-
+    acoes = decidir_acoes(linha["score"].to_numpy(), politica_rl, modelo_dec)
+    for ticker, score, acao in zip(linha["tickers_citados"].tolist(), linha["score"].astype(float).tolist(), acoes):
         noticias_ticker = noticias_por_dt.get(data_uso, {}).get(ticker, [])
         investir.append({
             "ticker": ticker,
@@ -256,6 +318,95 @@ def gerar_recomendacao(
     }
 
 
+def _quantidade_noticias(df: pd.DataFrame) -> pd.Series:
+    """Número de notícias por (data AAAA-MM-DD, ticker), a mesma contagem das evidências."""
+    base = pd.DataFrame({"data": _dias_das_noticias(df), "ticker": df["tickers_citados"].to_numpy()})
+    base = base.explode("ticker").dropna(subset=["data", "ticker"])
+    return base.groupby(["data", "ticker"]).size()
+
+
+def gerar_recomendacoes(
+    df: pd.DataFrame,
+    datas: Optional[List[str]] = None,
+    df_sent: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Recomendações de várias datas de uma vez: agrega uma vez, carrega o decisor uma vez e decide
+    todas as linhas (data, ticker) numa única predição.
+
+    Args:
+        df: Notícias mapeadas (para a contagem de notícias por data/ticker).
+        datas: Datas AAAA-MM-DD desejadas; None usa todas as datas com sentimento.
+        df_sent: (data, tickers_citados, score) da tabela de sentimento diário; se None, é agregado de df.
+
+    Returns:
+        DataFrame com COLUNAS_HISTORICO, uma linha por (data, ticker), ordenado por data e ticker.
+    """
+    if df_sent is None:
+        df_sent = agregar_sentimento_por_dia_ticker(df)
+    if df_sent.empty:
+        return pd.DataFrame(columns=COLUNAS_HISTORICO)
+    linhas = pd.DataFrame({
+        "data": df_sent["data"].dt.strftime("%Y-%m-%d").to_numpy(),
+        "ticker": df_sent["tickers_citados"].to_numpy(),
+        "score": df_sent["score"].astype(float).to_numpy(),
+    })
+    if datas is not None:
+        linhas = linhas[linhas["data"].isin(datas)]
+    if linhas.empty:
+        return pd.DataFrame(columns=COLUNAS_HISTORICO)
+    linhas = linhas.sort_values(["data", "ticker"]).reset_index(drop=True)
+
+    politica_rl, modelo_dec = _carregar_decisor()
+    linhas["acao"] = decidir_acoes(linhas["score"].to_numpy(), politica_rl, modelo_dec)
+    quantidade = _quantidade_noticias(df) if not df.empty else pd.Series(dtype="int64")
+    chaves = pd.MultiIndex.from_arrays([linhas["data"], linhas["ticker"]])
+    linhas["quantidade_noticias"] = quantidade.reindex(chaves, fill_value=0).to_numpy().astype("int64")
+    linhas["usou_modelo_treinado"] = modelo_dec is not None
+    linhas["usou_rl"] = politica_rl is not None
+    return linhas[COLUNAS_HISTORICO]
+
+
+def salvar_historico_recomendacoes(
+    df_rec: pd.DataFrame, caminho: str = ARQUIVO_HISTORICO_RECOMENDACOES,
+) -> pd.DataFrame:
+    """
+    Grava recomendações no histórico (Parquet). Linhas de (data, ticker) já existentes são
+    substituídas pelas novas; as demais datas são mantidas.
+
+    Returns:
+        Histórico completo gravado.
+    """
+    partes = [df_rec[COLUNAS_HISTORICO]]
+    if os.path.exists(caminho):
+        anterior = pd.read_parquet(caminho)
+        partes.insert(0, anterior[~anterior["data"].isin(df_rec["data"].unique())])
+    partes = [p for p in partes if not p.empty]
+    historico = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_HISTORICO)
+    historico = historico.sort_values(["data", "ticker"]).reset_index(drop=True)
+    temporario = f"{caminho}.tmp-{uuid.uuid4().hex}"
+    historico.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+    logger.info("Histórico de recomendações: %d linha(s) em %s", len(historico), caminho)
+    return historico
+
+
+def carregar_historico_recomendacoes(
+    caminho: str = ARQUIVO_HISTORICO_RECOMENDACOES,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+) -> pd.DataFrame:
+    """Histórico de recomendações (COLUNAS_HISTORICO), opcionalmente só do período [data_inicio, data_fim]."""
+    if not os.path.exists(caminho):
+        return pd.DataFrame(columns=COLUNAS_HISTORICO)
+    historico = pd.read_parquet(caminho)
+    if data_inicio:
+        historico = historico[historico["data"] >= data_inicio]
+    if data_fim:
+        historico = historico[historico["data"] <= data_fim]
+    return historico.reset_index(drop=True)
+
+
 def salvar_recomendacao(recomendacao: Dict[str, Any], caminho: str) -> None:
     """Salva recomendação em JSON (serializando listas/dicts aninhados)."""
     def default(o: Any) -> Any:
@@ -283,17 +434,40 @@ def atualizar_status(campo: str, valor: str) -> None:
     logger.info("Status atualizado: %s = %s", campo, valor)
 
 
+def recomendar(data_alvo: Optional[str] = None, caminho: str = ARQUIVO_JSON_MAPEADAS) -> Optional[Dict[str, Any]]:
+    """
+    Recomendação para data_alvo (ou a última data disponível), sem gravar nada.
+
+    O sentimento vem da tabela diária e só as notícias do dia recomendado são lidas do Parquet,
+    então o custo não cresce com o tamanho do histórico. Retorna None se não houver dados.
+    """
+    df_sent = sentimento_diario_recomendacao(caminho)
+    _, data_uso = escolher_data(df_sent, data_alvo)
+    df = carregar_noticias_mapeadas(caminho, data_inicio=data_uso, data_fim=data_uso) if data_uso else None
+    if df is None:
+        return None
+    return gerar_recomendacao(df, data_alvo=data_uso, df_sent=df_sent)
+
+
 def run_recomendacao() -> bool:
     """
-    Carrega notícias mapeadas, gera recomendação, salva em ultima_recomendacao.json
+    Gera a recomendação da última data, salva em ultima_recomendacao.json (e no histórico)
     e atualiza status. Retorna True se gerou recomendação com sucesso.
     """
-    df = carregar_noticias_mapeadas(ARQUIVO_JSON_MAPEADAS)
-    if df is None:
+    return registrar_recomendacao(recomendar())
+
+
+def registrar_recomendacao(rec: Optional[Dict[str, Any]]) -> bool:
+    """
+    Salva a recomendação em ultima_recomendacao.json e no histórico e atualiza status.json.
+    rec None (sem dados) só atualiza o status. Retorna True se a recomendação não tem erro.
+    """
+    if rec is None:
         atualizar_status("ultima_recomendacao", datetime.now().isoformat() + " (sem dados)")
         return False
-    rec = gerar_recomendacao(df)
     salvar_recomendacao(rec, ARQUIVO_ULTIMA_RECOMENDACAO)
+    if rec["investir"]:
+        salvar_historico_recomendacoes(pd.DataFrame(rec["investir"]).assign(data=rec["quando"]))
     atualizar_status("ultima_recomendacao", rec["data_recomendacao"])
     return not rec.get("erro", True)
 
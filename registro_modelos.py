@@ -0,0 +1,146 @@
+"""
+Registro em memória dos artefatos de decisão (modelo joblib e política RL em JSON).
+
+Cada arquivo é carregado uma vez por processo e reutilizado enquanto não mudar. A cada acesso
+só é feito um `os.stat`: se tamanho e mtime forem os mesmos da última carga, o objeto em memória
+é devolvido; se mudaram, o conteúdo é lido e comparado pelo SHA-256 — arquivo regravado com o
+mesmo conteúdo (por exemplo, `touch` ou um treino que salvou o mesmo modelo) não é recarregado.
+Útil para o app Streamlit e para serviços que chamam a recomendação repetidas vezes.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import ARQUIVO_MODELO_DECISAO, ARQUIVO_POLITICA_RL
+
+logger = logging.getLogger(__name__)
+
+_TAMANHO_BLOCO = 1 << 20
+
+
+def _hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(_TAMANHO_BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class RegistroModelos:
+    """
+    Cache de objetos carregados de arquivos, chaveado por caminho + (tamanho, mtime) + hash do conteúdo.
+
+    Métricas por arquivo (ver `metricas`): cargas, acertos, tempo da última carga e total.
+    Seguro para uso entre threads (uma carga por vez).
+    """
+
+    def __init__(self) -> None:
+        self._entradas: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    def obter(self, caminho: str, carregador: Callable[[str], Any]) -> Optional[Any]:
+        """
+        Objeto de `caminho`, carregado com `carregador(caminho)` só se o arquivo mudou.
+
+        Args:
+            caminho: Arquivo do artefato.
+            carregador: Função que lê o arquivo e devolve o objeto (exceções são propagadas e
+                nada fica em cache).
+
+        Returns:
+            O objeto carregado, ou None se o arquivo não existir.
+        """
+        chave = os.path.abspath(caminho)
+        with self._lock:
+            try:
+                info = os.stat(chave)
+            except FileNotFoundError:
+                self._entradas.pop(chave, None)
+                return None
+            assinatura = (info.st_size, info.st_mtime_ns)
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada["assinatura"] == assinatura:
+                entrada["acertos"] += 1
+                return entrada["objeto"]
+
+            conteudo = _hash_arquivo(chave)
+            if entrada is not None and entrada["hash"] == conteudo:
+                entrada["assinatura"] = assinatura
+                entrada["acertos"] += 1
+                return entrada["objeto"]
+
+            inicio = time.perf_counter()
+            objeto = carregador(chave)
+            duracao = time.perf_counter() - inicio
+            anterior = entrada or {"cargas": 0, "acertos": 0, "tempo_total_s": 0.0}
+            self._entradas[chave] = {
+                "objeto": objeto,
+                "assinatura": assinatura,
+                "hash": conteudo,
+                "cargas": anterior["cargas"] + 1,
+                "acertos": anterior["acertos"],
+                "tempo_ultima_carga_s": duracao,
+                "tempo_total_s": anterior["tempo_total_s"] + duracao,
+                "carregado_em": time.time(),
+            }
+            logger.info(
+                "%s %s em %.3fs (sha256 %s).",
+                "Recarregado" if entrada else "Carregado", caminho, duracao, conteudo[:12],
+            )
+            return objeto
+
+    def metricas(self) -> Dict[str, Dict[str, Any]]:
+        """Por arquivo: hash, tamanho, mtime, cargas, acertos, tempo da última carga e total (s)."""
+        with self._lock:
+            return {
+                caminho: {
+                    "hash": e["hash"],
+                    "tamanho": e["assinatura"][0],
+                    "mtime_ns": e["assinatura"][1],
+                    "cargas": e["cargas"],
+                    "acertos": e["acertos"],
+                    "tempo_ultima_carga_s": e["tempo_ultima_carga_s"],
+                    "tempo_total_s": e["tempo_total_s"],
+                    "carregado_em": e["carregado_em"],
+                }
+                for caminho, e in self._entradas.items()
+            }
+
+    def limpar(self) -> None:
+        """Esquece todos os objetos carregados."""
+        with self._lock:
+            self._entradas.clear()
+
+
+# Registro do processo, compartilhado por recomendacao.py, criar_estrategia.py e o app Streamlit
+REGISTRO = RegistroModelos()
+
+
+def _ler_modelo_decisao(caminho: str) -> Tuple[Any, Any]:
+    import joblib
+    obj = joblib.load(caminho)
+    return (obj["model"], obj["scaler"])
+
+
+def _ler_json(caminho: str) -> Any:
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def carregar_modelo_decisao(caminho: str = ARQUIVO_MODELO_DECISAO) -> Optional[Tuple[Any, Any]]:
+    """(model, scaler) salvos por treinar_modelo_decisao.py, ou None se o arquivo não existir."""
+    return REGISTRO.obter(caminho, _ler_modelo_decisao)
+
+
+def carregar_politica_rl(caminho: str = ARQUIVO_POLITICA_RL) -> Optional[Dict[str, Any]]:
+    """Política Q-Learning salva por rl_agente.py (dict com "Q"), ou None se o arquivo não existir."""
+    return REGISTRO.obter(caminho, _ler_json)
+
+
+def metricas_registro() -> Dict[str, Dict[str, Any]]:
+    """Métricas de carga do registro do processo (ver RegistroModelos.metricas)."""
+    return REGISTRO.metricas()
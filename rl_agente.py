@@ -6,18 +6,20 @@ Ações: 0 = segurar, 1 = compra, 2 = venda.
 Recompensa: retorno do dia seguinte (se comprou e subiu = positivo; se vendeu e caiu = positivo; etc.).
 
 Uso:
-  - Treinar: python rl_agente.py  (usa noticias_mapeadas.json + yfinance, salva politica_rl_qlearning.json)
+  - Treinar: python rl_agente.py  (usa noticias_mapeadas + precos.get_prices, salva politica_rl_qlearning.json)
   - Recomendação: recomendacao.py carrega a política e usa action = argmax Q(estado, a)
 """
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
+from precos import get_prices
+from sentimento_diario import carregar_sentimento_diario
 from config import (
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_POLITICA_RL,
@@ -42,6 +44,8 @@ GAMMA = 0.95
 EPSILON_DECAY = 0.995
 MIN_EPSILON = 0.05
 EPISODIOS = 500
+# "sequencial": passo a passo (numba se instalado); "lote": episódio vetorizado (mais rápido, aproximado)
+MODO_TREINO = "sequencial"
 
 
 def _discretizar_sentimento(score: float) -> int:
@@ -65,23 +69,12 @@ def _recompensa(acao: int, retorno_dia_seguinte: float) -> float:
 
 
 def carregar_dados_treino(caminho: str) -> Optional[pd.DataFrame]:
-    """Monta DataFrame (data, ticker, sentimento, retorno_dia_seguinte) a partir de noticias_mapeadas + yfinance."""
-    if not os.path.exists(caminho):
-        return None
+    """Monta DataFrame (data, ticker, sentimento, retorno_dia_seguinte) a partir do sentimento diário (sentimento_diario.py) + preços (precos.py)."""
     try:
-        df = pd.read_json(caminho)
-        if df.empty or "sentimento_previsto" not in df.columns:
+        agg = carregar_sentimento_diario(caminho)
+        if agg.empty:
             return None
-        sentimento_map = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0}
-        df["score"] = df["sentimento_previsto"].map(sentimento_map).fillna(0)
-        df["data"] = pd.to_datetime(df["data_normalizada"]).dt.normalize()
-        df_exploded = df.explode("tickers_citados").dropna(subset=["tickers_citados"])
-        agg = (
-            df_exploded.groupby([pd.Grouper(key="data", freq="D"), "tickers_citados"])["score"]
-            .sum()
-            .reset_index()
-        )
-        agg.columns = ["data", "ticker", "sentimento"]
+        agg = agg[["data", "ticker", "sentimento"]]
     except Exception as e:
         logger.exception("Erro ao carregar dados: %s", e)
         return None
@@ -92,19 +85,10 @@ def carregar_dados_treino(caminho: str) -> Optional[pd.DataFrame]:
     start = pd.Timestamp(datas.min()) - pd.Timedelta(days=1)
     end = pd.Timestamp(datas.max()) + pd.Timedelta(days=5)
     tickers = agg["ticker"].unique().tolist()
-    logger.info("Baixando preços para %d tickers (RL)...", len(tickers))
-    precos = yf.download(tickers, start=start, end=end, repair=True, progress=False, threads=False)
-    if precos.empty or "Close" not in precos.columns:
+    logger.info("Obtendo preços para %d tickers (RL)...", len(tickers))
+    precos = get_prices(tickers, start, end, "Close")
+    if precos.empty:
         return None
-    if len(tickers) == 1:
-        close = precos["Close"]
-        if isinstance(close, pd.DataFrame):
-            close = close.iloc[:, 0]
-        precos = pd.DataFrame({tickers[0]: close})
-    else:
-        precos = precos["Close"]
-    if isinstance(precos, pd.Series):
-        precos = precos.to_frame()
 
     out = []
     for ticker in precos.columns:
@@ -122,50 +106,133 @@ def carregar_dados_treino(caminho: str) -> Optional[pd.DataFrame]:
     return df_merge
 
 
-def treinar_qlearning(df: pd.DataFrame) -> Dict[str, Any]:
+def _episodio_sequencial(Q, estados, recompensas, ordem, sorteios, acoes_sorteadas, epsilon, alpha):
+    """
+    Um episódio de Q-Learning passo a passo (a ação gulosa usa o Q já atualizado no episódio).
+    Escrito só com indexação simples para rodar tanto em Python puro (listas) quanto com numba.
+    """
+    for k in range(len(ordem)):
+        i = ordem[k]
+        s = estados[i]
+        if sorteios[k] < epsilon:
+            a = acoes_sorteadas[k]
+        else:
+            a = 0
+            melhor = Q[s][0]
+            for b in range(1, N_ACOES):
+                if Q[s][b] > melhor:
+                    melhor = Q[s][b]
+                    a = b
+        # TD(0) com target = recompensa (não há próximo estado no mesmo passo)
+        Q[s][a] = Q[s][a] + alpha * (recompensas[i][a] - Q[s][a])
+
+
+try:  # numba é opcional: se instalado, o episódio sequencial é compilado
+    from numba import njit
+
+    _episodio_sequencial_jit = njit(cache=True)(_episodio_sequencial)
+except ImportError:
+    _episodio_sequencial_jit = None
+
+
+def _episodio_lote(Q, estados, recompensas, ordem, sorteios, acoes_sorteadas, epsilon, alpha):
+    """
+    Um episódio vetorizado: as ações gulosas usam o Q do início do episódio e as atualizações
+    de cada célula (s, a) são aplicadas na forma fechada da sequência
+    Q <- Q + alpha * (r - Q), isto é, Q_k = (1-alpha)^k Q_0 + sum alpha (1-alpha)^(k-1-j) r_j.
+    """
+    s = estados[ordem]
+    gulosa = np.argmax(Q[s], axis=1)
+    a = np.where(sorteios < epsilon, acoes_sorteadas, gulosa)
+    r = recompensas[ordem, a]
+    celula = s * N_ACOES + a
+    n_celulas = N_BUCKETS * N_ACOES
+    contagem = np.bincount(celula, minlength=n_celulas)
+    # Posição de cada passo dentro da própria célula, na ordem do episódio
+    ordem_celula = np.argsort(celula, kind="stable")
+    inicio_grupo = np.cumsum(contagem) - contagem
+    posicao = np.empty(len(celula), dtype=np.int64)
+    posicao[ordem_celula] = np.arange(len(celula)) - np.repeat(inicio_grupo, contagem)
+    expoente = contagem[celula] - 1 - posicao
+    contribuicao = np.bincount(celula, weights=alpha * (1 - alpha) ** expoente * r, minlength=n_celulas)
+    Q[:] = (Q.ravel() * (1 - alpha) ** contagem + contribuicao).reshape(Q.shape)
+
+
+def treinar_qlearning(
+    df: pd.DataFrame, modo: str = MODO_TREINO, caminho: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Treina Q-Learning no histórico (sentimento, retorno_dia_seguinte).
     Cada linha é um passo: estado = discretizar(sentimento), reward = f(acao, retorno).
     Política aleatória para explorar (epsilon-greedy); atualiza Q(s,a).
+
+    Estados e recompensas são calculados uma vez em arrays; a tabela Q é um array
+    (N_BUCKETS x N_ACOES). O JSON salvo mantém o formato {"Q": {"s_a": valor}, ...}.
+
+    Args:
+        df: DataFrame com colunas sentimento e retorno_dia_seguinte.
+        modo: "sequencial" (passo a passo; compilado com numba se disponível) ou
+            "lote" (episódio inteiro vetorizado, gulosa com o Q do início do episódio).
+        caminho: Arquivo da política (padrão: config.ARQUIVO_POLITICA_RL).
     """
-    np.random.seed(RANDOM_SEED)
-    Q: Dict[Tuple[int, int], float] = {}
-    for s in range(N_BUCKETS):
-        for a in range(N_ACOES):
-            Q[(s, a)] = 0.0
+    if modo not in ("sequencial", "lote"):
+        raise ValueError(f"Modo de treino desconhecido: {modo!r}")
+    inicio = time.perf_counter()
+    rng = np.random.default_rng(RANDOM_SEED)
+    estados = discretizar_sentimentos(df["sentimento"].to_numpy(dtype=np.float64))
+    retornos = df["retorno_dia_seguinte"].to_numpy(dtype=np.float64)
+    # recompensas[i, a] = _recompensa(a, retorno_i)
+    recompensas = np.zeros((len(df), N_ACOES), dtype=np.float64)
+    recompensas[:, ACAO_COMPRAR] = retornos
+    recompensas[:, ACAO_VENDER] = -retornos
+    Q = np.zeros((N_BUCKETS, N_ACOES), dtype=np.float64)
+
+    if modo == "lote":
+        executar = _episodio_lote
+    elif _episodio_sequencial_jit is not None:
+        executar = _episodio_sequencial_jit
+    else:
+        executar = None  # Python puro sobre listas (indexação escalar mais rápida que em arrays)
+        Q_lista = Q.tolist()
+        estados_lista = estados.tolist()
+        recompensas_lista = recompensas.tolist()
 
     epsilon = 1.0
+    n = len(df)
     for ep in range(EPISODIOS):
-        df_ = df.sample(frac=1.0, random_state=RANDOM_SEED + ep).reset_index(drop=True)
-        for _, row in df_.iterrows():
-            sent = float(row["sentimento"])
-            ret = float(row["retorno_dia_seguinte"])
-            state = _discretizar_sentimento(sent)
-            # Escolha da ação (epsilon-greedy)
-            if np.random.random() < epsilon:
-                action = np.random.randint(0, N_ACOES)
-            else:
-                action = max(range(N_ACOES), key=lambda a: Q.get((state, a), 0.0))
-            reward = _recompensa(action, ret)
-            # Q(s,a) <- Q(s,a) + alpha * (r + gamma * max_a' Q(s',a') - Q(s,a))
-            # Aqui simplificamos: s' = state (não temos próximo estado no mesmo passo), então TD(0): target = r
-            target = reward
-            Q[(state, action)] = Q.get((state, action), 0.0) + ALPHA * (target - Q.get((state, action), 0.0))
+        ordem = rng.permutation(n)
+        sorteios = rng.random(n)
+        acoes_sorteadas = rng.integers(0, N_ACOES, n)
+        if executar is None:
+            _episodio_sequencial(
+                Q_lista, estados_lista, recompensas_lista, ordem.tolist(), sorteios.tolist(),
+                acoes_sorteadas.tolist(), epsilon, ALPHA,
+            )
+        else:
+            executar(Q, estados, recompensas, ordem, sorteios, acoes_sorteadas, epsilon, ALPHA)
         epsilon = max(MIN_EPSILON, epsilon * EPSILON_DECAY)
         if (ep + 1) % 100 == 0:
             logger.info("RL episódio %d, epsilon=%.3f", ep + 1, epsilon)
+    if executar is None:
+        Q = np.array(Q_lista, dtype=np.float64)
+    logger.info(
+        "Treino RL (%s%s): %d episódios x %d passos em %.2fs.",
+        modo, ", numba" if modo == "sequencial" and executar is not None else "",
+        EPISODIOS, n, time.perf_counter() - inicio,
+    )
 
     # Salvar Q como dict serializável (chave "s_a" -> valor)
     policy = {
-        "Q": {f"{s}_{a}": Q[(s, a)] for s in range(N_BUCKETS) for a in range(N_ACOES)},
+        "Q": {f"{s}_{a}": float(Q[s, a]) for s in range(N_BUCKETS) for a in range(N_ACOES)},
         "N_BUCKETS": N_BUCKETS,
         "N_ACOES": N_ACOES,
         "SENTIMENTO_MIN": SENTIMENTO_MIN,
         "SENTIMENTO_MAX": SENTIMENTO_MAX,
     }
-    with open(ARQUIVO_POLITICA_RL, "w", encoding="utf-8") as f:
+    path = caminho or ARQUIVO_POLITICA_RL
+    with open(path, "w", encoding="utf-8") as f:
         json.dump(policy, f, indent=2)
-    logger.info("Política RL (Q-Learning) salva em %s", ARQUIVO_POLITICA_RL)
+    logger.info("Política RL (Q-Learning) salva em %s", path)
     return policy
 
 
@@ -181,20 +248,35 @@ def carregar_politica(caminho: Optional[str] = None) -> Optional[Dict[str, Any]]
         return None
 
 
+def discretizar_sentimentos(scores: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de _discretizar_sentimento (mesmo bucket para cada elemento)."""
+    s = np.clip(np.asarray(scores, dtype=np.float64), SENTIMENTO_MIN, SENTIMENTO_MAX)
+    buckets = np.floor((s - SENTIMENTO_MIN) / (SENTIMENTO_MAX - SENTIMENTO_MIN) * (N_BUCKETS - 1))
+    return np.minimum(buckets.astype(np.int64), N_BUCKETS - 1)
+
+
+def tabela_acoes_rl(policy: Dict[str, Any]) -> np.ndarray:
+    """
+    Tabela bucket de sentimento -> melhor ação (argmax de Q; em empate, a menor ação).
+    Entradas ausentes na política valem 0.0.
+    """
+    Q = policy.get("Q", {})
+    q = np.array(
+        [[Q.get(f"{s}_{a}", 0.0) for a in range(N_ACOES)] for s in range(N_BUCKETS)], dtype=np.float64,
+    )
+    return np.argmax(q, axis=1)
+
+
+def acoes_rl(scores: np.ndarray, policy: Dict[str, Any]) -> np.ndarray:
+    """Ações (0=segurar, 1=compra, 2=venda) para um array de scores, sem loop em Python."""
+    return tabela_acoes_rl(policy)[discretizar_sentimentos(scores)]
+
+
 def acao_rl(score: float, policy: Dict[str, Any]) -> int:
     """
     Dado score de sentimento e política treinada, retorna ação: 0=segurar, 1=compra, 2=venda.
     """
-    Q = policy.get("Q", {})
-    state = _discretizar_sentimento(score)
-    best_a = 0
-    best_q = float("-inf")
-    for a in range(N_ACOES):
-        q = Q.get(f"{state}_{a}", 0.0)
-        if q > best_q:
-            best_q = q
-            best_a = a
-    return best_a
+    return int(tabela_acoes_rl(policy)[_discretizar_sentimento(score)])
 
 
 def acao_para_str(acao: int) -> str:
@@ -9,6 +9,9 @@ Faz:
   5. Recomendação (IA: Random Forest ou RL) → compra/venda/segurar → ultima_recomendacao.json
   6. Atualiza status.json
 
+Os passos 3-5 rodam no servico_recomendacao.py (FinBERT e spaCy já carregados) se ele estiver
+no ar; senão, no orquestrador.py dentro deste processo.
+
 Agende para rodar todo dia (ex.: 8h):
   - Windows: Agendador de Tarefas, ação: python rodar_todo_dia.py, iniciar em: pasta do projeto
   - Linux: crontab -e → 0 8 * * * cd /caminho/projeto && venv/bin/python rodar_todo_dia.py
@@ -19,14 +22,10 @@ Execute na raiz do projeto, com venv ativado:
 import json
 import logging
 import os
-import re
-import subprocess
-import sys
 from datetime import datetime, timedelta
-from typing import Any, List, Optional
-
-import dateparser
+from typing import Iterable, Iterator, List, Optional
 
+from coleta import executar_coleta
 from config import (
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_JSON_NOTICIAS,
@@ -34,33 +33,15 @@ from config import (
     SCRAPY_PROJECT_DIR,
     SPIDER_NAMES,
 )
+from datas import normalizar_data
+from leitor_noticias import iterar_noticias_brutas, salvar_noticias_brutas
+from orquestrador import executar_pipeline
+from servico_recomendacao import executar_no_servico
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
 
-# --- Normalização de data (para filtrar hoje/ontem) ---
-def _normalizar_data(data_str: Optional[Any]) -> Optional[str]:
-    if data_str is None or (isinstance(data_str, str) and not str(data_str).strip()):
-        return None
-    s = str(data_str).strip()
-    if not s:
-        return None
-    if s.isdigit():
-        try:
-            n = int(s)
-            sec = n / 1000.0 if len(s) == 13 else float(n)
-            if 946684800 < sec < 2524608000:
-                return datetime.fromtimestamp(sec).isoformat()
-        except Exception:
-            pass
-    try:
-        obj = dateparser.parse(s, languages=["pt"])
-        return obj.isoformat() if obj else None
-    except Exception:
-        return None
-
-
 def _data_entre_ontem_e_hoje(iso_date: Optional[str]) -> bool:
     """True se a data estiver entre início de ontem e fim de hoje (horário local)."""
     if not iso_date:
@@ -76,56 +57,16 @@ def _data_entre_ontem_e_hoje(iso_date: Optional[str]) -> bool:
         return True
 
 
-def _carregar_noticias_brutas(caminho: str) -> List[dict]:
-    if not os.path.exists(caminho):
-        return []
-    with open(caminho, "r", encoding="utf-8") as f:
-        conteudo = f.read()
-    if not conteudo.strip():
-        return []
-    blocos = re.findall(r"(\[.*?\])", conteudo, re.DOTALL)
-    lista = []
-    for bloco in blocos:
-        try:
-            lista.extend(json.loads(bloco))
-        except json.JSONDecodeError:
-            continue
-    return lista
+def _carregar_noticias_brutas(caminho: str) -> Iterator[dict]:
+    return iterar_noticias_brutas(caminho)
 
 
-def _filtrar_hoje_ontem(noticias: List[dict]) -> List[dict]:
+def _filtrar_hoje_ontem(noticias: Iterable[dict]) -> List[dict]:
     """Mantém apenas notícias com data de hoje ou ontem."""
-    return [n for n in noticias if _data_entre_ontem_e_hoje(_normalizar_data(n.get("date")))]
+    return [n for n in noticias if _data_entre_ontem_e_hoje(normalizar_data(n.get("date")))]
 
 
 # --- Execução dos passos ---
-def _run_scrapers(project_dir: str, spiders: List[str]) -> bool:
-    original = os.getcwd()
-    try:
-        os.chdir(project_dir)
-        for spider in spiders:
-            logger.info("Scraper: %s", spider)
-            subprocess.run(f"scrapy crawl {spider}", shell=True, check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.exception("Erro no scraper: %s", e)
-        return False
-    except FileNotFoundError:
-        logger.error("Comando 'scrapy' não encontrado.")
-        return False
-    finally:
-        os.chdir(original)
-
-
-def _run_script(nome: str) -> bool:
-    try:
-        subprocess.run([sys.executable, nome], check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.exception("Erro ao executar %s: %s", nome, e)
-        return False
-
-
 def _atualizar_status(campo: str, valor: str) -> None:
     status = {}
     if os.path.exists(ARQUIVO_STATUS):
@@ -146,7 +87,7 @@ def run() -> None:
     logger.info("=" * 60)
 
     # 1) Coleta (Scrapy)
-    ok = _run_scrapers(SCRAPY_PROJECT_DIR, SPIDER_NAMES)
+    ok = executar_coleta(SPIDER_NAMES, SCRAPY_PROJECT_DIR)["ok"]
     if not ok:
         logger.warning("Coleta falhou. Continuando com o que existir em %s.", ARQUIVO_JSON_NOTICIAS)
 
@@ -156,29 +97,19 @@ def run() -> None:
     noticias = _carregar_noticias_brutas(ARQUIVO_JSON_NOTICIAS)
     noticias = _filtrar_hoje_ontem(noticias)
     logger.info("Notícias de hoje/ontem: %d", len(noticias))
-    with open(ARQUIVO_JSON_NOTICIAS, "w", encoding="utf-8") as f:
-        json.dump(noticias, f, ensure_ascii=False, indent=2)
+    salvar_noticias_brutas(ARQUIVO_JSON_NOTICIAS, noticias)
 
+    # 3-5) Sentimento → tickers → recomendação: no servico_recomendacao.py, se estiver no ar
+    # (modelos já carregados), senão no orquestrador neste processo
     if not noticias:
         logger.info("Nenhuma notícia de hoje/ontem. Pulando análise (recomendação usa base existente).")
-    else:
-        # 3) Classificação de sentimento (FinBERT)
-        logger.info("Análise de sentimento...")
-        _run_script("analisar_noticias.py")
-        _atualizar_status("ultima_analise", datetime.now().isoformat())
-
-        # 4) Associar tickers
-        logger.info("Associando tickers...")
-        _run_script("associar_tickers.py")
-
-    # 5) Recomendação (IA: Random Forest ou RL → compra/venda/segurar)
-    logger.info("Gerando recomendação (IA)...")
-    try:
-        from recomendacao import run_recomendacao
-        run_recomendacao()
-        _atualizar_status("ultima_recomendacao", datetime.now().isoformat())
-    except Exception as e:
-        logger.warning("Recomendação: %s", e)
+    etapas = ["sentimento", "tickers", "recomendacao"] if noticias else ["recomendacao"]
+    relatorio = executar_no_servico(etapas)
+    if relatorio is None:
+        logger.info("Serviço de recomendação fora do ar. Executando as etapas neste processo.")
+        relatorio = executar_pipeline(etapas)
+    if not relatorio["ok"]:
+        logger.warning("Uma das etapas falhou: %s", relatorio["etapas"])
 
     logger.info("=" * 60)
     logger.info("ROTINA DIÁRIA CONCLUÍDA - %s", datetime.now().isoformat())
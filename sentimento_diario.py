@@ -0,0 +1,231 @@
+"""
+Tabela materializada de sentimento diário por (dia, ticker, fonte).
+
+Em vez de cada módulo refazer o explode + groupby sobre todo o histórico de notícias mapeadas,
+a agregação fica gravada em `sentimento_diario.parquet` e é atualizada de forma incremental:
+o estado guarda os arquivos do dataset Parquet de notícias (armazenamento.py) já agregados e,
+a cada atualização, só os dias das partes novas são recalculados. Partes alteradas ou removidas
+(por exemplo, depois de salvar_noticias reescrever a base) fazem o mês inteiro ser recalculado.
+
+O dia é o `dia` da base (10 primeiros caracteres de data_normalizada), o mesmo usado nas partições.
+"""
+import json
+import logging
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from armazenamento import COLUNA_DIA, COLUNA_MES, MES_SEM_DATA, garantir_dataset, impressao_dataset, ler_noticias
+from config import ARQUIVO_JSON_MAPEADAS, ARQUIVO_SENTIMENTO_DIARIO
+
+logger = logging.getLogger(__name__)
+
+MAPA_SCORE = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0}
+FONTE_DESCONHECIDA = "desconhecida"
+COLUNAS_NOTICIAS = ["data_normalizada", "sentimento_previsto", "tickers_citados", "source"]
+COLUNAS_TABELA = ["data", "ticker", "source", "sentimento", "quantidade", "media", "positivas", "negativas", "neutras"]
+COLUNAS_SOMA = ["sentimento", "quantidade", "positivas", "negativas", "neutras"]
+
+Impressao = Dict[str, List[int]]  # parte do dataset -> [tamanho, mtime_ns]
+
+
+def _caminho_estado(caminho_tabela: str) -> str:
+    return os.path.splitext(caminho_tabela)[0] + ".estado.json"
+
+
+def agregar_noticias(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega notícias mapeadas por (dia, ticker, fonte).
+
+    Args:
+        df: Notícias com data_normalizada, sentimento_previsto, tickers_citados e (opcional) source.
+
+    Returns:
+        DataFrame com COLUNAS_TABELA: soma dos scores (sentimento), número de notícias
+        (quantidade), média e contagem de positivas/negativas/neutras.
+    """
+    if df.empty or "tickers_citados" not in df.columns:
+        return pd.DataFrame(columns=COLUNAS_TABELA)
+    sentimento = df["sentimento_previsto"] if "sentimento_previsto" in df.columns else pd.Series(None, index=df.index)
+    fonte = df["source"] if "source" in df.columns else pd.Series(None, index=df.index)
+    base = pd.DataFrame({
+        "data": [v[:10] if isinstance(v, str) and len(v) >= 10 else None for v in df["data_normalizada"].tolist()],
+        "ticker": df["tickers_citados"].to_numpy(),
+        "source": fonte.fillna(FONTE_DESCONHECIDA).astype(str).to_numpy(),
+        "sentimento": sentimento.map(MAPA_SCORE).fillna(0).to_numpy(),
+        "positivas": (sentimento == "POSITIVE").to_numpy(),
+        "negativas": (sentimento == "NEGATIVE").to_numpy(),
+        "neutras": (sentimento == "NEUTRAL").to_numpy(),
+    })
+    base = base.explode("ticker").dropna(subset=["data", "ticker"])
+    if base.empty:
+        return pd.DataFrame(columns=COLUNAS_TABELA)
+    base["quantidade"] = 1
+    tabela = base.groupby(["data", "ticker", "source"], sort=True)[COLUNAS_SOMA].sum().reset_index()
+    tabela["data"] = pd.to_datetime(tabela["data"])
+    tabela["media"] = tabela["sentimento"] / tabela["quantidade"]
+    tabela[COLUNAS_SOMA] = tabela[COLUNAS_SOMA].astype("int64")
+    return tabela[COLUNAS_TABELA]
+
+
+def _mes_da_parte(relativo: str) -> Optional[str]:
+    prefixo = f"{COLUNA_MES}="
+    for pedaco in relativo.split(os.sep):
+        if pedaco.startswith(prefixo):
+            mes = pedaco[len(prefixo):]
+            return None if mes == MES_SEM_DATA else mes
+    return None
+
+
+def _dias_das_partes(diretorio: str, relativos: Iterable[str]) -> Set[str]:
+    """Dias presentes nas partes indicadas (só a coluna dia, gravada em cada parte, é lida)."""
+    caminhos = [os.path.join(diretorio, r) for r in relativos]
+    if not caminhos:
+        return set()
+    parte = ds.dataset(caminhos, format="parquet")
+    if COLUNA_DIA not in parte.schema.names:
+        return set()
+    dias = parte.to_table(columns=[COLUNA_DIA]).column(COLUNA_DIA).to_pylist()
+    return {d for d in dias if d}
+
+
+def _ler_estado(caminho_tabela: str) -> Optional[dict]:
+    caminho = _caminho_estado(caminho_tabela)
+    if not os.path.exists(caminho) or not os.path.exists(caminho_tabela):
+        return None
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Estado inválido da tabela de sentimento diário (%s). Ela será reconstruída.", e)
+        return None
+
+
+def _gravar(tabela: pd.DataFrame, estado: dict, caminho_tabela: str) -> None:
+    """Grava tabela e estado (arquivos temporários + os.replace)."""
+    temporario = f"{caminho_tabela}.tmp-{uuid.uuid4().hex}"
+    tabela.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho_tabela)
+    caminho_estado = _caminho_estado(caminho_tabela)
+    with open(caminho_estado + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(caminho_estado + ".tmp", caminho_estado)
+
+
+def _ler_tabela(caminho_tabela: str) -> pd.DataFrame:
+    if not os.path.exists(caminho_tabela):
+        return pd.DataFrame(columns=COLUNAS_TABELA)
+    return pd.read_parquet(caminho_tabela)
+
+
+def _dias_para_recalcular(diretorio: str, anteriores: Impressao, atuais: Impressao) -> Tuple[Set[str], Set[str], int]:
+    """(dias tocados por partes novas ou alteradas, meses de partes alteradas ou removidas, nº de partes)."""
+    novas = [r for r in atuais if r not in anteriores]
+    mudadas = [r for r, info in anteriores.items() if r in atuais and atuais[r] != info]
+    removidas = [r for r in anteriores if r not in atuais]
+    meses = {m for m in map(_mes_da_parte, mudadas + removidas) if m}
+    return _dias_das_partes(diretorio, novas + mudadas), meses, len(novas) + len(mudadas) + len(removidas)
+
+
+def _recalcular(arquivo_json: str, dias: Set[str], meses: Set[str]) -> pd.DataFrame:
+    """Agrega de novo só os dias indicados e os meses inteiros indicados (uma leitura filtrada por mês)."""
+    intervalos: Dict[str, Tuple[str, str]] = {m: (f"{m}-01", f"{m}-31") for m in meses}
+    for dia in sorted(dias):
+        mes = dia[:7]
+        if mes not in meses:
+            ini, fim = intervalos.get(mes, (dia, dia))
+            intervalos[mes] = (min(ini, dia), max(fim, dia))
+    partes = []
+    for mes, (ini, fim) in sorted(intervalos.items()):
+        agregado = agregar_noticias(ler_noticias(arquivo_json, COLUNAS_NOTICIAS, data_inicio=ini, data_fim=fim))
+        if agregado.empty:
+            continue
+        chave = agregado["data"].dt.strftime("%Y-%m-%d")
+        partes.append(agregado[chave.isin(dias) | chave.str[:7].isin(meses)])
+    partes = [p for p in partes if not p.empty]
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_TABELA)
+
+
+def atualizar_sentimento_diario(
+    arquivo_json: str = ARQUIVO_JSON_MAPEADAS,
+    caminho_tabela: str = ARQUIVO_SENTIMENTO_DIARIO,
+    reconstruir: bool = False,
+) -> pd.DataFrame:
+    """
+    Atualiza a tabela materializada só nos dias tocados desde a última atualização.
+
+    Args:
+        arquivo_json: Base de notícias mapeadas (JSON lógico do armazenamento).
+        caminho_tabela: Parquet da tabela agregada.
+        reconstruir: Se True, recalcula todo o histórico.
+
+    Returns:
+        Tabela completa (COLUNAS_TABELA), ordenada por data, ticker e fonte.
+    """
+    diretorio = garantir_dataset(arquivo_json)
+    atuais = impressao_dataset(diretorio)
+    estado = None if reconstruir else _ler_estado(caminho_tabela)
+    if estado is not None and estado.get("base") != os.path.abspath(diretorio):
+        estado = None
+
+    if estado is None:
+        logger.info("Construindo tabela de sentimento diário a partir de '%s'...", diretorio)
+        tabela = agregar_noticias(ler_noticias(arquivo_json, COLUNAS_NOTICIAS))
+    else:
+        anteriores: Impressao = estado.get("arquivos", {})
+        if anteriores == atuais:
+            return _ler_tabela(caminho_tabela)
+        dias, meses, n_partes = _dias_para_recalcular(diretorio, anteriores, atuais)
+        tabela = _ler_tabela(caminho_tabela)
+        chave = pd.to_datetime(tabela["data"]).dt.strftime("%Y-%m-%d")
+        afetados = chave.isin(dias) | chave.str[:7].isin(meses)
+        novos = _recalcular(arquivo_json, dias, meses)
+        logger.info(
+            "Sentimento diário: %d parte(s) nova(s)/alterada(s); %d dia(s) e %d mês(es) recalculados.",
+            n_partes, len(dias), len(meses),
+        )
+        partes = [t for t in (tabela[~afetados], novos) if not t.empty]
+        tabela = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_TABELA)
+
+    tabela = tabela.sort_values(["data", "ticker", "source"]).reset_index(drop=True)
+    _gravar(tabela, {"base": os.path.abspath(diretorio), "arquivos": atuais}, caminho_tabela)
+    return tabela
+
+
+def carregar_sentimento_diario(
+    arquivo_json: str = ARQUIVO_JSON_MAPEADAS,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+    por_fonte: bool = False,
+    caminho_tabela: str = ARQUIVO_SENTIMENTO_DIARIO,
+) -> pd.DataFrame:
+    """
+    Sentimento diário por (data, ticker), lido da tabela materializada (atualizada antes, se preciso).
+
+    Args:
+        arquivo_json: Base de notícias mapeadas.
+        data_inicio: Data mínima "AAAA-MM-DD" (inclusive).
+        data_fim: Data máxima "AAAA-MM-DD" (inclusive).
+        por_fonte: Se True, mantém uma linha por fonte (coluna source).
+        caminho_tabela: Parquet da tabela agregada.
+
+    Returns:
+        DataFrame com data (datetime, meia-noite), ticker, [source,] sentimento (soma dos scores),
+        quantidade, media, positivas, negativas e neutras.
+    """
+    tabela = atualizar_sentimento_diario(arquivo_json, caminho_tabela)
+    if data_inicio:
+        tabela = tabela[tabela["data"] >= pd.Timestamp(data_inicio)]
+    if data_fim:
+        tabela = tabela[tabela["data"] <= pd.Timestamp(data_fim)]
+    if por_fonte:
+        return tabela.reset_index(drop=True)
+    if tabela.empty:
+        return pd.DataFrame(columns=[c for c in COLUNAS_TABELA if c != "source"])
+    agregada = tabela.groupby(["data", "ticker"], sort=True)[COLUNAS_SOMA].sum().reset_index()
+    agregada["media"] = agregada["sentimento"] / agregada["quantidade"]
+    return agregada[[c for c in COLUNAS_TABELA if c != "source"]]
+
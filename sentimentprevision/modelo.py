@@ -1,31 +1,23 @@
-from transformers import AutoTokenizer, BertForSequenceClassification
-import torch
-import numpy as np
+import os
+import sys
+
 import pandas as pd
 
-df = pd.read_csv('base-sentimentos.csv')
+# Permite importar o motor de inferência da raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-df = df[df['sentiment'] != 'Não se aplica'].reset_index(drop=True)
+from inferencia_sentimento import MotorInferenciaFinBERT
 
-pred_mapper = {
-    0: "POSITIVE",
-    1: "NEGATIVE",
-    2: "NEUTRAL"
-}
+df = pd.read_csv('base-sentimentos.csv')
 
-tokenizer = AutoTokenizer.from_pretrained("lucas-leme/FinBERT-PT-BR")
-model = BertForSequenceClassification.from_pretrained("lucas-leme/FinBERT-PT-BR")
+df = df[df['sentiment'] != 'Não se aplica'].reset_index(drop=True)
 
-def prever_sentimento(texto):
-    inputs = tokenizer(texto, return_tensors="pt", padding=True, truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    logits = outputs.logits
-    prediction = np.argmax(logits.numpy())
-    return pred_mapper[prediction]
+motor = MotorInferenciaFinBERT("lucas-leme/FinBERT-PT-BR")
 
-df['sentimento_previsto'] = df['text'].apply(prever_sentimento)
+resultados = motor.classificar(df['text'].tolist())
+df['sentimento_previsto'] = [r['sentimento'] for r in resultados]
+df['probabilidades'] = [r['probabilidades'] for r in resultados]
 
 df.to_csv('resultados_com_sentimento.csv', index=False)
 
-print("Classificação concluída! Resultado salvo como 'resultados_com_sentimento.csv'.")
+print(f"Classificação concluída ({motor.ultima_taxa:.1f} artigos/s)! Resultado salvo como 'resultados_com_sentimento.csv'.")
@@ -0,0 +1,262 @@
+"""
+Serviço local de recomendação: mantém FinBERT, spaCy e o decisor (modelo/RL) carregados em memória
+e atende a rotina diária por HTTP, em vez de cada execução abrir subprocessos que recarregam os modelos.
+
+Endpoints (JSON, apenas em SERVICO_HOST:SERVICO_PORTA):
+  GET  /saude       → status, modelos já carregados e métricas do registro_modelos
+  POST /classificar → {"textos": [...]} → sentimento e probabilidades por texto
+  POST /mapear      → {"textos": [...]} → empresas (NER ou matcher, ver MOTOR_MAPEAMENTO) e tickers por texto
+  POST /recomendar  → {"data": "AAAA-MM-DD" (opcional), "salvar": false} → recomendação
+  POST /executar    → {"etapas": ["sentimento", "tickers", "recomendacao"]} → etapas do orquestrador.py
+
+Uso:
+  python servico_recomendacao.py          (deixe rodando; rodar_todo_dia.py usa o serviço se estiver no ar)
+"""
+import json
+import logging
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from config import MOTOR_MAPEAMENTO, SERVICO_HOST, SERVICO_PORTA
+from registro_modelos import REGISTRO, metricas_registro
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+# Etapas do orquestrador.py aceitas em /executar (a coleta fica com a rotina diária)
+ETAPAS = ["sentimento", "tickers", "precos", "recomendacao"]
+# Etapas podem levar minutos (coleta grande); a verificação de saúde deve responder logo
+TIMEOUT_SAUDE_S = 1.0
+TIMEOUT_ETAPAS_S = 3600.0
+
+
+class ServicoRecomendacao:
+    """
+    Recursos carregados uma vez (sob demanda) e compartilhados entre requisições.
+
+    Args:
+        motor: Motor FinBERT já carregado (opcional; senão é criado na primeira classificação).
+        nlp: Modelo spaCy já carregado (opcional; senão é carregado no primeiro mapeamento).
+        mapa_tickers: Mapa empresa -> ticker (opcional; senão vem do registro_modelos e é
+            relido quando mapeamento_tickers.json muda).
+    """
+
+    def __init__(self, motor: Any = None, nlp: Any = None, mapa_tickers: Optional[dict] = None) -> None:
+        self._motor = motor
+        self._nlp = nlp
+        self._mapa_tickers = mapa_tickers
+        self._lock_finbert = threading.Lock()
+        self._lock_spacy = threading.Lock()
+        # Etapas do pipeline gravam as bases: uma por vez
+        self._lock_etapas = threading.Lock()
+        self.inicio = datetime.now().isoformat()
+        self.requisicoes = 0
+
+    def motor(self) -> Any:
+        if self._motor is None:
+            from config import FINBERT_MODEL_NAME
+            from inferencia_sentimento import MotorInferenciaFinBERT
+            inicio = time.perf_counter()
+            self._motor = MotorInferenciaFinBERT(FINBERT_MODEL_NAME)
+            logger.info("FinBERT carregado em %.1fs.", time.perf_counter() - inicio)
+        return self._motor
+
+    def nlp(self) -> Any:
+        if self._nlp is None:
+            from associar_tickers import carregar_modelo_spacy
+            inicio = time.perf_counter()
+            self._nlp = carregar_modelo_spacy()
+            logger.info("spaCy carregado em %.1fs.", time.perf_counter() - inicio)
+        return self._nlp
+
+    def mapa_tickers(self) -> dict:
+        if self._mapa_tickers is not None:
+            return self._mapa_tickers
+        from associar_tickers import MAPA_TICKERS_ARQ, carregar_mapa_tickers
+        return REGISTRO.obter(MAPA_TICKERS_ARQ, carregar_mapa_tickers) or {}
+
+    def aquecer(self) -> None:
+        """Carrega FinBERT e spaCy (só no motor de mapeamento "ner") antes da primeira requisição."""
+        with self._lock_finbert:
+            self.motor()
+        if MOTOR_MAPEAMENTO == "ner":
+            with self._lock_spacy:
+                self.nlp()
+
+    def saude(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "inicio": self.inicio,
+            "requisicoes": self.requisicoes,
+            "carregados": {"finbert": self._motor is not None, "spacy": self._nlp is not None},
+            "modelos": metricas_registro(),
+        }
+
+    def classificar(self, textos: List[Optional[str]]) -> Dict[str, Any]:
+        with self._lock_finbert:
+            motor = self.motor()
+            resultados = motor.classificar(textos)
+        return {"resultados": resultados, "artigos_por_s": getattr(motor, "ultima_taxa", None)}
+
+    def mapear(self, textos: List[Optional[str]]) -> Dict[str, Any]:
+        from associar_tickers import extrair_empresas_motor, indice_do_mapa, mapa_do_motor, mapear_tickers
+        mapa = self.mapa_tickers()
+        with self._lock_spacy:
+            nlp = self.nlp() if MOTOR_MAPEAMENTO == "ner" else None
+            empresas = extrair_empresas_motor(textos, MOTOR_MAPEAMENTO, nlp, mapa)
+        mapa = mapa_do_motor(mapa, MOTOR_MAPEAMENTO)
+        indice = indice_do_mapa(mapa)
+        return {"resultados": [{"empresas": e, "tickers": mapear_tickers(e, mapa, indice)} for e in empresas]}
+
+    def recomendar(self, data: Optional[str] = None, salvar: bool = False) -> Dict[str, Any]:
+        from recomendacao import recomendar, run_recomendacao
+        if salvar:
+            with self._lock_etapas:
+                return {"ok": run_recomendacao()}
+        rec = recomendar(data)
+        return rec if rec is not None else {"erro": True, "resumo": "Sem notícias mapeadas."}
+
+    def executar(self, etapas: List[str]) -> Dict[str, Any]:
+        """Roda as etapas pedidas no orquestrador.py, com os modelos já carregados."""
+        from orquestrador import executar_pipeline
+        desconhecidas = [e for e in etapas if e not in ETAPAS]
+        if desconhecidas:
+            raise ValueError(f"Etapas desconhecidas: {desconhecidas}. Válidas: {ETAPAS}")
+        with self._lock_etapas, self._lock_finbert, self._lock_spacy:
+            return executar_pipeline(
+                etapas,
+                motor=self.motor() if "sentimento" in etapas else None,
+                nlp=self.nlp() if "tickers" in etapas and MOTOR_MAPEAMENTO == "ner" else None,
+                mapa_tickers=self.mapa_tickers() if "tickers" in etapas else None,
+            )
+
+
+def _manipulador(servico: ServicoRecomendacao) -> type:
+    """Classe de handler HTTP ligada a `servico`."""
+    rotas_post: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+        "/classificar": lambda d: servico.classificar(d["textos"]),
+        "/mapear": lambda d: servico.mapear(d["textos"]),
+        "/recomendar": lambda d: servico.recomendar(d.get("data"), bool(d.get("salvar", False))),
+        "/executar": lambda d: servico.executar(d.get("etapas", ["sentimento", "tickers", "recomendacao"])),
+    }
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def _responder(self, codigo: int, corpo: Dict[str, Any]) -> None:
+            dados = json.dumps(corpo, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/saude":
+                self._responder(200, servico.saude())
+            else:
+                self._responder(404, {"erro": f"Rota desconhecida: {self.path}"})
+
+        def do_POST(self) -> None:
+            rota = rotas_post.get(self.path.rstrip("/"))
+            if rota is None:
+                self._responder(404, {"erro": f"Rota desconhecida: {self.path}"})
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                dados = json.loads(self.rfile.read(tamanho) or b"{}")
+                if not isinstance(dados, dict):
+                    raise ValueError("O corpo deve ser um objeto JSON.")
+            except ValueError as e:
+                self._responder(400, {"erro": f"JSON inválido: {e}"})
+                return
+            inicio = time.perf_counter()
+            servico.requisicoes += 1
+            try:
+                resposta = rota(dados)
+            except (KeyError, TypeError, ValueError) as e:
+                self._responder(400, {"erro": str(e)})
+                return
+            except (Exception, SystemExit) as e:
+                logger.exception("Erro em %s: %s", self.path, e)
+                self._responder(500, {"erro": str(e)})
+                return
+            logger.info("%s em %.3fs.", self.path, time.perf_counter() - inicio)
+            self._responder(200, resposta)
+
+        def log_message(self, formato: str, *args: Any) -> None:
+            logger.debug("%s - %s", self.address_string(), formato % args)
+
+    return Manipulador
+
+
+def criar_servidor(
+    servico: Optional[ServicoRecomendacao] = None, host: str = SERVICO_HOST, porta: int = SERVICO_PORTA,
+) -> ThreadingHTTPServer:
+    """Servidor HTTP (uma thread por requisição) para `servico`. Porta 0 escolhe uma porta livre."""
+    return ThreadingHTTPServer((host, porta), _manipulador(servico or ServicoRecomendacao()))
+
+
+# --- Cliente (usado por rodar_todo_dia.py e main.py) ---
+
+def url_servico(host: str = SERVICO_HOST, porta: int = SERVICO_PORTA) -> str:
+    return f"http://{host}:{porta}"
+
+
+def chamar_servico(
+    rota: str, dados: Optional[Dict[str, Any]] = None, url: Optional[str] = None, timeout: float = TIMEOUT_ETAPAS_S,
+) -> Dict[str, Any]:
+    """
+    GET (dados=None) ou POST JSON em `rota` do serviço.
+
+    Raises:
+        OSError: Serviço fora do ar ou resposta de erro (urllib.error.URLError/HTTPError).
+    """
+    corpo = None if dados is None else json.dumps(dados).encode("utf-8")
+    requisicao = urllib.request.Request(
+        (url or url_servico()) + rota, data=corpo, headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+        return json.loads(resposta.read())
+
+
+def servico_disponivel(url: Optional[str] = None, timeout: float = TIMEOUT_SAUDE_S) -> bool:
+    """True se o serviço respondeu ao /saude."""
+    try:
+        return chamar_servico("/saude", url=url, timeout=timeout).get("status") == "ok"
+    except (OSError, ValueError):
+        return False
+
+
+def executar_no_servico(etapas: List[str], url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Roda as etapas no serviço, se ele estiver no ar.
+
+    Returns:
+        Relatório {"etapas": [...], "ok": bool}, ou None se o serviço não estiver disponível ou
+        falhar com erro (quem chama roda as etapas no próprio processo; as etapas podem
+        ser repetidas: o orquestrador só grava no fim e pula etapas com entradas inalteradas).
+    """
+    if not servico_disponivel(url):
+        return None
+    try:
+        return chamar_servico("/executar", {"etapas": etapas}, url=url)
+    except (OSError, ValueError) as e:
+        logger.warning("Serviço falhou nas etapas %s: %s", etapas, e)
+        return None
+
+
+if __name__ == "__main__":
+    servico = ServicoRecomendacao()
+    logger.info("Aquecendo modelos (FinBERT e spaCy)...")
+    servico.aquecer()
+    servidor = criar_servidor(servico)
+    logger.info("Serviço de recomendação em %s", url_servico(*servidor.server_address[:2]))
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Encerrando serviço.")
+    finally:
+        servidor.server_close()
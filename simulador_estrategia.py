@@ -1,51 +1,281 @@
-import json
+import multiprocessing
+import numpy as np
 import pandas as pd
-import yfinance as yf
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
 import os
+import time
+
+from armazenamento import ler_noticias
+from precos import get_prices
+from scripts.avaliacao_metricas import resumo_metricas
 
 """compra e venda baseado no sentimento só
     gera os csvs da pasta resultados_simulação e os expõe no app streamlit na página simulador_1
 """
 
-def carregar_e_processar_sentimentos(caminho_arquivo, ticker_alvo): # <-- Adicione aqui
-    with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-        noticias = json.load(f)
-        
-    registros = []
-    for noti in noticias:
-        texto = noti.get('texto_completo', noti.get('titulo', '')).strip()
-        tickers = noti.get('tickers_citados', []) 
-        
-        # Agora ele filtra dinamicamente o ticker que você pedir!
-        if ticker_alvo in tickers:
-            data = noti.get('data_normalizada')
-            if data:
-                registros.append({
-                    'data': pd.to_datetime(data).date(), 
-                    'sentimento': noti.get('sentimento_previsto'),
-                    'texto': texto
-                })
-                
-    df = pd.DataFrame(registros)
+MAPA_SCORE = {'POSITIVE': 1, 'NEGATIVE': -1, 'NEUTRAL': 0}
+COLUNAS_RESULTADO = [
+    'Data', 'Sentimento', 'Decisão', 'Preço Unitário', 'Qtd. Ações', 'Valor Investido',
+    'Caixa Livre', 'Patrimônio Total', 'Lucro/Prejuízo', 'Resumo da Notícia',
+]
+# Códigos das decisões da máquina de estados (índice em DECISOES)
+NENHUMA, COMPRA, VENDA, MANTIDO_COMPRADO, MANTIDO_ZERADO = range(5)
+DECISOES = np.array(["NENHUMA", "COMPRA", "VENDA", "MANTIDO (Comprado)", "MANTIDO (Zerado)"], dtype=object)
+
+# Resultados consolidados (lidos de uma vez pela página simulador_1)
+PASTA_RESULTADOS = 'resultados_simulacao'
+ARQUIVO_OPERACOES = 'simulacoes.parquet'
+ARQUIVO_PATRIMONIO = 'patrimonio.parquet'
+ARQUIVO_RESUMO = 'resumo_simulacoes.csv'
+# Processos do backtest em lote (None = automático; 1 = no processo atual). No automático só
+# abre processos a partir de MIN_TICKERS_PARALELO tickers: cada ticker leva poucos ms e
+# iniciar os processos (spawn) custa alguns segundos.
+N_PROCESSOS = None
+MIN_TICKERS_PARALELO = 200
+
+
+def agregar_sentimentos_por_ticker(caminho_arquivo):
+    """
+    Lê a base de notícias uma única vez e agrega o sentimento por (ticker, dia) de todos os tickers.
+    Mesmas regras de carregar_e_processar_sentimentos: soma dos scores, textos unidos com ' | '.
+    """
+    df = ler_noticias(
+        caminho_arquivo, ['texto_completo', 'tickers_citados', 'data_normalizada', 'sentimento_previsto']
+    )
+    if df.empty or 'tickers_citados' not in df.columns or 'data_normalizada' not in df.columns:
+        return pd.DataFrame(columns=['ticker', 'data', 'valor', 'texto', 'sentimento_dia'])
+
+    texto = df['texto_completo'] if 'texto_completo' in df.columns else pd.Series('', index=df.index)
+    sentimento = df['sentimento_previsto'] if 'sentimento_previsto' in df.columns else pd.Series(None, index=df.index)
+    base = pd.DataFrame({
+        'ticker': df['tickers_citados'],
+        'data': pd.to_datetime(df['data_normalizada'], format='mixed', errors='coerce').dt.date,
+        'valor': sentimento.map(MAPA_SCORE),
+        'texto': texto.fillna('').astype(str).str.strip(),
+    })
+    # Uma linha por (notícia, ticker); ticker repetido na mesma notícia conta uma vez
+    base = base.explode('ticker').dropna(subset=['ticker', 'data'])
+    base = base[~base.reset_index().duplicated(['index', 'ticker']).to_numpy()]
+
+    df_agrupado = base.groupby(['ticker', 'data'], sort=True).agg(
+        valor=('valor', 'sum'), texto=('texto', ' | '.join)
+    ).reset_index()
+    df_agrupado['sentimento_dia'] = np.select(
+        [df_agrupado['valor'] > 0, df_agrupado['valor'] < 0], ['POSITIVO', 'NEGATIVO'], 'NEUTRO'
+    )
+    return df_agrupado
+
+
+def carregar_e_processar_sentimentos(caminho_arquivo, ticker_alvo, df_agregado=None):
+    """Sentimento diário de um ticker. Com df_agregado (de agregar_sentimentos_por_ticker) não relê a base."""
+    if df_agregado is None:
+        df_agregado = agregar_sentimentos_por_ticker(caminho_arquivo)
+    df = df_agregado[df_agregado['ticker'] == ticker_alvo]
     if df.empty:
         raise ValueError(f"Nenhuma notícia encontrada para {ticker_alvo} no dataset.")
-        
-    mapa_score = {'POSITIVE': 1, 'NEGATIVE': -1, 'NEUTRAL': 0}
-    df['valor'] = df['sentimento'].map(mapa_score)
-    
-    df_agrupado = df.groupby('data').agg({
-        'valor': 'sum',
-        'texto': lambda x: ' | '.join(x)
-    }).reset_index()
-    
-    def define_sentimento(v):
-        if v > 0: return 'POSITIVO'
-        elif v < 0: return 'NEGATIVO'
-        return 'NEUTRO'
-        
-    df_agrupado['sentimento_dia'] = df_agrupado['valor'].apply(define_sentimento)
-    return df_agrupado.sort_values('data')
+    return df.drop(columns='ticker').sort_values('data').reset_index(drop=True)
+
+
+def simular_posicao(scores, precos_execucao, capital_inicial):
+    """
+    Máquina de estados comprado/zerado sobre arrays já alinhados aos pregões de execução.
+
+    Score positivo compra com todo o caixa (se zerado); negativo vende tudo (se comprado).
+
+    Returns:
+        Tupla (decisoes, quantidades, caixa, lucro) com um valor por evento.
+    """
+    n = len(scores)
+    decisoes = np.full(n, NENHUMA, dtype=np.int8)
+    quantidades = np.zeros(n, dtype=np.int64)
+    caixa = np.empty(n, dtype=float)
+    lucro = np.full(n, np.nan)
+
+    capital_caixa = float(capital_inicial)
+    quantidade_acoes = 0
+    preco_compra = 0.0
+    for i, (score, preco) in enumerate(zip(scores.tolist(), precos_execucao.tolist())):
+        if score > 0:
+            if quantidade_acoes == 0:
+                quantidade_acoes = int(capital_caixa // preco)
+                if quantidade_acoes > 0:
+                    capital_caixa -= quantidade_acoes * preco
+                    preco_compra = preco
+                    decisoes[i] = COMPRA
+            else:
+                decisoes[i] = MANTIDO_COMPRADO
+        elif quantidade_acoes > 0:
+            valor_venda = quantidade_acoes * preco
+            lucro[i] = valor_venda - quantidade_acoes * preco_compra
+            capital_caixa += valor_venda
+            quantidade_acoes = 0
+            decisoes[i] = VENDA
+        else:
+            decisoes[i] = MANTIDO_ZERADO
+        quantidades[i] = quantidade_acoes
+        caixa[i] = capital_caixa
+    return decisoes, quantidades, caixa, lucro
+
+
+def _arredondar(valores):
+    # round() do Python (e não np.round) para manter os mesmos valores dos CSVs já gerados
+    return [round(v, 2) for v in valores.tolist()]
+
+
+def executar_backtest(df_sentimentos, ticker='PETR4.SA', capital_inicial=10000.0, cotacoes=None):
+    """
+    Backtest da estratégia de sentimento: executa no preço de abertura do primeiro pregão
+    estritamente posterior ao dia da notícia. `cotacoes` (Series de 'Open' indexada por data)
+    evita uma consulta de preços por ticker quando a matriz de preços já foi carregada.
+    """
+    if cotacoes is None:
+        data_inicio = df_sentimentos['data'].min()
+        data_fim = df_sentimentos['data'].max() + pd.Timedelta(days=15)
+        # Preços de abertura ('Open') da base local (só baixa o período que falta)
+        cotacoes = get_prices([ticker], data_inicio, data_fim, 'Open')[ticker].dropna()
+
+    datas_pregao = cotacoes.index.values.astype('datetime64[D]')
+    precos = cotacoes.to_numpy(dtype=float)
+    datas_noticia = pd.to_datetime(df_sentimentos['data']).values.astype('datetime64[D]')
+    scores = df_sentimentos['valor'].to_numpy(dtype=float)
+
+    # Próximo pregão estritamente depois do dia da notícia; dias neutros ou sem pregão futuro são ignorados
+    idx_pregao = np.searchsorted(datas_pregao, datas_noticia, side='right')
+    validos = (scores != 0) & (idx_pregao < len(datas_pregao))
+    if not validos.any():
+        return pd.DataFrame(columns=COLUNAS_RESULTADO)
+    eventos = df_sentimentos.loc[validos]
+    preco_execucao = precos[idx_pregao[validos]]
+
+    decisoes, quantidades, caixa, lucro = simular_posicao(scores[validos], preco_execucao, capital_inicial)
+    valor_investido = quantidades * preco_execucao
+    patrimonio_total = caixa + valor_investido
+
+    return pd.DataFrame({
+        'Data': eventos['data'].to_numpy(),
+        'Sentimento': eventos['sentimento_dia'].to_numpy(),
+        'Decisão': DECISOES[decisoes],
+        'Preço Unitário': _arredondar(preco_execucao),
+        'Qtd. Ações': quantidades,
+        'Valor Investido': _arredondar(valor_investido),
+        'Caixa Livre': _arredondar(caixa),
+        'Patrimônio Total': _arredondar(patrimonio_total),
+        'Lucro/Prejuízo': _arredondar(lucro),
+        'Resumo da Notícia': eventos['texto'].to_numpy(),
+    })
+
+
+def curva_patrimonio(df_resultado, cotacoes, capital_inicial=10000.0):
+    """
+    Patrimônio diário (caixa + ações a preço de abertura) em todos os pregões de `cotacoes`,
+    a partir do log de operações de executar_backtest.
+    """
+    datas_pregao = cotacoes.index.values.astype('datetime64[D]')
+    precos = cotacoes.to_numpy(dtype=float)
+    quantidades = np.zeros(len(precos))
+    caixa = np.full(len(precos), float(capital_inicial))
+    if not df_resultado.empty:
+        idx_pregao = np.searchsorted(
+            datas_pregao, pd.to_datetime(df_resultado['Data']).values.astype('datetime64[D]'), side='right'
+        )
+        # Vários dias de notícia podem cair no mesmo pregão: vale o estado após o último
+        ultimo = pd.DataFrame({
+            'idx': idx_pregao, 'qtd': df_resultado['Qtd. Ações'].to_numpy(), 'caixa': df_resultado['Caixa Livre'].to_numpy(),
+        }).groupby('idx').last()
+        estado = ultimo.reindex(np.arange(len(precos))).ffill()
+        marcado = estado['qtd'].notna().to_numpy()
+        quantidades[marcado] = estado['qtd'].to_numpy()[marcado]
+        caixa[marcado] = estado['caixa'].to_numpy()[marcado]
+    return pd.DataFrame({
+        'Data': pd.DatetimeIndex(datas_pregao), 'Patrimônio Total': caixa + quantidades * precos,
+    })
+
+
+def simular_ticker(ticker, df_scores, cotacoes, capital_inicial=10000.0):
+    """
+    Backtest completo de um ticker: log de operações, curva de patrimônio e linha de resumo
+    (retorno, Sharpe e drawdown de scripts.avaliacao_metricas.resumo_metricas sobre a curva diária).
+    """
+    inicio = time.perf_counter()
+    df_resultado = executar_backtest(df_scores, ticker=ticker, capital_inicial=capital_inicial, cotacoes=cotacoes)
+    df_curva = curva_patrimonio(df_resultado, cotacoes, capital_inicial)
+    metricas = resumo_metricas(df_curva.set_index('Data')['Patrimônio Total'].pct_change().dropna())
+    decisoes = df_resultado['Decisão'].value_counts()
+    resumo = {
+        'ticker': ticker,
+        'status': 'ok',
+        'eventos': len(df_resultado),
+        'compras': int(decisoes.get('COMPRA', 0)),
+        'vendas': int(decisoes.get('VENDA', 0)),
+        'patrimonio_final': float(df_curva['Patrimônio Total'].iloc[-1]) if len(df_curva) else float(capital_inicial),
+        'retorno_acumulado_pct': metricas['retorno_acumulado_pct'],
+        'sharpe_ratio': metricas['sharpe_ratio'],
+        'max_drawdown_pct': metricas['max_drawdown_pct'],
+        'tempo_s': time.perf_counter() - inicio,
+    }
+    return resumo, df_resultado, df_curva
+
+
+def _simular_ticker_seguro(ticker, df_scores, cotacoes, capital_inicial):
+    try:
+        return simular_ticker(ticker, df_scores, cotacoes, capital_inicial)
+    except Exception as e:
+        return {'ticker': ticker, 'status': f'erro: {e}', 'eventos': 0, 'tempo_s': 0.0}, None, None
+
+
+def executar_simulacoes(df_agregado, precos_abertura, capital_inicial=10000.0, n_processos=N_PROCESSOS):
+    """
+    Roda simular_ticker para todos os tickers de df_agregado (de agregar_sentimentos_por_ticker),
+    distribuídos em processos. Com n_processos=1 (ou None e menos de MIN_TICKERS_PARALELO
+    tickers) roda no processo atual.
+
+    Returns:
+        Tupla (operacoes, curvas, resumo): logs e curvas de todos os tickers com coluna 'ticker'
+        e uma linha de resumo por ticker.
+    """
+    tarefas = []
+    for ticker, df_ticker in df_agregado.groupby('ticker', sort=True):
+        cotacoes = precos_abertura[ticker].dropna() if ticker in precos_abertura.columns else pd.Series(dtype=float)
+        tarefas.append((ticker, df_ticker.drop(columns='ticker').reset_index(drop=True), cotacoes, capital_inicial))
+
+    if n_processos is None:
+        n_processos = (os.cpu_count() or 1) if len(tarefas) >= MIN_TICKERS_PARALELO else 1
+    n_processos = max(1, min(n_processos, len(tarefas) or 1))
+    if n_processos == 1:
+        resultados = [_simular_ticker_seguro(*t) for t in tarefas]
+    else:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=n_processos, mp_context=contexto) as executor:
+            resultados = list(executor.map(_simular_ticker_seguro, *zip(*tarefas), chunksize=max(1, len(tarefas) // (4 * n_processos))))
+
+    resumos, operacoes, curvas = [], [], []
+    for resumo, df_resultado, df_curva in resultados:
+        resumos.append(resumo)
+        if df_resultado is not None:
+            operacoes.append(df_resultado.assign(ticker=resumo['ticker']))
+            curvas.append(df_curva.assign(ticker=resumo['ticker']))
+    df_operacoes = pd.concat(operacoes, ignore_index=True) if operacoes else pd.DataFrame(columns=COLUNAS_RESULTADO + ['ticker'])
+    df_curvas = pd.concat(curvas, ignore_index=True) if curvas else pd.DataFrame(columns=['Data', 'Patrimônio Total', 'ticker'])
+    return df_operacoes, df_curvas, pd.DataFrame(resumos)
+
+
+def salvar_simulacoes(df_operacoes, df_curvas, df_resumo, pasta=PASTA_RESULTADOS, exportar_csv=True):
+    """
+    Grava os resultados consolidados em `pasta`: ARQUIVO_OPERACOES e ARQUIVO_PATRIMONIO (Parquet,
+    todos os tickers) e ARQUIVO_RESUMO (CSV). Com exportar_csv=True também grava os
+    resultado_estrategia_<TICKER>.csv de cada ticker, como antes.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    colunas_ticker = ['ticker'] + [c for c in df_operacoes.columns if c != 'ticker']
+    df_operacoes[colunas_ticker].to_parquet(os.path.join(pasta, ARQUIVO_OPERACOES), index=False)
+    df_curvas[['ticker', 'Data', 'Patrimônio Total']].to_parquet(os.path.join(pasta, ARQUIVO_PATRIMONIO), index=False)
+    df_resumo.to_csv(os.path.join(pasta, ARQUIVO_RESUMO), index=False)
+    if exportar_csv:
+        for ticker, df_ticker in df_operacoes.groupby('ticker', sort=False):
+            nome_limpo = ticker.replace('.SA', '')
+            df_ticker.drop(columns='ticker').to_csv(f"{pasta}/resultado_estrategia_{nome_limpo}.csv", index=False)
+
 
 """def carregar_e_processar_sentimentos(caminho_arquivo):
     with open(caminho_arquivo, 'r', encoding='utf-8') as f:
@@ -89,84 +319,6 @@ def carregar_e_processar_sentimentos(caminho_arquivo, ticker_alvo): # <-- Adicio
     df_agrupado['sentimento_dia'] = df_agrupado['valor'].apply(define_sentimento)
     return df_agrupado.sort_values('data')"""
 
-def executar_backtest(df_sentimentos, ticker='PETR4.SA', capital_inicial=10000.0):
-    data_inicio = df_sentimentos['data'].min()
-    data_fim = df_sentimentos['data'].max() + pd.Timedelta(days=15)
-    
-    # Baixa os dados em tempo real do yfinance para ter o 'Open'
-    cotacoes = yf.download(ticker, start=data_inicio, end=data_fim, progress=False)
-    datas_pregao = cotacoes.index.date
-    
-    capital_caixa = capital_inicial
-    quantidade_acoes = 0
-    posicionado = False
-    preco_compra = 0.0
-    
-    log_streamlit = []
-    
-    for _, row in df_sentimentos.iterrows():
-        data_atual = row['data']
-        score = row['valor']
-        textos = row['texto']
-        sentimento = row['sentimento_dia']
-        
-        if score == 0:
-            continue
-            
-        dias_futuros = [d for d in datas_pregao if d > data_atual]
-        if not dias_futuros:
-            continue
-            
-        proximo_pregao = dias_futuros[0]
-        preco_execucao = float(cotacoes.loc[str(proximo_pregao)]['Open'].iloc[0])
-        
-        acao_tomada = "NENHUMA"
-        diferenca_monetaria = 0.0
-        
-        if score > 0:
-            if not posicionado:
-                quantidade_acoes = int(capital_caixa // preco_execucao)
-                if quantidade_acoes > 0:
-                    capital_caixa -= quantidade_acoes * preco_execucao
-                    posicionado = True
-                    preco_compra = preco_execucao
-                    acao_tomada = "COMPRA"
-            else:
-                acao_tomada = "MANTIDO (Comprado)"
-                
-        elif score < 0:
-            if posicionado:
-                valor_venda = quantidade_acoes * preco_execucao
-                custo_compra = quantidade_acoes * preco_compra
-                diferenca_monetaria = valor_venda - custo_compra
-                
-                capital_caixa += valor_venda
-                posicionado = False
-                acao_tomada = "VENDA"
-                quantidade_acoes = 0 # Zera a quantidade DEPOIS de calcular a venda
-            else:
-                acao_tomada = "MANTIDO (Zerado)"
-                
-        # Cálculos de tela
-        valor_investido = quantidade_acoes * preco_execucao
-        patrimonio_total = capital_caixa + valor_investido
-                
-        log_streamlit.append({
-            'Data': data_atual,
-            'Sentimento': sentimento,
-            'Decisão': acao_tomada,
-            'Preço Unitário': round(preco_execucao, 2),
-            'Qtd. Ações': quantidade_acoes,
-            'Valor Investido': round(valor_investido, 2),
-            'Caixa Livre': round(capital_caixa, 2),
-            'Patrimônio Total': round(patrimonio_total, 2),
-            'Lucro/Prejuízo': round(diferenca_monetaria, 2) if acao_tomada == "VENDA" else None,
-            'Resumo da Notícia': textos
-        })
-
-    df_log = pd.DataFrame(log_streamlit)
-    return df_log
-
 """if __name__ == "__main__":
     caminho_base = 'noticias_mapeadas.json' # Ajuste o caminho se necessário
     
@@ -187,7 +339,7 @@ def executar_backtest(df_sentimentos, ticker='PETR4.SA', capital_inicial=10000.0
 
 if __name__ == "__main__":
     caminho_base = 'noticias_mapeadas.json'
-    pasta_resultados = 'resultados_simulacao' # O nome da sua nova pasta
+    pasta_resultados = PASTA_RESULTADOS
     
     # 1. Cria a pasta magicamente se ela não existir
     if not os.path.exists(pasta_resultados):
@@ -195,32 +347,27 @@ if __name__ == "__main__":
         print(f"📁 Pasta '{pasta_resultados}' criada com sucesso!")
         
     try:
-        with open(caminho_base, 'r', encoding='utf-8') as f:
-            noticias = json.load(f)
-            
-        tickers_dinamicos = set()
-        for noti in noticias:
-            for t in noti.get('tickers_citados', []):
-                tickers_dinamicos.add(t)
-                
+        # Uma leitura da base e uma matriz de preços de abertura para todos os tickers
+        df_agregado = agregar_sentimentos_por_ticker(caminho_base)
+        tickers_dinamicos = sorted(df_agregado['ticker'].unique())
         print(f"🔍 Tickers encontrados automaticamente: {len(tickers_dinamicos)} empresas.")
-        
-        # 2. Roda a estratégia e salva DENTRO da pasta
-        for ticker_atual in tickers_dinamicos:
-            print(f"\n--- Simulando: {ticker_atual} ---")
-            try:
-                df_scores = carregar_e_processar_sentimentos(caminho_base, ticker_alvo=ticker_atual)
-                df_resultado = executar_backtest(df_scores, ticker=ticker_atual)
-                
-                nome_limpo = ticker_atual.replace('.SA', '')
-                # Coloca o caminho da pasta antes do nome do arquivo
-                nome_arquivo_csv = f"{pasta_resultados}/resultado_estrategia_{nome_limpo}.csv"
-                
-                df_resultado.to_csv(nome_arquivo_csv, index=False)
-                print(f"✅ Salvo em: {nome_arquivo_csv} (Lucro: R$ {df_resultado['Patrimônio Total'].iloc[-1]:.2f})")
-                #print(f"✅ Salvo em: {nome_arquivo_csv} (Lucro: R$ {df_resultado['Patrimônio Total (R$)'].iloc[-1]:.2f})")
-            except Exception as e:
-                print(f"⚠️ Pulo: Não foi possível testar {ticker_atual}. Motivo: {e}")
+
+        precos_abertura = get_prices(
+            tickers_dinamicos,
+            df_agregado['data'].min(),
+            df_agregado['data'].max() + pd.Timedelta(days=15),
+            'Open',
+        ) if tickers_dinamicos else pd.DataFrame()
+
+        # 2. Roda a estratégia de todos os tickers em processos e salva os consolidados DENTRO da pasta
+        inicio = time.perf_counter()
+        df_operacoes, df_curvas, df_resumo = executar_simulacoes(df_agregado, precos_abertura)
+        salvar_simulacoes(df_operacoes, df_curvas, df_resumo, pasta_resultados)
+
+        print("\n=== RESUMO DAS SIMULAÇÕES ===")
+        print(df_resumo.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        print(f"✅ Salvo em: {pasta_resultados}/{ARQUIVO_OPERACOES}, {ARQUIVO_PATRIMONIO} e {ARQUIVO_RESUMO} "
+              f"({time.perf_counter() - inicio:.1f}s)")
                 
     except Exception as erro_geral:
-        print(f"Erro ao ler os dados: {erro_geral}")
\ No newline at end of file
+        print(f"Erro ao ler os dados: {erro_geral}")
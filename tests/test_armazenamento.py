@@ -0,0 +1,108 @@
+"""
+Testes do armazenamento Parquet das bases de notícias.
+"""
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from armazenamento import (
+    anexar_noticias,
+    contar_noticias,
+    diretorio_dataset,
+    ler_noticias,
+    ler_noticias_registros,
+    salvar_noticias,
+)
+
+NOTICIAS = [
+    {
+        "title": "Petrobras sobe",
+        "url": "u1",
+        "data_normalizada": "2025-01-10T00:00:00.000",
+        "sentimento_previsto": "POSITIVE",
+        "tickers_citados": ["PETR4.SA"],
+        "precos_no_dia": {"PETR4.SA": 30.5},
+    },
+    {
+        "title": "Vale cai",
+        "url": "u2",
+        "data_normalizada": "2025-02-03T00:00:00.000",
+        "sentimento_previsto": "NEGATIVE",
+        "tickers_citados": ["VALE3.SA", "PETR4.SA"],
+        "precos_no_dia": {"VALE3.SA": 60.0},
+    },
+    {
+        "title": "Sem data",
+        "url": "u3",
+        "data_normalizada": None,
+        "sentimento_previsto": "NEUTRAL",
+        "tickers_citados": [],
+        "precos_no_dia": None,
+    },
+]
+
+
+def _criar_json(d):
+    caminho = os.path.join(d, "noticias.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(NOTICIAS, f)
+    return caminho
+
+
+def test_migra_json_e_preserva_tipos():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = _criar_json(d)
+        registros = ler_noticias_registros(caminho)
+        assert os.path.isdir(diretorio_dataset(caminho))
+        por_url = {r["url"]: r for r in registros}
+        assert por_url["u2"]["tickers_citados"] == ["VALE3.SA", "PETR4.SA"]
+        assert por_url["u1"]["precos_no_dia"] == {"PETR4.SA": 30.5}
+        assert por_url["u3"]["data_normalizada"] is None
+        assert contar_noticias(caminho) == 3
+
+
+def test_projecao_e_filtro_de_datas():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = _criar_json(d)
+        df = ler_noticias(caminho, ["url", "coluna_inexistente"], data_inicio="2025-02-01")
+        assert list(df.columns) == ["url"]
+        assert df["url"].tolist() == ["u2"]
+        df = ler_noticias(caminho, ["url"], data_fim="2025-01-31")
+        assert df["url"].tolist() == ["u1"]
+
+
+def test_anexar_nao_reescreve_e_aceita_colunas_novas():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = _criar_json(d)
+        nova = pd.DataFrame([{
+            "title": "Itaú", "url": "u4", "data_normalizada": "2025-02-20T00:00:00.000",
+            "sentimento_previsto": "POSITIVE", "tickers_citados": ["ITUB4.SA"],
+            "probabilidades_sentimento": [0.9, 0.05, 0.05],
+        }])
+        anexar_noticias(nova, caminho, exportar=True)
+        df = ler_noticias(caminho, data_inicio="2025-02-01")
+        assert sorted(df["url"]) == ["u2", "u4"]
+        linha = df[df["url"] == "u4"].iloc[0]
+        assert linha["probabilidades_sentimento"] == [0.9, 0.05, 0.05]
+        with open(caminho, encoding="utf-8") as f:
+            assert len(json.load(f)) == 4
+
+
+def test_salvar_substitui_conteudo():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "mapeadas.json")
+        assert ler_noticias(caminho, ["url"]).empty
+        salvar_noticias(pd.DataFrame(NOTICIAS), caminho, exportar=False)
+        salvar_noticias(pd.DataFrame(NOTICIAS[:1]), caminho, exportar=False)
+        assert ler_noticias(caminho, ["url"])["url"].tolist() == ["u1"]
+        assert not os.path.exists(caminho)
+
+
+def test_filtro_por_urls():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = _criar_json(d)
+        assert sorted(ler_noticias(caminho, ["url", "title"], urls={"u3", "u1", "u9"})["url"]) == ["u1", "u3"]
+        assert ler_noticias(caminho, ["url"], data_inicio="2025-02-01", urls=["u1", "u2"])["url"].tolist() == ["u2"]
+        assert ler_noticias(caminho, ["url"], urls=[]).empty
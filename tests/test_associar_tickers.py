@@ -0,0 +1,139 @@
+"""
+Testes da extração de empresas em lote (nlp.pipe só com os componentes do NER) e do mapeamento
+incremental (NER só nas notícias novas; remapeamento quando o mapa de tickers muda).
+"""
+import contextlib
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from armazenamento import anexar_noticias, ler_noticias, salvar_noticias
+from associar_tickers import (
+    extrair_empresas,
+    extrair_empresas_lote,
+    gravar_mapeamento,
+    mapear_incremental,
+    mapear_tickers,
+    pipes_sem_ner,
+)
+
+
+def _parser_que_falha(doc):
+    raise AssertionError("componente desligado não deveria rodar")
+
+
+@pytest.fixture
+def nlp():
+    spacy = pytest.importorskip("spacy")
+    spacy.language.Language.component("parser_que_falha", func=_parser_que_falha)
+    modelo = spacy.blank("pt")
+    ruler = modelo.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "ORG", "pattern": "Petrobras"},
+        {"label": "ORG", "pattern": "Vale"},
+        {"label": "MISC", "pattern": "Ibovespa"},
+        {"label": "PER", "pattern": "Lula"},
+    ])
+    modelo.add_pipe("parser_que_falha", name="parser")
+    return modelo
+
+
+def test_lote_igual_ao_texto_a_texto_e_desliga_componentes(nlp):
+    textos = ["Petrobras e Vale puxam o Ibovespa; Petrobras sobe", None, "", "Lula fala", "Vale cai"]
+    assert pipes_sem_ner(nlp) == ["parser"]
+    esperado = [["Petrobras", "Vale", "Ibovespa"], [], [], [], ["Vale"]]
+    assert extrair_empresas_lote(textos, nlp, batch_size=2) == esperado
+    assert [extrair_empresas(t, nlp) for t in textos] == esperado
+    assert nlp.pipe_names == ["entity_ruler", "parser"]  # o modelo volta ao estado original
+
+
+def test_texto_cortado_no_limite_de_caracteres(nlp):
+    texto = "Vale anuncia dividendos. " + "x " * 100 + "Petrobras"
+    assert extrair_empresas_lote([texto], nlp, max_caracteres=50) == [["Vale"]]
+    assert mapear_tickers(["Vale", "Ibovespa"], {"Vale": "VALE3.SA", "Ibovespa": None}) == ["VALE3.SA"]
+
+
+class _NlpContador:
+    """Interface do spaCy usada por extrair_empresas_lote; guarda os textos processados."""
+    pipe_names = []
+
+    def __init__(self):
+        self.textos = []
+
+    def select_pipes(self, disable):
+        return contextlib.nullcontext()
+
+    def pipe(self, textos, batch_size, n_process):
+        for texto in textos:
+            self.textos.append(texto)
+            yield SimpleNamespace(ents=[SimpleNamespace(text=p, label_="ORG") for p in texto.split() if p[:1].isupper()])
+
+
+def _noticias(*linhas):
+    return pd.DataFrame(
+        [{"url": u, "texto_completo": t, "data_normalizada": "2025-01-10", "sentimento_previsto": "POSITIVE"} for u, t in linhas]
+    )
+
+
+def test_mapeamento_incremental():
+    mapa = {"Petrobras": "PETR4.SA", "Vale": "VALE3.SA", "Ibovespa": None}
+    with tempfile.TemporaryDirectory() as d:
+        caminhos = {"arquivo_saida": os.path.join(d, "mapeadas.json"), "arquivo_entidades": os.path.join(d, "entidades.json")}
+
+        def rodar(df, nlp, mapa_tickers):
+            resultado = mapear_incremental(df, nlp, mapa_tickers, **caminhos)
+            gravar_mapeamento(resultado, **caminhos)
+            return resultado
+
+        base = _noticias(("u1", "Petrobras sobe"), ("u2", "Ibovespa fecha em alta"))
+        nlp = _NlpContador()
+        primeira = rodar(base, nlp, mapa)
+        assert primeira["reconstruir"] and len(nlp.textos) == 2
+        assert primeira["mapeadas"]["url"].tolist() == ["u1"]
+
+        # Nova notícia e republicação (mesmo texto em outra URL): NER só no texto inédito
+        base = pd.concat([base, _noticias(("u3", "Vale cai"), ("u4", "Petrobras sobe"))], ignore_index=True)
+        nlp = _NlpContador()
+        segunda = rodar(base, nlp, mapa)
+        assert not segunda["reconstruir"] and nlp.textos == ["Vale cai"]
+        assert sorted(segunda["mapeadas"]["url"]) == ["u3", "u4"]
+        assert sorted(ler_noticias(caminhos["arquivo_saida"])["url"]) == ["u1", "u3", "u4"]
+
+        # Nada novo: nada é acrescentado e o spaCy nem é necessário
+        assert rodar(base, None, mapa)["mapeadas"].empty
+
+        # Mapa novo: tudo é remapeado com as entidades gravadas, sem NER
+        nlp = _NlpContador()
+        terceira = rodar(base, nlp, {**mapa, "Ibovespa": "BOVA11.SA"})
+        assert terceira["reconstruir"] and nlp.textos == []
+        assert sorted(ler_noticias(caminhos["arquivo_saida"])["url"]) == ["u1", "u2", "u3", "u4"]
+
+
+def test_so_as_urls_novas_sao_lidas_e_hasheadas(monkeypatch):
+    import associar_tickers
+
+    mapa = {"Petrobras": "PETR4.SA", "Vale": "VALE3.SA"}
+    textos_hasheados = []
+    chave_original = associar_tickers.chave_entidades
+
+    def chave_contada(texto, motor="ner"):
+        textos_hasheados.append(texto)
+        return chave_original(texto, motor)
+
+    monkeypatch.setattr(associar_tickers, "chave_entidades", chave_contada)
+    with tempfile.TemporaryDirectory() as d:
+        caminhos = {"arquivo_saida": os.path.join(d, "mapeadas.json"), "arquivo_entidades": os.path.join(d, "entidades.json")}
+        entrada = os.path.join(d, "sentimento.json")
+        salvar_noticias(_noticias(("u1", "Petrobras sobe"), ("u2", "Ibovespa fecha")), entrada)
+        gravar_mapeamento(mapear_incremental(None, _NlpContador(), mapa, arquivo_entrada=entrada, **caminhos), **caminhos)
+
+        # Gravada u3 e ainda não gravada u4 (classificada nesta execução): só elas são lidas e hasheadas
+        anexar_noticias(_noticias(("u3", "Vale cai")), entrada)
+        textos_hasheados.clear()
+        nlp = _NlpContador()
+        resultado = mapear_incremental(_noticias(("u4", "Petrobras sobe")), nlp, mapa, arquivo_entrada=entrada, **caminhos)
+        assert not resultado["reconstruir"] and sorted(textos_hasheados) == ["Petrobras sobe", "Vale cai"]
+        assert nlp.textos == ["Vale cai"] and sorted(resultado["mapeadas"]["url"]) == ["u3", "u4"]
@@ -0,0 +1,46 @@
+"""
+Testes do cache persistente de sentimento (SQLite).
+"""
+import os
+import tempfile
+
+from cache_sentimento import CacheSentimento, chave_cache
+
+
+def _resultado(rotulo):
+    return {"sentimento": rotulo, "probabilidades": [0.8, 0.1, 0.1]}
+
+
+def test_chave_ignora_espacos_e_depende_do_modelo():
+    assert chave_cache("Petrobras  sobe\n hoje", "m1") == chave_cache(" Petrobras sobe hoje ", "m1")
+    assert chave_cache("Petrobras sobe hoje", "m1") != chave_cache("Petrobras sobe hoje", "m2")
+
+
+def test_acerto_e_falha_contabilizados():
+    with tempfile.TemporaryDirectory() as d:
+        with CacheSentimento(os.path.join(d, "c.sqlite"), model_name="m") as cache:
+            cache.salvar(["texto a"], [_resultado("POSITIVE")])
+            achados = cache.buscar(["texto b", "texto  a", ""])
+            assert achados == {1: _resultado("POSITIVE")}
+            assert (cache.acertos, cache.falhas) == (1, 1)
+
+
+def test_persiste_entre_aberturas():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "c.sqlite")
+        with CacheSentimento(caminho, model_name="m") as cache:
+            cache.salvar(["texto a"], [_resultado("NEGATIVE")])
+        with CacheSentimento(caminho, model_name="m") as cache:
+            assert cache.buscar(["texto a"])[0]["sentimento"] == "NEGATIVE"
+
+
+def test_remocao_lru_por_tamanho():
+    with tempfile.TemporaryDirectory() as d:
+        # ~100 bytes por entrada; limite para cerca de 2 entradas
+        with CacheSentimento(os.path.join(d, "c.sqlite"), model_name="m", max_mb=250 / (1024 * 1024)) as cache:
+            cache.salvar(["a"], [_resultado("POSITIVE")])
+            cache.salvar(["b"], [_resultado("POSITIVE")])
+            cache.buscar(["a"])  # "a" passa a ser o mais recente
+            cache.salvar(["c"], [_resultado("POSITIVE")])
+            assert cache.removidos == 1
+            assert set(cache.buscar(["a", "b", "c"])) == {0, 2}
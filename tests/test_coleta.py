@@ -0,0 +1,90 @@
+"""
+Testes da coleta com todos os spiders em um único CrawlerProcess (processo filho).
+"""
+import json
+import os
+import tempfile
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from coleta import _EstatisticasSpider, executar_coleta
+
+SPIDERS = '''
+import scrapy
+
+
+class Um(scrapy.Spider):
+    name = "um"
+    start_urls = ["http://127.0.0.1:{porta}/pagina{{}}".format(i) for i in range(3)]
+
+    def parse(self, response):
+        yield {{"url": response.url, "source": "Um", "title": "Petrobras sobe"}}
+
+
+class Dois(scrapy.Spider):
+    name = "dois"
+    start_urls = ["http://localhost:{porta}/pagina{{}}".format(i) for i in range(2)]
+
+    def parse(self, response):
+        yield {{"url": response.url, "source": "Dois", "title": "Ação da Vale"}}
+'''
+
+
+def _projeto(diretorio, porta):
+    with open(os.path.join(diretorio, "scrapy.cfg"), "w", encoding="utf-8") as f:
+        f.write("[settings]\ndefault = projeto_teste.settings\n")
+    pacote = os.path.join(diretorio, "projeto_teste")
+    os.makedirs(os.path.join(pacote, "spiders"))
+    open(os.path.join(pacote, "__init__.py"), "w").close()
+    with open(os.path.join(pacote, "settings.py"), "w", encoding="utf-8") as f:
+        f.write('SPIDER_MODULES = ["projeto_teste.spiders"]\nROBOTSTXT_OBEY = False\nLOG_LEVEL = "WARNING"\n')
+    with open(os.path.join(pacote, "spiders", "__init__.py"), "w", encoding="utf-8") as f:
+        f.write(SPIDERS.format(porta=porta))
+    for i in range(3):
+        with open(os.path.join(diretorio, f"pagina{i}"), "w", encoding="utf-8") as f:
+            f.write("ok")
+
+
+def test_diretorio_inexistente_nao_inicia_coleta():
+    assert executar_coleta(["exame"], project_dir="/caminho/que/nao/existe") == {
+        "spiders": {}, "duracao_s": 0.0, "ok": False,
+    }
+
+
+def test_resumo_das_estatisticas():
+    est = _EstatisticasSpider(saida=None)
+    est.latencias = [0.1, 0.2, 0.3]
+    resumo = est.resumo({
+        "item_scraped_count": 3, "downloader/response_count": 4,
+        "elapsed_time_seconds": 2.04, "finish_reason": "finished",
+    })
+    assert resumo["itens"] == 3 and resumo["respostas"] == 4 and resumo["erros"] == 0
+    assert resumo["duracao_s"] == 2.0 and resumo["latencia_media_s"] == 0.2
+    assert _EstatisticasSpider(None).resumo({})["latencia_p95_s"] is None
+
+
+def test_spiders_rodam_juntos_e_gravam_um_jsonl():
+    pytest.importorskip("scrapy")
+    with tempfile.TemporaryDirectory() as d:
+        servidor = ThreadingHTTPServer(
+            ("127.0.0.1", 0), lambda *a, **k: SimpleHTTPRequestHandler(*a, directory=d, **k),
+        )
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        try:
+            _projeto(d, servidor.server_address[1])
+            saida = os.path.join(d, "noticias.jsonl")
+            relatorio = executar_coleta(["um", "dois"], project_dir=d, arquivo_saida=saida)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+        assert relatorio["ok"]
+        assert {nome: est["itens"] for nome, est in relatorio["spiders"].items()} == {"um": 3, "dois": 2}
+        with open(saida, encoding="utf-8") as f:
+            itens = [json.loads(linha) for linha in f]
+        assert sorted(i["source"] for i in itens) == ["Dois", "Dois", "Um", "Um", "Um"]
+        assert "Ação da Vale" in {i["title"] for i in itens}
+
+        assert not executar_coleta(["inexistente"], project_dir=d, arquivo_saida=saida)["ok"]
@@ -0,0 +1,61 @@
+"""
+Testes da normalização de datas por formato de site (coluna inteira e valor a valor).
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import datas
+from datas import estatisticas_datas, normalizar_data, normalizar_datas
+
+CASOS = {
+    "21 de outubro de 2025": "2025-10-21T00:00:00",
+    "6 de maio de 2025": "2025-05-06T00:00:00",
+    "02 de Março, 2026 | 06:53 PM": "2026-03-02T18:53:00",
+    "28 de Outubro, 2025 | 12:16 AM": "2025-10-28T00:16:00",
+    "2026-04-01T05:03:35.388-03:00": "2026-04-01T05:03:35.388000-03:00",
+    "2026-02-03T16:35:19Z": "2026-02-03T16:35:19+00:00",
+    "21/10/2025 14:30": "2025-10-21T14:30:00",
+    "1774999712612": datetime.fromtimestamp(1774999712.612).isoformat(),
+    "1609459200": datetime.fromtimestamp(1609459200).isoformat(),
+}
+
+
+def test_formatos_conhecidos():
+    for texto, esperado in CASOS.items():
+        assert normalizar_data(texto) == esperado, texto
+    assert normalizar_datas(list(CASOS)).tolist() == list(CASOS.values())
+
+
+def test_vazios_invalidos_e_numeros():
+    valores = pd.Series([None, np.nan, "", "nan", "30 de fevereiro de 2025", "0000000000", 1774999712612.0], index=list("abcdefg"))
+    resultado = normalizar_datas(valores)
+    assert list(resultado.index) == list("abcdefg")
+    assert resultado.iloc[:5].isna().all() and resultado["g"] == CASOS["1774999712612"]
+    assert [normalizar_data(v) for v in valores] == resultado.tolist()
+
+
+def test_coluna_float_com_nan():
+    resultado = normalizar_datas(pd.Series([1609459200000, np.nan]))
+    assert resultado.tolist() == [datetime.fromtimestamp(1609459200).isoformat(), None]
+
+
+def test_dateparser_so_como_ultimo_recurso(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(datas, "_dateparser", lambda t: chamadas.append(t) or None)
+    normalizar_datas(list(CASOS) * 3 + ["ontem à tarde", "ontem à tarde"])
+    assert chamadas == ["ontem à tarde"]
+    assert set(estatisticas_datas()) == {"dateparser", "falhas"}
+
+
+def test_coluna_e_valor_a_valor_concordam_com_texto_em_volta(monkeypatch):
+    monkeypatch.setattr(datas, "_dateparser", lambda t: None)
+    datas._normalizar_texto.cache_clear()
+    xs = [
+        "Publicado em 21 de outubro de 2025", "21/10/2025 14:30 atualizado", "2025-10-21Z",
+        "21 de outubro de 2025", "21/10/2025 14:30", "2025-10-21",
+    ]
+    assert [normalizar_data(v) for v in xs] == normalizar_datas(xs).tolist()
+    assert normalizar_datas(xs).tolist()[:3] == [None, None, None]
+    datas._normalizar_texto.cache_clear()
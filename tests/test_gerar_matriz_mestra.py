@@ -0,0 +1,82 @@
+"""
+Testes do construtor de matrizes mestras (features agrupadas por ticker e merge_asof agrupado).
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import gerar_matriz_mestra
+from gerar_matriz_mestra import COLUNAS_FINAIS, calcular_features_precos, gerar_matrizes, montar_matriz_mestra
+
+
+def _precos():
+    dias = pd.bdate_range("2024-01-01", periods=40, name="Date")
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(
+        {"PETR4.SA": 30 + rng.normal(0, 1, 40).cumsum(), "VALE3.SA": 60 + rng.normal(0, 1, 40).cumsum()},
+        index=dias,
+    )
+    close.iloc[3, 1] = np.nan  # dia sem pregão só para um ticker
+    return close
+
+
+def _noticias():
+    return pd.DataFrame({
+        "ticker": ["PETR4.SA", "VALE3.SA", "PETR4.SA", "VALE3.SA"],
+        "data": pd.to_datetime(["2024-01-20 10:00", "2024-01-13 00:00", "2024-02-01 00:00", "2024-03-30 00:00"]),
+        "source": ["A", "B", "C", "D"],
+        "title": ["t1", "t2", "t3", "t4"],
+        "sentimento_previsto": ["POSITIVE", "NEGATIVE", "NEUTRAL", "POSITIVE"],
+        "sentimento_valor": [1, -1, 0, 1],
+    })
+
+
+def _referencia_por_ticker(close, ticker):
+    """Cálculo antigo (um ticker por vez, shift separado por coluna)."""
+    df = close[[ticker]].dropna().copy()
+    df.columns = ["preco_d"]
+    for i in range(1, 6):
+        df[f"preco_d{i}"] = df["preco_d"].shift(i)
+    df["var_d1"] = (df["preco_d"] - df["preco_d1"]) / df["preco_d1"]
+    for k in range(2, 6):
+        df[f"var_d{k}"] = (df[f"preco_d{k - 1}"] - df[f"preco_d{k}"]) / df[f"preco_d{k}"]
+    df["var_acumulada_3d"] = (df["preco_d"] - df["preco_d3"]) / df["preco_d3"]
+    df["var_acumulada_5d"] = (df["preco_d"] - df["preco_d5"]) / df["preco_d5"]
+    return df.dropna()
+
+
+def test_features_agrupadas_iguais_ao_calculo_por_ticker():
+    close = _precos()
+    features = calcular_features_precos(close)
+    for ticker in close.columns:
+        obtido = features[features["ticker"] == ticker].set_index("Date").drop(columns="ticker")
+        esperado = _referencia_por_ticker(close, ticker)
+        pd.testing.assert_frame_equal(obtido, esperado[obtido.columns], check_names=False, check_freq=False)
+
+
+def test_merge_usa_proximo_pregao_do_mesmo_ticker():
+    close = _precos()
+    matriz = montar_matriz_mestra(_noticias(), calcular_features_precos(close))
+    assert list(matriz.columns) == ["ticker"] + COLUNAS_FINAIS
+    por_titulo = matriz.set_index("title")
+    # 20/01/2024 é sábado: usa segunda 22/01
+    assert por_titulo.loc["t1", "preco_d"] == close.loc["2024-01-22", "PETR4.SA"]
+    assert por_titulo.loc["t2", "preco_d"] == close.loc["2024-01-15", "VALE3.SA"]
+    # Depois do último pregão: sem preço
+    assert np.isnan(por_titulo.loc["t4", "preco_d"])
+
+
+def test_ticker_sem_precos_fica_fora_da_matriz_e_dos_csvs(monkeypatch):
+    close = _precos()
+    close["ITUB4.SA"] = np.nan
+    noticias = pd.concat([_noticias(), _noticias().assign(ticker="ITUB4.SA")], ignore_index=True)
+    monkeypatch.setattr(gerar_matriz_mestra, "carregar_noticias_por_ticker", lambda caminho: noticias)
+    monkeypatch.setattr(gerar_matriz_mestra, "get_prices", lambda tickers, inicio, fim, campo: close[list(tickers)])
+    with tempfile.TemporaryDirectory() as d:
+        monkeypatch.setattr(gerar_matriz_mestra, "DATASET_MATRIZES", os.path.join(d, "matrizes.parquet"))
+        monkeypatch.setattr(gerar_matriz_mestra, "PASTA_MATRIZES", os.path.join(d, "matrizes"))
+        matriz = gerar_matrizes("noticias.json")
+        assert sorted(matriz["ticker"].unique()) == ["PETR4.SA", "VALE3.SA"]
+        assert sorted(os.listdir(os.path.join(d, "matrizes"))) == ["dataset_rl_PETR4.csv", "dataset_rl_VALE3.csv"]
@@ -0,0 +1,48 @@
+"""
+Testes do índice aproximado de aliases (normalização, trigramas, confiança) e do relatório de
+entidades sem ticker.
+"""
+from associar_tickers import mapear_tickers
+from indice_aliases import IndiceAliases, normalizar_alias, relatorio_nao_resolvidas
+
+MAPA = {
+    "Petrobras": "PETR4.SA",
+    "Vale": "VALE3.SA",
+    "Itaú Unibanco": "ITUB4.SA",
+    "Inter": "INBR32.SA",
+    "Bloomberg News": None,
+    "--- NOVAS EMPRESAS B3 ---": None,
+}
+
+
+def test_normalizar_alias():
+    assert normalizar_alias("a Petrobrás S.A.") == "petrobras"
+    assert normalizar_alias("Itaú Unibanco Holding S/A") == "itau unibanco"
+    assert normalizar_alias("Banco do Brasil") == "banco brasil"
+    assert normalizar_alias("Holding") == "holding" and normalizar_alias(None) == ""
+
+
+def test_resolucao_exata_e_aproximada():
+    indice = IndiceAliases(MAPA, limiar=0.6)
+    assert indice.resolver("Petrobras S.A.") == ("Petrobras", "PETR4.SA", 1.0)
+    assert indice.ticker("a Vale") == "VALE3.SA"
+    assert indice.ticker("PETR4") == "PETR4.SA"  # códigos dos tickers também são aliases
+    alias, ticker, confianca = indice.resolver("Itau Unibancco")
+    assert (alias, ticker) == ("Itaú Unibanco", "ITUB4.SA") and 0.6 <= confianca < 1.0
+    # Parecido demais com um alias sem ticker, ou abaixo do limiar: sem ticker
+    assert indice.ticker("Bloomberg New") is None
+    assert indice.resolver("Intel")[1] == "INBR32.SA" and indice.ticker("Intel") is None
+    assert indice.resolver("XP") is None and indice.resolver("") is None
+
+
+def test_mapear_tickers_usa_indice_so_sem_chave_exata():
+    indice = IndiceAliases(MAPA)
+    assert mapear_tickers(["Petrobras S.A.", "a Vale"], MAPA) == []
+    assert sorted(mapear_tickers(["Petrobras S.A.", "a Vale", "Bloomberg News"], MAPA, indice)) == ["PETR4.SA", "VALE3.SA"]
+
+
+def test_relatorio_nao_resolvidas():
+    noticias = [["Banco Master", "Petrobras S.A."], ["Banco Master", "Banco Master"], ["Caixa", "Vale"], []]
+    relatorio = relatorio_nao_resolvidas(noticias, MAPA, top=5)
+    assert relatorio["entidade"].tolist() == ["Banco Master", "Caixa"]
+    assert relatorio["frequencia"].tolist() == [2, 1]
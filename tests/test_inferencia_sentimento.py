@@ -0,0 +1,66 @@
+"""
+Testes do motor de inferência em lote (montagem de lotes e ordem dos resultados).
+Usa tokenizer e modelo falsos; não baixa o FinBERT.
+"""
+from types import SimpleNamespace
+
+import torch
+
+from inferencia_sentimento import ROTULO_TEXTO_INVALIDO, MotorInferenciaFinBERT, montar_lotes
+
+
+class TokenizerFalso:
+    """Um token por palavra; o id é o número de palavras do texto."""
+
+    def __call__(self, textos, truncation=True, max_length=512):
+        ids = [[len(t.split())] * min(len(t.split()), max_length) for t in textos]
+        return {"input_ids": ids, "attention_mask": [[1] * len(x) for x in ids]}
+
+    def pad(self, features, padding=True, return_tensors="pt"):
+        maior = max(len(x) for x in features["input_ids"])
+        return {
+            chave: torch.tensor([x + [0] * (maior - len(x)) for x in valores])
+            for chave, valores in features.items()
+        }
+
+
+class ModeloFalso(torch.nn.Module):
+    """Textos com número par de palavras -> POSITIVE, ímpar -> NEGATIVE."""
+
+    def forward(self, input_ids, attention_mask):
+        n = input_ids[:, 0]
+        par = (n % 2 == 0).float()
+        logits = torch.stack([par, 1 - par, torch.zeros_like(par)], dim=1) * 5
+        return SimpleNamespace(logits=logits)
+
+
+class TestMontarLotes:
+    """Testes da função montar_lotes."""
+
+    def test_todos_indices_aparecem_uma_vez(self):
+        lotes = montar_lotes([5, 1, 3, 2, 4], max_batch_size=2, max_tokens_lote=100)
+        assert sorted(i for lote in lotes for i in lote) == [0, 1, 2, 3, 4]
+
+    def test_lotes_ordenados_por_comprimento(self):
+        lotes = montar_lotes([5, 1, 3, 2, 4], max_batch_size=2, max_tokens_lote=100)
+        assert lotes == [[1, 3], [2, 4], [0]]
+
+    def test_respeita_orcamento_de_tokens(self):
+        comprimentos = [10, 10, 10, 50]
+        lotes = montar_lotes(comprimentos, max_batch_size=10, max_tokens_lote=40)
+        assert lotes == [[0, 1, 2], [3]]
+
+
+class TestMotorInferencia:
+    """Testes da classe MotorInferenciaFinBERT com modelo falso."""
+
+    def test_preserva_ordem_e_marca_invalidos(self):
+        motor = MotorInferenciaFinBERT(tokenizer=TokenizerFalso(), model=ModeloFalso(), max_batch_size=2)
+        textos = ["uma duas tres", "", "uma duas", None, "a b c d e f"]
+        resultados = motor.classificar(textos)
+        assert [r["sentimento"] for r in resultados] == [
+            "NEGATIVE", ROTULO_TEXTO_INVALIDO, "POSITIVE", ROTULO_TEXTO_INVALIDO, "POSITIVE",
+        ]
+        assert resultados[1]["probabilidades"] is None
+        assert abs(sum(resultados[0]["probabilidades"]) - 1.0) < 1e-4
+        assert motor.ultima_taxa > 0
@@ -0,0 +1,64 @@
+"""
+Testes da leitura em streaming das notícias brutas (JSON Lines + checkpoint).
+"""
+import json
+import os
+import tempfile
+
+from leitor_noticias import (
+    LeitorNoticiasBrutas,
+    contar_noticias_brutas,
+    iterar_noticias_brutas,
+    salvar_noticias_brutas,
+)
+
+
+def _escrever(caminho, conteudo, modo="w"):
+    with open(caminho, modo, encoding="utf-8") as f:
+        f.write(conteudo)
+
+
+def test_le_jsonl_com_colchete_no_texto():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "n.jsonl")
+        _escrever(caminho, json.dumps({"title": "A [B] ]", "url": "u1"}) + "\n" + json.dumps({"title": "C", "url": "u2"}) + "\n")
+        assert [n["url"] for n in iterar_noticias_brutas(caminho)] == ["u1", "u2"]
+
+
+def test_aceita_formato_antigo_do_scrapy():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "n.json")
+        _escrever(caminho, '[\n{"url": "u1"},\n{"url": "u2"}\n][\n{"url": "u3"}\n]\n[]\n')
+        assert contar_noticias_brutas(caminho) == 3
+
+
+def test_checkpoint_le_apenas_linhas_novas():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "n.jsonl")
+        _escrever(caminho, '{"url": "u1"}\n')
+        leitor = LeitorNoticiasBrutas(caminho, usar_checkpoint=True)
+        assert [n["url"] for n in leitor] == ["u1"]
+        leitor.confirmar()
+
+        _escrever(caminho, '{"url": "u2"}\n{"url": "u3', modo="a")  # última linha incompleta
+        leitor = LeitorNoticiasBrutas(caminho, usar_checkpoint=True)
+        assert [n["url"] for n in leitor] == ["u2"]
+
+
+def test_sem_confirmar_relê_as_mesmas_linhas():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "n.jsonl")
+        _escrever(caminho, '{"url": "u1"}\n')
+        list(LeitorNoticiasBrutas(caminho, usar_checkpoint=True))
+        assert len(list(LeitorNoticiasBrutas(caminho, usar_checkpoint=True))) == 1
+
+
+def test_salvar_reescreve_e_descarta_checkpoint():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "n.jsonl")
+        _escrever(caminho, '{"url": "u1"}\n{"url": "u2"}\n')
+        leitor = LeitorNoticiasBrutas(caminho, usar_checkpoint=True)
+        list(leitor)
+        leitor.confirmar()
+        assert salvar_noticias_brutas(caminho, [{"url": "u9", "title": "ç"}]) == 1
+        assert [n["url"] for n in LeitorNoticiasBrutas(caminho, usar_checkpoint=True)] == ["u9"]
@@ -0,0 +1,88 @@
+"""
+Testes do reconhecimento de empresas por dicionário (autômato Aho-Corasick sobre tokens) e do
+motor "matcher" no mapeamento incremental.
+"""
+import contextlib
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pandas as pd
+
+from associar_tickers import gravar_mapeamento, mapear_incremental
+from matcher_empresas import MatcherEmpresas, comparar_com_ner, normalizar
+
+MAPA = {
+    "Petrobras": "PETR4.SA",
+    "Vale": "VALE3.SA",
+    "Itaú Unibanco": "ITUB4.SA",
+    "Banco do Brasil": "BBAS3.SA",
+    "Banco": None,
+    "Bloomberg News": None,
+    "Bloomberg": "XPTO3.SA",
+    "bitcoin": "BTC-USD",
+    "--- NOVAS EMPRESAS B3 ---": None,
+}
+
+
+def test_normalizar_remove_acentos_e_caixa():
+    assert normalizar("Itaú AÇÃO Ânima") == "itau acao anima"
+
+
+def test_acentos_caixa_e_codigos():
+    matcher = MatcherEmpresas(MAPA)
+    assert matcher.empresas("O itau unibanco e a PETROBRAS sobem") == ["Itaú Unibanco", "Petrobras"]
+    assert matcher.tickers("PETR4 e VALE3 lideram; petrobras também") == ["PETR4.SA", "VALE3.SA"]
+    assert matcher.empresas("Alta do Bitcoin") == ["bitcoin"]
+    assert MatcherEmpresas(MAPA, incluir_codigos=False).empresas("PETR4 sobe") == []
+
+
+def test_palavra_comum_so_casa_com_maiuscula():
+    matcher = MatcherEmpresas(MAPA)
+    assert matcher.empresas("Investir agora vale a pena?") == []
+    assert matcher.empresas("Vale anuncia dividendos") == ["Vale"]
+
+
+def test_ocorrencia_mais_longa_vence():
+    matcher = MatcherEmpresas(MAPA)
+    assert matcher.ocorrencias("Lucro do Banco do Brasil") == [(2, 5, "Banco do Brasil")]
+    # Nome mais longo sem ticker impede que o contido nele conte
+    assert matcher.tickers("Segundo a Bloomberg News, a Vale cai") == ["VALE3.SA"]
+    assert matcher.empresas(None) == [] and matcher.empresas_lote(["", "Vale"]) == [[], ["Vale"]]
+
+
+def test_comparar_com_ner():
+    r = comparar_com_ner(["Petrobras sobe", "Vale e Ibovespa"], [["PETR4.SA"], ["VALE3.SA", "ITUB4.SA"]], MAPA)
+    assert r["textos"] == 2 and r["tickers_referencia"] == 3
+    assert r["recall"] == 2 / 3 and r["tickers_extras"] == 0 and r["ner_docs_s"] is None
+
+
+def test_mapeamento_incremental_com_matcher_sem_spacy():
+    df = pd.DataFrame([
+        {"url": u, "texto_completo": t, "data_normalizada": "2025-01-10", "sentimento_previsto": "POSITIVE"}
+        for u, t in [("u1", "PETR4 dispara"), ("u2", "Esperar agora vale a pena")]
+    ])
+    with tempfile.TemporaryDirectory() as d:
+        caminhos = {"arquivo_saida": os.path.join(d, "mapeadas.json"), "arquivo_entidades": os.path.join(d, "entidades.json")}
+        primeira = mapear_incremental(df, None, MAPA, motor="matcher", **caminhos)
+        gravar_mapeamento(primeira, **caminhos)
+        assert primeira["reconstruir"] and primeira["mapeadas"]["url"].tolist() == ["u1"]
+        assert primeira["mapeadas"]["tickers_citados"].tolist() == [["PETR4.SA"]]
+
+        assert mapear_incremental(df, None, MAPA, motor="matcher", **caminhos)["mapeadas"].empty
+        # O motor fica no estado: trocar de motor reconstrói a base
+        with open(os.path.join(d, "entidades.estado.json"), encoding="utf-8") as f:
+            assert json.load(f)["motor"] == "matcher"
+        assert mapear_incremental(df, _NlpSemEntidades(), MAPA, motor="ner", **caminhos)["reconstruir"]
+
+
+class _NlpSemEntidades:
+    """Interface do spaCy usada por extrair_empresas_lote, sem entidades."""
+    pipe_names = []
+
+    def select_pipes(self, disable):
+        return contextlib.nullcontext()
+
+    def pipe(self, textos, batch_size, n_process):
+        return (SimpleNamespace(ents=[]) for _ in textos)
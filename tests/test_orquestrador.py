@@ -0,0 +1,89 @@
+"""
+Testes do orquestrador (pula etapas com entradas inalteradas, reexecuta as dependentes, para na falha).
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+import orquestrador
+from orquestrador import executar_pipeline, precos_no_dia
+
+
+def _preparar(monkeypatch, entradas, produz=None, falha=None):
+    chamadas = []
+
+    def etapa(nome):
+        def executar(ctx):
+            chamadas.append(nome)
+            if nome == falha:
+                raise RuntimeError("falhou")
+            return bool(produz and nome in produz)
+        return executar
+
+    monkeypatch.setattr(orquestrador, "_FUNCOES", {e: etapa(e) for e in orquestrador.ETAPAS})
+    monkeypatch.setattr(orquestrador, "impressao_entradas", lambda e: entradas.get(e))
+    return chamadas
+
+
+def test_pula_etapas_inalteradas_e_forcar_reexecuta(monkeypatch):
+    entradas = {"sentimento": {"a": 1}, "tickers": {"b": 1}}
+    chamadas = _preparar(monkeypatch, entradas)
+    with tempfile.TemporaryDirectory() as d:
+        estado = os.path.join(d, "estado.json")
+        assert executar_pipeline(["sentimento", "tickers"], caminho_estado=estado)["ok"]
+        assert chamadas == ["sentimento", "tickers"]
+
+        relatorio = executar_pipeline(["sentimento", "tickers"], caminho_estado=estado)
+        assert chamadas == ["sentimento", "tickers"]
+        assert all(r["pulada"] for r in relatorio["etapas"])
+
+        executar_pipeline(["sentimento", "tickers"], forcar=True, caminho_estado=estado)
+        assert chamadas == ["sentimento", "tickers"] * 2
+
+
+def test_dados_novos_reexecutam_etapas_seguintes(monkeypatch):
+    entradas = {"sentimento": {"a": 1}, "tickers": {"b": 1}}
+    chamadas = _preparar(monkeypatch, entradas, produz={"sentimento"})
+    with tempfile.TemporaryDirectory() as d:
+        estado = os.path.join(d, "estado.json")
+        executar_pipeline(["sentimento", "tickers"], caminho_estado=estado)
+        entradas["sentimento"] = {"a": 2}
+        executar_pipeline(["sentimento", "tickers"], caminho_estado=estado)
+        assert chamadas == ["sentimento", "tickers"] * 2
+
+
+def test_falha_interrompe_e_nao_grava_impressao(monkeypatch):
+    entradas = {"sentimento": {"a": 1}, "tickers": {"b": 1}, "recomendacao": {"c": 1}}
+    chamadas = _preparar(monkeypatch, entradas, falha="tickers")
+    with tempfile.TemporaryDirectory() as d:
+        estado = os.path.join(d, "estado.json")
+        relatorio = executar_pipeline(["sentimento", "tickers", "recomendacao"], caminho_estado=estado)
+        assert not relatorio["ok"]
+        assert [r["etapa"] for r in relatorio["etapas"]] == ["sentimento", "tickers"]
+
+        executar_pipeline(["sentimento", "tickers", "recomendacao"], caminho_estado=estado)
+        assert chamadas == ["sentimento", "tickers", "tickers"]
+
+
+def test_impressao_de_tickers_inclui_motor_e_aliases(monkeypatch):
+    antes = orquestrador.impressao_entradas("tickers")
+    monkeypatch.setattr(orquestrador, "MOTOR_MAPEAMENTO", "matcher")
+    assert orquestrador.impressao_entradas("tickers") != antes
+    monkeypatch.setattr(orquestrador, "MOTOR_MAPEAMENTO", antes["motor"])
+    monkeypatch.setattr(orquestrador, "ALIAS_LIMIAR_CONFIANCA", 0.99)
+    assert orquestrador.impressao_entradas("tickers") != antes
+
+
+def test_precos_no_dia():
+    fechamento = pd.DataFrame(
+        {"PETR4": [30.0, None], "VALE3": [60.0, 61.0]},
+        index=pd.to_datetime(["2025-01-10", "2025-01-13"]),
+    )
+    df = pd.DataFrame({
+        "data_normalizada": ["2025-01-10T09:00:00", "2025-01-13", "2025-01-11", None],
+        "tickers_citados": [["PETR4", "VALE3"], ["PETR4"], ["VALE3"], ["VALE3"]],
+    })
+    assert precos_no_dia(df, fechamento) == [
+        {"PETR4": 30.0, "VALE3": 60.0}, {"PETR4": None}, {"VALE3": None}, {"VALE3": None},
+    ]
@@ -0,0 +1,80 @@
+"""
+Testes da base local de preços (precos.py) com provedor local, sem acesso à rede.
+"""
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from precos import ArmazemPrecos, ProvedorPrecos, get_prices
+
+
+class ProvedorFixo(ProvedorPrecos):
+    """Gera OHLCV determinístico em dias úteis e registra cada chamada."""
+
+    def __init__(self, sem_dados=()):
+        self.chamadas = []
+        self.sem_dados = set(sem_dados)
+
+    def baixar(self, tickers, inicio, fim):
+        self.chamadas.append((tuple(tickers), inicio, fim))
+        dias = pd.bdate_range(inicio, fim - pd.Timedelta(days=1))
+        saida = {}
+        for k, t in enumerate(tickers):
+            if t in self.sem_dados:
+                continue
+            base = 10.0 * (k + 1) + np.arange(len(dias))
+            saida[t] = pd.DataFrame(
+                {"Open": base, "High": base + 1, "Low": base - 1, "Close": base + 0.5, "Volume": 1000.0},
+                index=dias,
+            )
+        return saida
+
+
+def test_formato_wide_e_multiindex():
+    with tempfile.TemporaryDirectory() as d:
+        armazem = ArmazemPrecos(d, ProvedorFixo())
+        close = get_prices(["PETR4.SA", "VALE3.SA"], "2024-01-01", "2024-01-08", "Close", armazem=armazem)
+        assert list(close.columns) == ["PETR4.SA", "VALE3.SA"]
+        assert close.index.name == "Date"
+        assert len(close) == 5  # 01 a 05/01 (dias úteis), fim exclusivo
+        ohlc = get_prices("PETR4.SA", "2024-01-01", "2024-01-08", ["Open", "Close"], armazem=armazem)
+        assert ohlc["Close"]["PETR4.SA"].tolist() == close["PETR4.SA"].tolist()
+
+
+def test_so_baixa_intervalos_ausentes():
+    with tempfile.TemporaryDirectory() as d:
+        provedor = ProvedorFixo()
+        armazem = ArmazemPrecos(d, provedor)
+        get_prices("PETR4.SA", "2024-01-01", "2024-02-01", armazem=armazem)
+        get_prices("PETR4.SA", "2024-01-10", "2024-01-20", armazem=armazem)
+        assert len(provedor.chamadas) == 1
+        get_prices("PETR4.SA", "2023-12-15", "2024-02-10", armazem=armazem)
+        lacunas = [(ini.strftime("%Y-%m-%d"), fim.strftime("%Y-%m-%d")) for _, ini, fim in provedor.chamadas[1:]]
+        assert lacunas == [("2023-12-15", "2024-01-01"), ("2024-02-01", "2024-02-10")]
+
+
+def test_cache_persiste_entre_instancias_e_agrupa_tickers():
+    with tempfile.TemporaryDirectory() as d:
+        get_prices(["PETR4.SA", "VALE3.SA"], "2024-01-01", "2024-01-31", armazem=ArmazemPrecos(d, ProvedorFixo()))
+        provedor = ProvedorFixo()
+        armazem = ArmazemPrecos(d, provedor)
+        get_prices(["PETR4.SA", "VALE3.SA", "ITUB4.SA"], "2024-01-01", "2024-01-31", armazem=armazem)
+        assert provedor.chamadas == [(("ITUB4.SA",), pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-31"))]
+
+
+def test_ticker_sem_dados_vira_coluna_nan():
+    with tempfile.TemporaryDirectory() as d:
+        armazem = ArmazemPrecos(d, ProvedorFixo(sem_dados={"XXXX3.SA"}))
+        close = get_prices(["PETR4.SA", "XXXX3.SA"], "2024-01-01", "2024-01-10", armazem=armazem)
+        assert close["XXXX3.SA"].isna().all()
+        assert close["PETR4.SA"].notna().all()
+
+
+def test_provedor_sem_baixar_falha_ao_ser_criado():
+    class ProvedorIncompleto(ProvedorPrecos):
+        pass
+
+    with pytest.raises(TypeError):
+        ProvedorIncompleto()
@@ -0,0 +1,118 @@
+"""
+Testes da recomendação: evidências filtradas por data, decisão em lote e histórico.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import salvar_noticias
+import recomendacao
+from recomendacao import (
+    COLUNAS_HISTORICO,
+    carregar_historico_recomendacoes,
+    carregar_noticias_mapeadas,
+    decidir_acoes,
+    escolher_data,
+    gerar_recomendacoes,
+    indexar_noticias_por_data,
+    noticias_por_data_ticker,
+    salvar_historico_recomendacoes,
+)
+
+
+def _noticia(url, data, sentimento, tickers):
+    return {"url": url, "title": f"Título {url}", "data_normalizada": f"{data}T10:00:00.000",
+            "sentimento_previsto": sentimento, "tickers_citados": tickers}
+
+
+NOTICIAS = [
+    _noticia("u1", "2025-01-10", "POSITIVE", ["PETR4.SA", "VALE3.SA"]),
+    _noticia("u2", "2025-01-10", "NEGATIVE", ["PETR4.SA"]),
+    _noticia("u3", "2025-01-11", "NEUTRAL", ["VALE3.SA"]),
+    {"url": "u4", "title": "Sem data", "data_normalizada": None, "sentimento_previsto": "POSITIVE",
+     "tickers_citados": ["PETR4.SA"]},
+]
+
+
+def test_evidencias_por_data_e_ticker():
+    out = noticias_por_data_ticker(pd.DataFrame(NOTICIAS))
+    assert list(out) == ["2025-01-10", "2025-01-11"]
+    assert [e["url"] for e in out["2025-01-10"]["PETR4.SA"]] == ["u1", "u2"]
+    assert out["2025-01-10"]["VALE3.SA"] == [{"titulo": "Título u1", "url": "u1", "sentimento": "POSITIVE"}]
+
+
+def test_filtro_por_data_com_e_sem_indice():
+    df = pd.DataFrame(NOTICIAS)
+    completo = noticias_por_data_ticker(df)
+    indice = indexar_noticias_por_data(df)
+    assert noticias_por_data_ticker(df, datas=["2025-01-11"]) == {"2025-01-11": completo["2025-01-11"]}
+    assert noticias_por_data_ticker(df, datas=["2025-01-10"], indice=indice) == {"2025-01-10": completo["2025-01-10"]}
+    assert noticias_por_data_ticker(df, datas=["2030-01-01"], indice=indice) == {}
+
+
+def test_escolher_data_e_leitura_so_do_dia():
+    df_sent = pd.DataFrame({"data": pd.to_datetime(["2025-01-10", "2025-01-11"]),
+                            "tickers_citados": ["PETR4.SA", "VALE3.SA"], "score": [1, 0]})
+    assert escolher_data(df_sent) == (["2025-01-10", "2025-01-11"], "2025-01-11")
+    assert escolher_data(df_sent, "2025-01-10")[1] == "2025-01-10"
+    assert escolher_data(df_sent.iloc[0:0]) == ([], None)
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "mapeadas.json")
+        salvar_noticias(pd.DataFrame(NOTICIAS), caminho, exportar=False)
+        df = carregar_noticias_mapeadas(caminho, data_inicio="2025-01-10", data_fim="2025-01-10")
+        assert sorted(df["url"]) == ["u1", "u2"]
+
+
+class _Escala:
+    def transform(self, X):
+        return X
+
+
+class _ModeloProb:
+    """P(subiu) = score / 10 + 0.5."""
+
+    def predict_proba(self, X):
+        p = X[:, 0] / 10 + 0.5
+        return np.column_stack([1 - p, p])
+
+
+def test_decidir_acoes_em_lote():
+    acoes = decidir_acoes(np.array([2.0, 0.0, -2.0, 1.0]), modelo_dec=(_ModeloProb(), _Escala()))
+    assert acoes.tolist() == ["compra", "segurar", "venda", "compra"]
+    assert decidir_acoes(np.array([1.0, -1.0])).tolist() == ["segurar", "segurar"]
+
+
+def test_gerar_recomendacoes_igual_a_uma_data_por_vez(monkeypatch):
+    monkeypatch.setattr(recomendacao, "_carregar_decisor", lambda: (None, (_ModeloProb(), _Escala())))
+    df = pd.DataFrame(NOTICIAS)
+    lote = gerar_recomendacoes(df)
+    assert list(lote.columns) == COLUNAS_HISTORICO
+    assert lote[["data", "ticker", "acao", "quantidade_noticias"]].values.tolist() == [
+        ["2025-01-10", "PETR4.SA", "segurar", 2],
+        ["2025-01-10", "VALE3.SA", "compra", 1],
+        ["2025-01-11", "VALE3.SA", "segurar", 1],
+    ]
+    for data in ("2025-01-10", "2025-01-11"):
+        rec = recomendacao.gerar_recomendacao(df, data)
+        esperado = pd.DataFrame(rec["investir"]).assign(data=data)[COLUNAS_HISTORICO]
+        pd.testing.assert_frame_equal(lote[lote["data"] == data].reset_index(drop=True), esperado)
+    assert gerar_recomendacoes(df, datas=["2025-01-11"])["ticker"].tolist() == ["VALE3.SA"]
+
+
+def test_historico_substitui_datas_regravadas():
+    def linhas(data, tickers, acao):
+        return pd.DataFrame({"data": data, "ticker": tickers, "acao": acao, "score": 1.0, "quantidade_noticias": 1,
+                             "usou_modelo_treinado": True, "usou_rl": False})[COLUNAS_HISTORICO]
+
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "historico.parquet")
+        salvar_historico_recomendacoes(linhas("2025-01-10", ["PETR4.SA", "VALE3.SA"], "compra"), caminho)
+        salvar_historico_recomendacoes(linhas("2025-01-11", ["VALE3.SA"], "venda"), caminho)
+        salvar_historico_recomendacoes(linhas("2025-01-10", ["PETR4.SA"], "venda"), caminho)
+        historico = carregar_historico_recomendacoes(caminho)
+        assert historico[["data", "ticker", "acao"]].values.tolist() == [
+            ["2025-01-10", "PETR4.SA", "venda"], ["2025-01-11", "VALE3.SA", "venda"],
+        ]
+        assert len(carregar_historico_recomendacoes(caminho, data_inicio="2025-01-11")) == 1
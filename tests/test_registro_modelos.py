@@ -0,0 +1,57 @@
+"""
+Testes do registro de modelos (uma carga por arquivo, recarga só quando o conteúdo muda).
+"""
+import json
+import os
+import tempfile
+
+from registro_modelos import RegistroModelos
+
+
+def _gravar(caminho, conteudo, mtime_ns):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f)
+    os.utime(caminho, ns=(mtime_ns, mtime_ns))
+
+
+def test_carrega_uma_vez_e_recarrega_so_quando_o_conteudo_muda():
+    registro, leituras = RegistroModelos(), []
+
+    def carregador(caminho):
+        leituras.append(caminho)
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "politica.json")
+        _gravar(caminho, {"Q": {"0_1": 1.0}}, 1_000_000_000)
+        primeiro = registro.obter(caminho, carregador)
+        assert registro.obter(caminho, carregador) is primeiro
+        _gravar(caminho, {"Q": {"0_1": 1.0}}, 2_000_000_000)  # mesmo conteúdo, mtime novo
+        assert registro.obter(caminho, carregador) is primeiro
+        assert len(leituras) == 1
+        _gravar(caminho, {"Q": {"0_1": 2.0}}, 3_000_000_000)
+        assert registro.obter(caminho, carregador) == {"Q": {"0_1": 2.0}}
+        metricas = registro.metricas()[os.path.abspath(caminho)]
+        assert (metricas["cargas"], metricas["acertos"]) == (2, 2)
+        assert metricas["tempo_total_s"] >= metricas["tempo_ultima_carga_s"]
+        os.remove(caminho)
+        assert registro.obter(caminho, carregador) is None
+        assert registro.metricas() == {}
+
+
+def test_falha_na_carga_nao_fica_em_cache():
+    registro = RegistroModelos()
+
+    def falha(caminho):
+        raise ValueError("arquivo corrompido")
+
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "modelo.joblib")
+        _gravar(caminho, {}, 1_000_000_000)
+        try:
+            registro.obter(caminho, falha)
+        except ValueError:
+            pass
+        assert registro.metricas() == {}
+        assert registro.obter(caminho, lambda c: "ok") == "ok"
@@ -0,0 +1,83 @@
+"""
+Testes das funções vetorizadas do agente RL (discretização, tabela de ações e treino Q-Learning).
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from rl_agente import (
+    ACAO_COMPRAR,
+    ACAO_SEGURAR,
+    ACAO_VENDER,
+    N_ACOES,
+    N_BUCKETS,
+    _discretizar_sentimento,
+    _episodio_lote,
+    _episodio_sequencial,
+    acao_rl,
+    acoes_rl,
+    discretizar_sentimentos,
+    tabela_acoes_rl,
+    treinar_qlearning,
+)
+
+
+def _politica(rng):
+    return {"Q": {f"{s}_{a}": float(rng.normal()) for s in range(N_BUCKETS) for a in range(N_ACOES)}}
+
+
+def test_discretizacao_vetorizada_igual_a_escalar():
+    scores = np.concatenate([np.arange(-12, 12.5, 0.5), np.random.default_rng(0).normal(0, 6, 500)])
+    esperado = [_discretizar_sentimento(float(s)) for s in scores]
+    assert discretizar_sentimentos(scores).tolist() == esperado
+
+
+def test_acoes_vetorizadas_iguais_a_acao_rl():
+    rng = np.random.default_rng(1)
+    pol = _politica(rng)
+    scores = rng.normal(0, 5, (30, 7))
+    acoes = acoes_rl(scores, pol)
+    assert acoes.shape == scores.shape
+    assert acoes.ravel().tolist() == [acao_rl(float(s), pol) for s in scores.ravel()]
+
+
+def test_tabela_empate_e_entradas_ausentes():
+    # Estado 0: compra domina; estado 1: empate entre venda e compra (vence a menor ação);
+    # demais estados sem entradas (Q = 0) -> segurar
+    pol = {"Q": {"0_1": 1.0, "1_1": 0.5, "1_2": 0.5}}
+    tabela = tabela_acoes_rl(pol)
+    assert tabela[0] == ACAO_COMPRAR
+    assert tabela[1] == ACAO_COMPRAR
+    assert (tabela[2:] == ACAO_SEGURAR).all()
+    assert tabela_acoes_rl({"Q": {"3_2": 0.1}})[3] == ACAO_VENDER
+
+
+def test_episodio_em_lote_igual_ao_sequencial_quando_so_explora():
+    rng = np.random.default_rng(2)
+    n = 200
+    estados = rng.integers(0, N_BUCKETS, n)
+    recompensas = rng.normal(0, 0.02, (n, N_ACOES))
+    ordem, sorteios, acoes = rng.permutation(n), rng.random(n), rng.integers(0, N_ACOES, n)
+    q_seq = rng.normal(0, 0.01, (N_BUCKETS, N_ACOES))
+    q_lote = q_seq.copy()
+    _episodio_sequencial(q_seq, estados, recompensas, ordem, sorteios, acoes, 1.1, 0.1)
+    _episodio_lote(q_lote, estados, recompensas, ordem, sorteios, acoes, 1.1, 0.1)
+    np.testing.assert_allclose(q_lote, q_seq, atol=1e-12)
+
+
+def test_treino_aprende_politica_e_mantem_formato_json():
+    rng = np.random.default_rng(3)
+    sentimento = rng.integers(-8, 9, 300).astype(float)
+    df = pd.DataFrame({"sentimento": sentimento, "retorno_dia_seguinte": 0.01 * np.sign(sentimento)})
+    with tempfile.TemporaryDirectory() as d:
+        for modo in ("sequencial", "lote"):
+            caminho = os.path.join(d, f"{modo}.json")
+            treinar_qlearning(df, modo=modo, caminho=caminho)
+            with open(caminho, encoding="utf-8") as f:
+                pol = json.load(f)
+            assert len(pol["Q"]) == N_BUCKETS * N_ACOES
+            assert acao_rl(8.0, pol) == ACAO_COMPRAR
+            assert acao_rl(-8.0, pol) == ACAO_VENDER
@@ -0,0 +1,77 @@
+"""
+Testes da tabela materializada de sentimento diário (atualização incremental por dia/mês).
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+from armazenamento import anexar_noticias, salvar_noticias
+from recomendacao import agregar_sentimento_por_dia_ticker
+import sentimento_diario
+from sentimento_diario import agregar_noticias, atualizar_sentimento_diario, carregar_sentimento_diario
+
+
+def _noticia(url, data, sentimento, tickers, fonte="infomoney"):
+    return {"url": url, "data_normalizada": f"{data}T10:00:00.000", "sentimento_previsto": sentimento,
+            "tickers_citados": tickers, "source": fonte}
+
+
+NOTICIAS = [
+    _noticia("u1", "2025-01-10", "POSITIVE", ["PETR4.SA", "VALE3.SA"]),
+    _noticia("u2", "2025-01-10", "NEGATIVE", ["PETR4.SA"], fonte="valor"),
+    _noticia("u3", "2025-01-10", "POSITIVE", ["PETR4.SA"]),
+    _noticia("u4", "2025-02-03", "NEUTRAL", ["VALE3.SA"]),
+]
+
+
+def test_agregacao_por_fonte_e_contagens():
+    tabela = agregar_noticias(pd.DataFrame(NOTICIAS))
+    petr = tabela[(tabela["ticker"] == "PETR4.SA")].set_index("source")
+    assert petr.loc["infomoney", "sentimento"] == 2
+    assert petr.loc["infomoney", "positivas"] == 2
+    assert petr.loc["valor", "negativas"] == 1
+    assert petr.loc["valor", "media"] == -1.0
+
+
+def test_acessor_igual_a_agregacao_completa():
+    with tempfile.TemporaryDirectory() as d:
+        caminho, tabela = os.path.join(d, "mapeadas.json"), os.path.join(d, "diario.parquet")
+        salvar_noticias(pd.DataFrame(NOTICIAS), caminho, exportar=False)
+        diario = carregar_sentimento_diario(caminho, caminho_tabela=tabela)
+        esperado = agregar_sentimento_por_dia_ticker(pd.DataFrame(NOTICIAS))
+        assert diario["sentimento"].tolist() == esperado["score"].tolist()
+        assert diario["ticker"].tolist() == esperado["tickers_citados"].tolist()
+        petr = diario[diario["ticker"] == "PETR4.SA"].iloc[0]
+        assert (petr["sentimento"], petr["quantidade"], petr["media"]) == (1, 3, 1 / 3)
+
+
+def test_atualizacao_incremental_so_recalcula_dias_tocados(monkeypatch):
+    with tempfile.TemporaryDirectory() as d:
+        caminho, tabela = os.path.join(d, "mapeadas.json"), os.path.join(d, "diario.parquet")
+        salvar_noticias(pd.DataFrame(NOTICIAS), caminho, exportar=False)
+        atualizar_sentimento_diario(caminho, tabela)
+
+        lidos = []
+        ler_original = sentimento_diario.ler_noticias
+        monkeypatch.setattr(
+            sentimento_diario, "ler_noticias",
+            lambda *a, **k: lidos.append((k.get("data_inicio"), k.get("data_fim"))) or ler_original(*a, **k),
+        )
+        # Sem mudanças: nada é lido
+        atualizar_sentimento_diario(caminho, tabela)
+        assert lidos == []
+
+        anexar_noticias(pd.DataFrame([_noticia("u5", "2025-02-03", "NEGATIVE", ["VALE3.SA"])]), caminho, exportar=False)
+        diario = carregar_sentimento_diario(caminho, caminho_tabela=tabela)
+        assert lidos == [("2025-02-03", "2025-02-03")]
+        vale = diario[diario["ticker"] == "VALE3.SA"].set_index("data")
+        assert vale.loc[pd.Timestamp("2025-02-03"), "quantidade"] == 2
+        assert vale.loc[pd.Timestamp("2025-02-03"), "sentimento"] == -1
+        assert vale.loc[pd.Timestamp("2025-01-10"), "sentimento"] == 1
+
+        # Reescrita da base: meses das partes removidas são recalculados
+        salvar_noticias(pd.DataFrame(NOTICIAS[:2]), caminho, exportar=False)
+        diario = carregar_sentimento_diario(caminho, caminho_tabela=tabela)
+        assert diario[diario["ticker"] == "VALE3.SA"]["data"].dt.strftime("%Y-%m-%d").tolist() == ["2025-01-10"]
+        assert diario[diario["ticker"] == "PETR4.SA"]["quantidade"].tolist() == [2]
@@ -0,0 +1,72 @@
+"""
+Testes do serviço de recomendação (rotas HTTP com modelos falsos já "carregados").
+"""
+import contextlib
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from servico_recomendacao import (
+    ServicoRecomendacao,
+    chamar_servico,
+    criar_servidor,
+    executar_no_servico,
+    servico_disponivel,
+)
+
+
+class _MotorFalso:
+    ultima_taxa = 10.0
+
+    def classificar(self, textos):
+        return [{"sentimento": "POSITIVE" if "alta" in t else "NEGATIVE", "probabilidades": None} for t in textos]
+
+
+class _NlpFalso:
+    """Interface do spaCy usada por associar_tickers.extrair_empresas_lote."""
+    pipe_names = []
+
+    def select_pipes(self, disable):
+        return contextlib.nullcontext()
+
+    def pipe(self, textos, batch_size, n_process):
+        for texto in textos:
+            ents = [SimpleNamespace(text=p, label_="ORG") for p in texto.split() if p[:1].isupper()]
+            yield SimpleNamespace(ents=ents)
+
+
+@pytest.fixture
+def servidor():
+    servico = ServicoRecomendacao(motor=_MotorFalso(), nlp=_NlpFalso(), mapa_tickers={"Petrobras": "PETR4.SA", "Vale": None})
+    srv = criar_servidor(servico, porta=0)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield "http://%s:%d" % srv.server_address[:2]
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_saude_classificar_e_mapear(servidor):
+    assert servico_disponivel(servidor)
+    saude = chamar_servico("/saude", url=servidor)
+    assert saude["carregados"] == {"finbert": True, "spacy": True}
+    classes = chamar_servico("/classificar", {"textos": ["ação em alta", "queda"]}, url=servidor)
+    assert [r["sentimento"] for r in classes["resultados"]] == ["POSITIVE", "NEGATIVE"]
+    mapa = chamar_servico("/mapear", {"textos": ["Petrobras e Vale sobem"]}, url=servidor)
+    assert mapa["resultados"][0]["tickers"] == ["PETR4.SA"]
+    assert sorted(mapa["resultados"][0]["empresas"]) == ["Petrobras", "Vale"]
+
+
+def test_erros_de_requisicao(servidor):
+    with pytest.raises(OSError, match="400"):
+        chamar_servico("/classificar", {"sem_textos": []}, url=servidor)
+    with pytest.raises(OSError, match="400"):
+        chamar_servico("/executar", {"etapas": ["inexistente"]}, url=servidor)
+    with pytest.raises(OSError, match="404"):
+        chamar_servico("/outra", {}, url=servidor)
+
+
+def test_sem_servico_volta_para_subprocessos():
+    assert not servico_disponivel("http://127.0.0.1:9", timeout=0.2)
+    assert executar_no_servico(["recomendacao"], url="http://127.0.0.1:9") is None
@@ -0,0 +1,111 @@
+"""
+Testes do backtest vetorizado (mapeamento para o próximo pregão e máquina de estados comprado/zerado).
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from simulador_estrategia import (
+    ARQUIVO_OPERACOES,
+    ARQUIVO_PATRIMONIO,
+    ARQUIVO_RESUMO,
+    COLUNAS_RESULTADO,
+    agregar_sentimentos_por_ticker,
+    carregar_e_processar_sentimentos,
+    curva_patrimonio,
+    executar_backtest,
+    executar_simulacoes,
+    salvar_simulacoes,
+    simular_posicao,
+)
+
+NOTICIAS = [
+    {"url": "u1", "texto_completo": " Alta ", "data_normalizada": "2024-01-05T00:00:00.000",
+     "sentimento_previsto": "POSITIVE", "tickers_citados": ["PETR4.SA", "VALE3.SA", "PETR4.SA"]},
+    {"url": "u2", "texto_completo": "Mais alta", "data_normalizada": "2024-01-05T00:00:00.000",
+     "sentimento_previsto": "POSITIVE", "tickers_citados": ["PETR4.SA"]},
+    {"url": "u3", "texto_completo": "Queda", "data_normalizada": "2024-01-09T00:00:00.000",
+     "sentimento_previsto": "NEGATIVE", "tickers_citados": ["PETR4.SA"]},
+    {"url": "u4", "texto_completo": "Neutra", "data_normalizada": "2024-01-10T00:00:00.000",
+     "sentimento_previsto": "NEUTRAL", "tickers_citados": ["VALE3.SA"]},
+    {"url": "u5", "texto_completo": None, "data_normalizada": None,
+     "sentimento_previsto": "NEGATIVE", "tickers_citados": ["PETR4.SA"]},
+]
+
+
+def _agregado():
+    with tempfile.TemporaryDirectory() as d:
+        caminho = os.path.join(d, "noticias.json")
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(NOTICIAS, f)
+        return agregar_sentimentos_por_ticker(caminho)
+
+
+def test_agrega_todos_os_tickers_de_uma_vez():
+    df = _agregado()
+    petr = carregar_e_processar_sentimentos(None, "PETR4.SA", df_agregado=df)
+    assert petr["valor"].tolist() == [2, -1]  # ticker repetido na notícia conta uma vez
+    assert petr["texto"].tolist() == ["Alta | Mais alta", "Queda"]
+    assert petr["sentimento_dia"].tolist() == ["POSITIVO", "NEGATIVO"]
+    vale = carregar_e_processar_sentimentos(None, "VALE3.SA", df_agregado=df)
+    assert vale["sentimento_dia"].tolist() == ["POSITIVO", "NEUTRO"]
+
+
+def _cotacoes():
+    return pd.Series([10.0, 11.0, 12.0, 13.0], index=pd.to_datetime(["2024-01-05", "2024-01-08", "2024-01-10", "2024-01-11"]))
+
+
+def test_executa_no_proximo_pregao_e_mantem_colunas():
+    # Sexta 05/01 -> segunda 08/01; terça 09/01 -> quarta 10/01
+    cotacoes = _cotacoes()
+    petr = carregar_e_processar_sentimentos(None, "PETR4.SA", df_agregado=_agregado())
+    resultado = executar_backtest(petr, "PETR4.SA", capital_inicial=100.0, cotacoes=cotacoes)
+    assert list(resultado.columns) == COLUNAS_RESULTADO
+    assert resultado["Decisão"].tolist() == ["COMPRA", "VENDA"]
+    assert resultado["Preço Unitário"].tolist() == [11.0, 12.0]
+    assert resultado["Qtd. Ações"].tolist() == [9, 0]
+    assert resultado["Caixa Livre"].tolist() == [1.0, 109.0]
+    assert resultado["Lucro/Prejuízo"].iloc[1] == 9.0
+    assert np.isnan(resultado["Lucro/Prejuízo"].iloc[0])
+
+
+def test_maquina_de_estados():
+    scores = np.array([-1, 1, 1, -1, 1, -1, -1], dtype=float)
+    precos = np.array([5.0, 10.0, 11.0, 20.0, 300.0, 30.0, 30.0])
+    decisoes, qtd, caixa, lucro = simular_posicao(scores, precos, 100.0)
+    # 0=NENHUMA, 1=COMPRA, 2=VENDA, 3=MANTIDO (Comprado), 4=MANTIDO (Zerado)
+    assert decisoes.tolist() == [4, 1, 3, 2, 0, 4, 4]  # sem caixa para comprar a 300: NENHUMA
+    assert qtd.tolist() == [0, 10, 10, 0, 0, 0, 0]
+    assert caixa[-1] == 200.0
+    assert lucro[3] == 100.0
+
+
+def test_curva_patrimonio_diaria():
+    petr = carregar_e_processar_sentimentos(None, "PETR4.SA", df_agregado=_agregado())
+    resultado = executar_backtest(petr, "PETR4.SA", capital_inicial=100.0, cotacoes=_cotacoes())
+    curva = curva_patrimonio(resultado, _cotacoes(), capital_inicial=100.0)
+    # 05/01 ainda zerado; 08/01 comprado (9 x 11 + 1); 10/01 vendido a 12; 11/01 só caixa
+    assert curva["Patrimônio Total"].tolist() == [100.0, 100.0, 109.0, 109.0]
+
+
+def test_simulacoes_consolidadas():
+    df = _agregado()
+    precos = pd.DataFrame({"PETR4.SA": _cotacoes(), "VALE3.SA": _cotacoes()})
+    operacoes, curvas, resumo = executar_simulacoes(df, precos, capital_inicial=100.0, n_processos=1)
+    assert resumo["ticker"].tolist() == ["PETR4.SA", "VALE3.SA"]
+    assert (resumo["status"] == "ok").all()
+    por_ticker = resumo.set_index("ticker")
+    assert por_ticker.loc["PETR4.SA", "vendas"] == 1
+    assert np.isclose(por_ticker.loc["PETR4.SA", "retorno_acumulado_pct"], 9.0)
+    assert len(curvas) == 8
+    with tempfile.TemporaryDirectory() as d:
+        salvar_simulacoes(operacoes, curvas, resumo, d)
+        lido = pd.read_parquet(os.path.join(d, ARQUIVO_OPERACOES))
+        assert lido["ticker"].tolist() == ["PETR4.SA", "PETR4.SA", "VALE3.SA"]
+        assert os.path.exists(os.path.join(d, ARQUIVO_PATRIMONIO))
+        assert os.path.exists(os.path.join(d, ARQUIVO_RESUMO))
+        csv = pd.read_csv(os.path.join(d, "resultado_estrategia_PETR4.csv"))
+        assert list(csv.columns) == COLUNAS_RESULTADO
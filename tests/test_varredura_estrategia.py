@@ -0,0 +1,78 @@
+"""
+Testes da varredura de parâmetros (simulação da grade em arrays e métricas walk-forward).
+"""
+import numpy as np
+import pandas as pd
+
+from scripts.avaliacao_metricas import resumo_metricas
+from varredura_estrategia import (
+    grade_parametros,
+    janelas_walk_forward,
+    metricas_colunas,
+    simular_grade,
+    varrer,
+)
+
+
+def _dados(n_pregoes=120, n_tickers=4, semente=0):
+    rng = np.random.default_rng(semente)
+    indice = pd.bdate_range("2024-01-01", periods=n_pregoes)
+    sinal = rng.integers(-3, 4, (n_pregoes, n_tickers)) * (rng.random((n_pregoes, n_tickers)) < 0.3)
+    retornos = rng.normal(0, 0.02, (n_pregoes, n_tickers))
+    return pd.DataFrame(sinal.astype(float), index=indice), pd.DataFrame(retornos, index=indice)
+
+
+def _referencia(sinal, retornos, limite_compra, limite_venda, lag, holding, custo):
+    """Simulação escalar, um ticker e um pregão por vez."""
+    n_pregoes, n_tickers = sinal.shape
+    carteira = np.zeros(n_pregoes)
+    for j in range(n_tickers):
+        posicionado, dias = False, 0
+        for t in range(n_pregoes):
+            carteira[t] += (retornos[t, j] if posicionado else 0.0) / n_tickers
+            s = sinal[t - lag, j] if t >= lag else np.nan
+            if posicionado and (s < limite_venda or (holding > 0 and dias >= holding)):
+                posicionado, dias = False, 0
+                carteira[t] -= custo / n_tickers
+            elif not posicionado and s > limite_compra:
+                posicionado, dias = True, 0
+                carteira[t] -= custo / n_tickers
+            if posicionado:
+                dias += 1
+    return carteira
+
+
+def test_grade_igual_a_simulacao_escalar():
+    sinal, retornos = _dados()
+    combinacoes = grade_parametros({"limite_compra": [0, 1], "limite_venda": [0, -2], "lag": [0, 2], "holding": [0, 3]})
+    carteira, _ = simular_grade(sinal.to_numpy(), retornos.to_numpy(), combinacoes, custo=0.002)
+    for i, linha in combinacoes.iterrows():
+        esperado = _referencia(sinal.to_numpy(), retornos.to_numpy(), *linha.tolist(), custo=0.002)
+        np.testing.assert_allclose(carteira[:, i], esperado, atol=1e-12)
+
+
+def test_metricas_iguais_a_resumo_metricas():
+    retornos = np.random.default_rng(1).normal(0.001, 0.01, (200, 3))
+    colunas = metricas_colunas(retornos)
+    for j in range(3):
+        esperado = resumo_metricas(pd.Series(retornos[:, j]))
+        assert np.isclose(colunas["retorno_acumulado"][j], esperado["retorno_acumulado"])
+        assert np.isclose(colunas["sharpe_ratio"][j], esperado["sharpe_ratio"])
+        assert np.isclose(colunas["max_drawdown"][j], esperado["max_drawdown"])
+
+
+def test_janelas_walk_forward_ancoradas():
+    janelas = janelas_walk_forward(100, n_janelas=4, fracao_treino=0.5)
+    assert [(t.start, t.stop, v.start, v.stop) for t, v in janelas] == [
+        (0, 50, 50, 62), (0, 62, 62, 75), (0, 75, 75, 87), (0, 87, 87, 100),
+    ]
+
+
+def test_varrer_ranqueia_e_seleciona_por_janela():
+    sinal, retornos = _dados(n_pregoes=200)
+    grade = {"limite_compra": [0, 1, 2], "limite_venda": [0, -1], "lag": [0, 1], "holding": [0, 2]}
+    ranking, selecao = varrer(sinal, retornos, grade, n_janelas=3)
+    assert len(ranking) == 24
+    assert ranking["sharpe_oos"].is_monotonic_decreasing
+    assert len(selecao) == 3
+    assert (selecao["teste_inicio"] > selecao["treino_fim"]).all()
@@ -6,8 +6,17 @@ from gymnasium import spaces
 import numpy as np
 import pandas as pd
 from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 import os
 import glob
+import multiprocessing
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import torch
+
+from config import RANDOM_SEED
 
 """
     estratégia 2 com método de aprendizado melhor
@@ -26,14 +35,32 @@ import glob
 PASTA_RESULTADOS = "resultados_rl"
 os.makedirs(PASTA_RESULTADOS, exist_ok=True)
 
+# Treino em paralelo: um processo por ticker, cada um limitado a poucas threads do torch
+# (None = número de CPUs // THREADS_POR_PROCESSO)
+N_PROCESSOS = None
+THREADS_POR_PROCESSO = 1
+
 class ICGymTradingEnv(gym.Env):
+    """
+    Ambiente de trading de um ativo sobre a matriz mestra.
+
+    Observações, preços e datas são convertidos em arrays na construção (observações em float32
+    contíguo), então step() só faz indexação em arrays. O histórico de movimentações só é
+    guardado com registrar_movimentacoes=True (passada de teste) e o texto é montado em gerar_log_texto().
+    """
     metadata = {"render_modes": ["human"]}
 
-    def __init__(self, df_dados, features):
+    def __init__(self, df_dados, features, registrar_movimentacoes=False):
         super(ICGymTradingEnv, self).__init__()
         self.df = df_dados.reset_index(drop=True)
         self.features = features
         self.max_steps = len(self.df) - 1
+        self.registrar_movimentacoes = registrar_movimentacoes
+
+        self.observacoes = np.ascontiguousarray(self.df[self.features].to_numpy(dtype=np.float32))
+        self.precos = self.df['preco_d'].to_numpy(dtype=np.float64)
+        self.datas = self.df['data'].to_numpy()
+        self._obs_final = np.zeros(len(self.features), dtype=np.float32)
         
         self.action_space = spaces.Discrete(3)
         self.observation_space = spaces.Box(
@@ -44,7 +71,8 @@ class ICGymTradingEnv(gym.Env):
         self.position = 0         
         self.entry_price = 0.0    
         self.lucro_acumulado = 0.0
-        self.historico_movimentacoes = []
+        # Eventos (passo, preço, lucro do trade ou None para compra); texto montado só no log
+        self._eventos = []
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
@@ -52,45 +80,51 @@ class ICGymTradingEnv(gym.Env):
         self.position = 0
         self.entry_price = 0.0
         self.lucro_acumulado = 0.0
-        self.historico_movimentacoes = []
+        self._eventos = []
         return self._get_obs(), {}
 
     def _get_obs(self):
-        linha_atual = self.df.iloc[self.current_step]
-        return linha_atual[self.features].values.astype(np.float32)
+        return self.observacoes[self.current_step]
 
     def step(self, action):
-        linha_atual = self.df.iloc[self.current_step]
-        preco_atual = linha_atual['preco_d']
-        data_atual = linha_atual['data']
-        
+        preco_atual = self.precos[self.current_step]
         reward = 0.0
-        movimentacao_texto = ""
 
         if action == 1: # COMPRAR
             if self.position == 0:
                 self.position = 1
                 self.entry_price = preco_atual
-                movimentacao_texto = f"[{data_atual}] COMPRA : R$ {preco_atual:.2f}"
+                if self.registrar_movimentacoes:
+                    self._eventos.append((self.current_step, preco_atual, None))
         elif action == 2: # VENDER
             if self.position == 1:
                 lucro_trade = (preco_atual - self.entry_price) / self.entry_price
                 reward = lucro_trade 
                 self.lucro_acumulado += lucro_trade
-                status = "LUCRO" if lucro_trade > 0 else "PREJUÍZO"
-                movimentacao_texto = f"[{data_atual}] VENDA  : R$ {preco_atual:.2f} | {status}: {(lucro_trade*100):.2f}%"
+                if self.registrar_movimentacoes:
+                    self._eventos.append((self.current_step, preco_atual, lucro_trade))
                 self.position = 0 
                 self.entry_price = 0.0
 
-        if movimentacao_texto: 
-            self.historico_movimentacoes.append(movimentacao_texto)
-
         self.current_step += 1
         terminated = self.current_step >= self.max_steps
         
-        obs = self._get_obs() if not terminated else np.zeros(len(self.features), dtype=np.float32)
+        obs = self._get_obs() if not terminated else self._obs_final
         return obs, reward, terminated, False, {}
 
+    @property
+    def historico_movimentacoes(self):
+        """Linhas de texto das movimentações registradas (montadas sob demanda)."""
+        linhas = []
+        for passo, preco, lucro_trade in self._eventos:
+            data_atual = pd.Timestamp(self.datas[passo])
+            if lucro_trade is None:
+                linhas.append(f"[{data_atual}] COMPRA : R$ {preco:.2f}")
+            else:
+                status = "LUCRO" if lucro_trade > 0 else "PREJUÍZO"
+                linhas.append(f"[{data_atual}] VENDA  : R$ {preco:.2f} | {status}: {(lucro_trade*100):.2f}%")
+        return linhas
+
     def gerar_log_texto(self):
         """Retorna o relatório completo em texto para ser salvo no arquivo"""
         linhas = ["=== RELATÓRIO DE MOVIMENTAÇÕES (RL) ==="]
@@ -99,33 +133,85 @@ class ICGymTradingEnv(gym.Env):
         linhas.append(f"LUCRO TOTAL ACUMULADO NO PERÍODO: {(self.lucro_acumulado * 100):.2f}%")
         return "\n".join(linhas)
 
+
+def criar_vec_env(dfs, features, subprocessos=False):
+    """
+    Cria um ambiente vetorizado do stable-baselines3 com um ICGymTradingEnv por DataFrame
+    (ex.: um por ticker), para o PPO coletar passos de vários ativos ao mesmo tempo.
+
+    Args:
+        dfs: Lista de matrizes mestras (uma por ambiente).
+        features: Colunas usadas como observação (iguais para todos os ambientes).
+        subprocessos: Se True, usa SubprocVecEnv (um processo por ambiente); senão DummyVecEnv.
+    """
+    fabricas = [lambda df=df: ICGymTradingEnv(df, features=features) for df in dfs]
+    if subprocessos:
+        return SubprocVecEnv(fabricas)
+    return DummyVecEnv(fabricas)
+
+def semente_ticker(ticker):
+    """Semente determinística por ticker (não depende da ordem nem do processo que treina)."""
+    return (RANDOM_SEED + zlib.crc32(ticker.encode("utf-8"))) % (2**31)
+
+
+def _ticker_do_arquivo(caminho_csv):
+    return os.path.basename(caminho_csv).replace('dataset_rl_', '').replace('.csv', '')
+
+
+def _caminhos_saida(ticker):
+    """(log, modelo) do ticker em PASTA_RESULTADOS. O PPO salva o modelo como .zip."""
+    return (
+        os.path.join(PASTA_RESULTADOS, f"log_rl_{ticker}.txt"),
+        os.path.join(PASTA_RESULTADOS, f"modelo_rl_{ticker}.zip"),
+    )
+
+
+def ja_treinado(caminho_csv):
+    """True se o log e o modelo do ticker existem e são mais novos que a matriz mestra."""
+    mtime_dados = os.path.getmtime(caminho_csv)
+    return all(
+        os.path.exists(c) and os.path.getmtime(c) >= mtime_dados
+        for c in _caminhos_saida(_ticker_do_arquivo(caminho_csv))
+    )
+
+
 def treinar_ticker(caminho_csv, configuracao_features, total_timesteps=10000):
+    """
+    Treina o PPO de um ticker (80% treino / 20% teste), salva log e modelo em PASTA_RESULTADOS.
+
+    Returns:
+        Dict com ticker, status ("ok" ou "poucos dados"), linhas, tempo_s e lucro_teste_pct.
+    """
+    inicio = time.perf_counter()
     
     # Extrai o nome do ticker do nome do arquivo
-    nome_arquivo = os.path.basename(caminho_csv)
-    ticker = nome_arquivo.replace('dataset_rl_', '').replace('.csv', '')
+    ticker = _ticker_do_arquivo(caminho_csv)
+    resumo = {"ticker": ticker, "status": "ok", "linhas": 0, "tempo_s": 0.0, "lucro_teste_pct": None}
     
     print(f"\nIniciando treinamento para: {ticker}")
     df = pd.read_csv(caminho_csv)
     df['data'] = pd.to_datetime(df['data'])
     df = df.sort_values('data').reset_index(drop=True)
+    resumo["linhas"] = len(df)
     
     # Separação Treino (80%) e Teste (20%)
     corte_idx = int(len(df) * 0.8)
     if corte_idx == 0:
         print(f"Poucos dados para {ticker}. Pulando.")
-        return
+        resumo["status"] = "poucos dados"
+        resumo["tempo_s"] = time.perf_counter() - inicio
+        return resumo
 
     df_treino = df.iloc[:corte_idx].reset_index(drop=True)
     df_teste = df.iloc[corte_idx:].reset_index(drop=True)
     
     # Fase 1: Treinamento
     env_treino = ICGymTradingEnv(df_treino, features=configuracao_features)
-    modelo = PPO("MlpPolicy", env_treino, verbose=0, learning_rate=0.0005)
+    modelo = PPO("MlpPolicy", env_treino, verbose=0, learning_rate=0.0005, seed=semente_ticker(ticker))
     modelo.learn(total_timesteps=total_timesteps)
     
     # Fase 2: Teste
-    env_teste = ICGymTradingEnv(df_teste, features=configuracao_features)
+    env_teste = ICGymTradingEnv(df_teste, features=configuracao_features, registrar_movimentacoes=True)
     obs, info = env_teste.reset()
     done = False
     
@@ -134,14 +220,68 @@ def treinar_ticker(caminho_csv, configuracao_features, total_timesteps=10000):
         obs, reward, terminated, truncated, info = env_teste.step(action)
         done = terminated or truncated
         
-    # Salva o resultado na nova pasta
+    # Salva o resultado (log e modelo) na nova pasta
     log_texto = env_teste.gerar_log_texto()
-    caminho_saida = os.path.join(PASTA_RESULTADOS, f"log_rl_{ticker}.txt")
+    caminho_saida, caminho_modelo = _caminhos_saida(ticker)
+    modelo.save(caminho_modelo)
     
     with open(caminho_saida, "w", encoding="utf-8") as f:
         f.write(log_texto)
         
     print(f"Concluído! Log salvo em: {caminho_saida}")
+    resumo["lucro_teste_pct"] = env_teste.lucro_acumulado * 100
+    resumo["tempo_s"] = time.perf_counter() - inicio
+    return resumo
+
+
+def _inicializar_processo(threads):
+    """Limita as threads do torch em cada processo (evita N processos x todas as CPUs)."""
+    torch.set_num_threads(threads)
+
+
+def _treinar_ticker_seguro(caminho_csv, configuracao_features, total_timesteps):
+    try:
+        return treinar_ticker(caminho_csv, configuracao_features, total_timesteps)
+    except Exception as e:
+        return {"ticker": _ticker_do_arquivo(caminho_csv), "status": f"erro: {e}", "linhas": 0,
+                "tempo_s": 0.0, "lucro_teste_pct": None}
+
+
+def treinar_em_paralelo(arquivos, configuracao_features, total_timesteps=10000,
+                        n_processos=N_PROCESSOS, threads_por_processo=THREADS_POR_PROCESSO, forcar=False):
+    """
+    Distribui treinar_ticker entre processos. Tickers cujo log e modelo são mais novos que a
+    matriz mestra são pulados (retomada), a menos que forcar=True.
+
+    Returns:
+        DataFrame de resumo (ticker, status, linhas, tempo_s, lucro_teste_pct), também salvo em
+        PASTA_RESULTADOS/resumo_treino.csv.
+    """
+    pendentes = [a for a in arquivos if forcar or not ja_treinado(a)]
+    resumos = [
+        {"ticker": _ticker_do_arquivo(a), "status": "já treinado", "linhas": None, "tempo_s": 0.0, "lucro_teste_pct": None}
+        for a in arquivos if a not in pendentes
+    ]
+    if n_processos is None:
+        n_processos = max(1, (os.cpu_count() or 1) // max(1, threads_por_processo))
+    n_processos = max(1, min(n_processos, len(pendentes) or 1))
+    print(f"{len(pendentes)} ativos para treinar ({len(resumos)} já treinados) em {n_processos} processos...")
+
+    inicio = time.perf_counter()
+    # spawn: processos novos, sem herdar o estado de threads do torch do processo pai
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_processos, mp_context=contexto,
+                             initializer=_inicializar_processo, initargs=(threads_por_processo,)) as executor:
+        futuros = [executor.submit(_treinar_ticker_seguro, a, configuracao_features, total_timesteps) for a in pendentes]
+        for futuro in as_completed(futuros):
+            resumos.append(futuro.result())
+
+    df_resumo = pd.DataFrame(resumos).sort_values("ticker").reset_index(drop=True)
+    df_resumo.to_csv(os.path.join(PASTA_RESULTADOS, "resumo_treino.csv"), index=False)
+    print("\n=== RESUMO DO TREINAMENTO ===")
+    print(df_resumo.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"Tempo total: {time.perf_counter() - inicio:.1f}s")
+    return df_resumo
 
 if __name__ == "__main__":
     # Define as regras de quais colunas o robô deve ler
@@ -151,5 +291,4 @@ if __name__ == "__main__":
     arquivos_disponiveis = glob.glob("matrizes_rl/*.csv")
     print(f"Iniciando treinamento em lote para {len(arquivos_disponiveis)} ativos...")
     
-    for arquivo in arquivos_disponiveis:
-        treinar_ticker(arquivo, CONFIG_ESCOLHIDA, total_timesteps=10000)
\ No newline at end of file
+    treinar_em_paralelo(arquivos_disponiveis, CONFIG_ESCOLHIDA, total_timesteps=10000)
\ No newline at end of file
@@ -5,19 +5,19 @@ Requer muitos meses de dados (notícias + preços) para treinar.
 """
 import json
 import logging
-import os
 import warnings
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import joblib
 
+from precos import get_prices
+from sentimento_diario import carregar_sentimento_diario
 from config import (
     ARQUIVO_JSON_MAPEADAS,
     ARQUIVO_MODELO_DECISAO,
@@ -37,25 +37,12 @@ MODELO_TIPO: str = "random_forest"  # "random_forest" (padrão) ou "logistic"
 
 
 def carregar_sentimento_por_dia_ticker(caminho: str) -> Optional[pd.DataFrame]:
-    """Carrega noticias_mapeadas e retorna DataFrame com (data, ticker, score)."""
-    if not os.path.exists(caminho):
-        logger.warning("Arquivo não encontrado: %s", caminho)
-        return None
+    """Retorna DataFrame (data, ticker, sentimento) da tabela de sentimento diário (sentimento_diario.py)."""
     try:
-        df = pd.read_json(caminho)
-        if df.empty or "sentimento_previsto" not in df.columns:
+        df = carregar_sentimento_diario(caminho)
+        if df.empty:
             return None
-        sentimento_map = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0}
-        df["score"] = df["sentimento_previsto"].map(sentimento_map).fillna(0)
-        df["data"] = pd.to_datetime(df["data_normalizada"]).dt.normalize()
-        df_exploded = df.explode("tickers_citados").dropna(subset=["tickers_citados"])
-        agg = (
-            df_exploded.groupby([pd.Grouper(key="data", freq="D"), "tickers_citados"])["score"]
-            .sum()
-            .reset_index()
-        )
-        agg.columns = ["data", "ticker", "sentimento"]
-        return agg
+        return df[["data", "ticker", "sentimento"]]
     except Exception as e:
         logger.exception("Erro ao carregar sentimento: %s", e)
         return None
@@ -65,18 +52,9 @@ def obter_retorno_dia_seguinte(
     tickers: List[str], start: pd.Timestamp, end: pd.Timestamp,
 ) -> pd.DataFrame:
     """Retorna DataFrame (data, ticker, retorno_dia_seguinte). Retorno = (preço_amanhã - preço_hoje) / preço_hoje."""
-    precos = yf.download(tickers, start=start, end=end, repair=True, progress=False, threads=False)
-    if precos.empty or "Close" not in precos.columns:
+    precos = get_prices(tickers, start, end, "Close")
+    if precos.empty:
         return pd.DataFrame()
-    if len(tickers) == 1:
-        close = precos["Close"]
-        if isinstance(close, pd.DataFrame):
-            close = close.iloc[:, 0]
-        precos = pd.DataFrame({tickers[0]: close})
-    else:
-        precos = precos["Close"]
-    if isinstance(precos, pd.Series):
-        precos = precos.to_frame()
     out = []
     for ticker in precos.columns:
         s = precos[ticker].dropna()
@@ -102,7 +80,7 @@ def montar_tabela_treino(
     start = pd.Timestamp(datas.min()) - pd.Timedelta(days=1)
     end = pd.Timestamp(datas.max()) + pd.Timedelta(days=5)
     tickers = df_sent["ticker"].unique().tolist()
-    logger.info("Baixando preços para %d tickers, período %s a %s...", len(tickers), start.date(), end.date())
+    logger.info("Obtendo preços para %d tickers, período %s a %s...", len(tickers), start.date(), end.date())
     df_ret = obter_retorno_dia_seguinte(tickers, start, end)
     if df_ret.empty:
         logger.warning("Nenhum retorno obtido. Verifique tickers e datas.")
@@ -0,0 +1,319 @@
+"""
+Varredura de parâmetros da estratégia de sentimento (limiares, lag e tempo máximo de posição).
+
+Preços e sentimento são carregados uma única vez; a grade inteira é simulada em paralelo sobre
+arrays (cada combinação de parâmetros é uma coluna, como o broadcasting do vectorbt), e o
+resultado é uma tabela ranqueada com métricas fora da amostra em janelas walk-forward.
+
+Uso:
+    python varredura_estrategia.py
+"""
+import itertools
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import COLUNAS_RESUMO, ler_noticias
+from config import ARQUIVO_JSON_MAPEADAS, ARQUIVO_MODELO_DECISAO, ARQUIVO_VARREDURA_ESTRATEGIA
+from precos import get_prices
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+MAPA_SCORE = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0}
+PERIODOS_POR_ANO = 252.0
+# Taxa (0,1%) + derrapagem (0,1%) por operação, como no backtest de criar_estrategia.py
+CUSTO_POR_OPERACAO = 0.002
+N_JANELAS_WALK_FORWARD = 4
+# Fração inicial do período usada só como treino antes da primeira janela de teste
+FRACAO_TREINO_INICIAL = 0.5
+# Pregões depois da última notícia entram na simulação (posições abertas no fim ainda rendem)
+DIAS_APOS_ULTIMA_NOTICIA = 15
+
+# modo "score": compra se sentimento > limite_compra, vende se < limite_venda
+# (LIMITE_COMPRA/LIMITE_VENDA de criar_estrategia.py)
+GRADE_SCORE: Dict[str, Sequence] = {
+    "limite_compra": [0, 1, 2, 3, 4],
+    "limite_venda": [0, -1, -2, -3, -4],
+    "lag": [0, 1, 2, 3],
+    "holding": [0, 1, 2, 3, 5, 10],
+}
+# modo "probabilidade": compra se prob(subir) >= umbral_compra, vende se prob <= umbral_venda
+# (UMBRAL_PROB_COMPRA/UMBRAL_PROB_VENDA de criar_estrategia.py e recomendacao.py)
+GRADE_PROBABILIDADE: Dict[str, Sequence] = {
+    "umbral_compra": [0.5, 0.55, 0.6, 0.65, 0.7, 0.75],
+    "umbral_venda": [0.25, 0.3, 0.35, 0.4, 0.45, 0.5],
+    "lag": [0, 1, 2, 3],
+    "holding": [0, 1, 2, 3, 5, 10],
+}
+LIMIARES = {"score": ("limite_compra", "limite_venda"), "probabilidade": ("umbral_compra", "umbral_venda")}
+
+
+def carregar_dados(caminho_json: str = ARQUIVO_JSON_MAPEADAS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Sentimento diário e retornos de fechamento por ticker, alinhados nos mesmos pregões.
+
+    Notícias de dias sem pregão (fins de semana, feriados) entram no pregão seguinte.
+
+    Args:
+        caminho_json: Base de notícias mapeadas.
+
+    Returns:
+        (sentimento, retornos): DataFrames índice=pregões, colunas=tickers. sentimento é a soma
+        dos scores do pregão (0 sem notícias); retornos é a variação do fechamento (0 sem preço).
+    """
+    df = ler_noticias(caminho_json, COLUNAS_RESUMO)
+    df = df.assign(
+        score=df["sentimento_previsto"].map(MAPA_SCORE).fillna(0),
+        dia=pd.to_datetime(df["data_normalizada"], format="mixed", errors="coerce").dt.normalize(),
+    ).explode("tickers_citados").dropna(subset=["tickers_citados", "dia"])
+    tickers = sorted(df["tickers_citados"].unique())
+    if not tickers:
+        raise ValueError(f"Nenhuma notícia com ticker em '{caminho_json}'.")
+
+    logger.info("Obtendo preços de %d tickers (%s a %s)...", len(tickers), df["dia"].min().date(), df["dia"].max().date())
+    fim = df["dia"].max() + pd.Timedelta(days=DIAS_APOS_ULTIMA_NOTICIA)
+    close = get_prices(tickers, df["dia"].min(), fim, "Close")
+    close = close.dropna(how="all")
+    pregoes = close.index.values.astype("datetime64[D]")
+
+    idx = np.searchsorted(pregoes, df["dia"].values.astype("datetime64[D]"), side="left")
+    df = df[idx < len(pregoes)].assign(pregao=close.index[idx[idx < len(pregoes)]])
+    sentimento = (
+        df.pivot_table(index="pregao", columns="tickers_citados", values="score", aggfunc="sum")
+        .reindex(index=close.index, columns=tickers)
+        .fillna(0.0)
+    )
+    retornos = close.pct_change(fill_method=None).fillna(0.0)
+    return sentimento, retornos
+
+
+def sinal_probabilidade(sentimento: pd.DataFrame, caminho_modelo: str = ARQUIVO_MODELO_DECISAO) -> pd.DataFrame:
+    """
+    Probabilidade de alta do modelo de decisão para cada (pregão, ticker), em uma única chamada
+    de predict_proba (o modelo é o salvo por treinar_modelo_decisao.py).
+    """
+    import joblib
+
+    obj = joblib.load(caminho_modelo)
+    model, scaler = obj["model"], obj["scaler"]
+    valores = sentimento.to_numpy(dtype=np.float64).reshape(-1, 1)
+    prob = model.predict_proba(scaler.transform(valores))[:, 1]
+    return pd.DataFrame(prob.reshape(sentimento.shape), index=sentimento.index, columns=sentimento.columns)
+
+
+def grade_parametros(grade: Dict[str, Sequence]) -> pd.DataFrame:
+    """Produto cartesiano da grade (uma linha por combinação)."""
+    nomes = list(grade)
+    return pd.DataFrame(list(itertools.product(*(grade[n] for n in nomes))), columns=nomes)
+
+
+def simular_grade(
+    sinal: np.ndarray,
+    retornos: np.ndarray,
+    combinacoes: pd.DataFrame,
+    modo: str = "score",
+    custo: float = CUSTO_POR_OPERACAO,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simula todas as combinações de parâmetros de uma vez.
+
+    A cada pregão t o estado (combinações x tickers) é atualizado com o sinal de t - lag; a
+    posição decidida no fechamento de t rende o retorno de t + 1. Cada ticker recebe 1/N do
+    capital, então o retorno diário da carteira é a média entre os tickers.
+
+    Args:
+        sinal: Matriz (pregões x tickers) de score ou probabilidade.
+        retornos: Matriz (pregões x tickers) de retornos de fechamento.
+        combinacoes: Saída de grade_parametros com os limiares do modo, 'lag' e 'holding'
+            (máximo de pregões na posição; 0 = sem limite).
+        modo: "score" ou "probabilidade".
+        custo: Custo por operação (compra ou venda), em fração do valor.
+
+    Returns:
+        (retornos_carteira, operacoes): matriz (pregões x combinações) de retornos diários e
+        total de operações por combinação.
+    """
+    col_compra, col_venda = LIMIARES[modo]
+    n_pregoes, n_tickers = sinal.shape
+    lags = np.sort(combinacoes["lag"].unique())
+    # Um sinal defasado por lag distinto: (lags x pregões x tickers); antes do início não há sinal
+    defasados = np.full((len(lags), n_pregoes, n_tickers), np.nan)
+    for i, lag in enumerate(lags):
+        defasados[i, lag:] = sinal[: n_pregoes - lag] if lag else sinal
+    idx_lag = np.searchsorted(lags, combinacoes["lag"].to_numpy())
+    compra = combinacoes[col_compra].to_numpy(dtype=float)[:, None]
+    venda = combinacoes[col_venda].to_numpy(dtype=float)[:, None]
+    holding = combinacoes["holding"].to_numpy()[:, None]
+    com_limite = holding > 0
+
+    n_comb = len(combinacoes)
+    posicao = np.zeros((n_comb, n_tickers), dtype=bool)
+    dias = np.zeros((n_comb, n_tickers), dtype=np.int32)
+    retornos_carteira = np.zeros((n_pregoes, n_comb))
+    operacoes = np.zeros(n_comb, dtype=np.int64)
+    for t in range(n_pregoes):
+        # Rendimento da posição que vem do fechamento anterior
+        retornos_carteira[t] = (posicao * retornos[t]).mean(axis=1)
+        s = defasados[idx_lag, t]
+        with np.errstate(invalid="ignore"):
+            if modo == "score":
+                entrada, saida = s > compra, s < venda
+            else:
+                entrada, saida = s >= compra, (s <= venda) & (s < compra)
+        sai = posicao & (saida | (com_limite & (dias >= holding)))
+        entra = ~posicao & entrada
+        negocios = sai | entra
+        posicao = (posicao & ~sai) | entra
+        dias = np.where(posicao, dias + 1, 0)
+        n_negocios = negocios.sum(axis=1)
+        retornos_carteira[t] -= custo * n_negocios / n_tickers
+        operacoes += n_negocios
+    return retornos_carteira, operacoes
+
+
+def metricas_colunas(retornos: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Retorno acumulado, Sharpe anualizado e drawdown máximo de cada coluna, com as mesmas
+    fórmulas de scripts/avaliacao_metricas.resumo_metricas.
+    """
+    if len(retornos) == 0:
+        zeros = np.zeros(retornos.shape[1])
+        return {"retorno_acumulado": zeros, "sharpe_ratio": zeros, "max_drawdown": zeros}
+    acumulado = np.cumprod(1 + retornos, axis=0)
+    media = retornos.mean(axis=0)
+    desvio = retornos.std(axis=0, ddof=1) if len(retornos) > 1 else np.zeros(retornos.shape[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(desvio > 0, media / desvio * np.sqrt(PERIODOS_POR_ANO), 0.0)
+    pico = np.maximum.accumulate(acumulado, axis=0)
+    drawdown = (acumulado - pico) / pico
+    return {
+        "retorno_acumulado": acumulado[-1] - 1,
+        "sharpe_ratio": sharpe,
+        "max_drawdown": np.minimum(drawdown.min(axis=0), 0.0),
+    }
+
+
+def janelas_walk_forward(
+    n_pregoes: int, n_janelas: int = N_JANELAS_WALK_FORWARD, fracao_treino: float = FRACAO_TREINO_INICIAL,
+) -> List[Tuple[slice, slice]]:
+    """
+    Janelas walk-forward ancoradas: o treino vai do início até o começo de cada teste e os
+    testes dividem em partes iguais o período após o treino inicial.
+    """
+    inicio_teste = int(n_pregoes * fracao_treino)
+    limites = np.linspace(inicio_teste, n_pregoes, n_janelas + 1).astype(int)
+    return [(slice(0, a), slice(a, b)) for a, b in zip(limites[:-1], limites[1:]) if b > a and a > 0]
+
+
+def varrer(
+    sinal: pd.DataFrame,
+    retornos: pd.DataFrame,
+    grade: Dict[str, Sequence],
+    modo: str = "score",
+    n_janelas: int = N_JANELAS_WALK_FORWARD,
+    custo: float = CUSTO_POR_OPERACAO,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Avalia a grade inteira e as janelas walk-forward.
+
+    Args:
+        sinal: Score ou probabilidade (pregões x tickers), alinhado a `retornos`.
+        retornos: Retornos de fechamento (pregões x tickers).
+        grade: {parâmetro: valores} (ver GRADE_SCORE / GRADE_PROBABILIDADE).
+        modo: "score" ou "probabilidade".
+        n_janelas: Número de janelas de teste walk-forward.
+        custo: Custo por operação.
+
+    Returns:
+        (ranking, selecao):
+        ranking tem uma linha por combinação com métricas no período todo, Sharpe médio dentro
+        da amostra (treinos) e métricas fora da amostra (testes concatenados), ordenado pelo
+        Sharpe fora da amostra. selecao tem, para cada janela, a combinação de melhor Sharpe no
+        treino e o seu desempenho no teste seguinte (a estimativa honesta da varredura).
+    """
+    combinacoes = grade_parametros(grade)
+    logger.info("Simulando %d combinações (%s) em %d pregões x %d tickers...",
+                len(combinacoes), modo, len(sinal), sinal.shape[1])
+    diarios, operacoes = simular_grade(
+        sinal.to_numpy(dtype=float), retornos.to_numpy(dtype=float), combinacoes, modo, custo,
+    )
+
+    janelas = janelas_walk_forward(len(sinal), n_janelas)
+    total = metricas_colunas(diarios)
+    ranking = combinacoes.assign(
+        retorno_total_pct=total["retorno_acumulado"] * 100,
+        sharpe=total["sharpe_ratio"],
+        max_drawdown_pct=total["max_drawdown"] * 100,
+        operacoes=operacoes,
+    )
+    selecao = []
+    if janelas:
+        sharpe_treino = np.vstack([metricas_colunas(diarios[treino])["sharpe_ratio"] for treino, _ in janelas])
+        fora = metricas_colunas(diarios[janelas[0][1].start:janelas[-1][1].stop])
+        ranking = ranking.assign(
+            sharpe_is=sharpe_treino.mean(axis=0),
+            sharpe_oos=fora["sharpe_ratio"],
+            retorno_oos_pct=fora["retorno_acumulado"] * 100,
+            max_drawdown_oos_pct=fora["max_drawdown"] * 100,
+        )
+        for k, (treino, teste) in enumerate(janelas):
+            melhor = int(np.argmax(sharpe_treino[k]))
+            m_teste = metricas_colunas(diarios[teste, melhor:melhor + 1])
+            selecao.append({
+                "janela": k + 1,
+                "treino_fim": sinal.index[treino.stop - 1],
+                "teste_inicio": sinal.index[teste.start],
+                "teste_fim": sinal.index[teste.stop - 1],
+                **combinacoes.iloc[melhor].to_dict(),
+                "sharpe_treino": sharpe_treino[k, melhor],
+                "sharpe_teste": float(m_teste["sharpe_ratio"][0]),
+                "retorno_teste_pct": float(m_teste["retorno_acumulado"][0] * 100),
+            })
+        ranking = ranking.sort_values(["sharpe_oos", "sharpe"], ascending=False)
+    else:
+        ranking = ranking.sort_values("sharpe", ascending=False)
+    return ranking.reset_index(drop=True), pd.DataFrame(selecao)
+
+
+def executar_varredura(
+    caminho_json: str = ARQUIVO_JSON_MAPEADAS,
+    caminho_saida: str = ARQUIVO_VARREDURA_ESTRATEGIA,
+    grades: Optional[Dict[str, Dict[str, Sequence]]] = None,
+) -> pd.DataFrame:
+    """
+    Carrega os dados uma vez, varre as grades de cada modo e grava o ranking em CSV.
+
+    O modo "probabilidade" só roda se houver modelo de decisão salvo.
+
+    Returns:
+        Ranking de todos os modos (coluna 'modo'), também salvo em caminho_saida.
+    """
+    if grades is None:
+        grades = {"score": GRADE_SCORE, "probabilidade": GRADE_PROBABILIDADE}
+    sentimento, retornos = carregar_dados(caminho_json)
+    rankings = []
+    for modo, grade in grades.items():
+        if modo == "probabilidade":
+            if not os.path.exists(ARQUIVO_MODELO_DECISAO):
+                logger.info("Sem modelo de decisão (%s); modo probabilidade ignorado.", ARQUIVO_MODELO_DECISAO)
+                continue
+            sinal = sinal_probabilidade(sentimento)
+        else:
+            sinal = sentimento
+        ranking, selecao = varrer(sinal, retornos, grade, modo)
+        rankings.append(ranking.assign(modo=modo))
+        logger.info("Melhores combinações (%s):\n%s", modo, ranking.head(10).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        if not selecao.empty:
+            logger.info("Walk-forward (%s):\n%s", modo, selecao.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    resultado = pd.concat(rankings, ignore_index=True) if rankings else pd.DataFrame()
+    resultado.to_csv(caminho_saida, index=False)
+    logger.info("Ranking salvo em: %s", caminho_saida)
+    return resultado
+
+
+if __name__ == "__main__":
+    executar_varredura()